@@ -0,0 +1,75 @@
+"""
+Benchmark call placement throughput against the local fake Twilio server.
+
+Compares the blocking one-call-at-a-time path with AsyncTwilioCallHandler:
+
+    python benchmarks/bench_async_dial.py --calls 2000 --latency 0.1
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.fake_twilio import FakeTwilioServer
+from src.async_call_handler import AsyncTwilioCallHandler
+
+
+def make_config(base_url):
+    return {
+        'twilio': {
+            'account_sid': 'ACfake',
+            'auth_token': 'fake',
+            'phone_number': '+15550000000',
+            'test_number': '+15550000001',
+            'twiml_url': 'http://localhost:5001/voice',
+            'api_base_url': base_url,
+        }
+    }
+
+
+def bench_blocking(base_url, leads):
+    """One blocking request per call, like TwilioCallHandler.place_call."""
+    url = f"{base_url}/2010-04-01/Accounts/ACfake/Calls.json"
+    start = time.perf_counter()
+    for lead in leads:
+        requests.post(url, data={'To': lead['phone'], 'From': '+15550000000', 'Url': 'x'},
+                      auth=('ACfake', 'fake'))
+    return time.perf_counter() - start
+
+
+async def bench_async(base_url, leads, max_connections):
+    handler = AsyncTwilioCallHandler(config=make_config(base_url), max_connections=max_connections)
+    async with handler:
+        start = time.perf_counter()
+        sids = await handler.place_calls_async(leads)
+        elapsed = time.perf_counter() - start
+    return elapsed, sum(1 for s in sids if s)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.05, help='Fake API latency in seconds')
+    parser.add_argument('--connections', type=int, default=100)
+    parser.add_argument('--blocking-sample', type=int, default=50,
+                        help='Calls used to measure the blocking path')
+    args = parser.parse_args()
+
+    leads = [{'name': f'Lead {i}', 'phone': f'+1555{i:07d}'} for i in range(args.calls)]
+
+    with FakeTwilioServer(latency=args.latency) as server:
+        blocking = bench_blocking(server.base_url, leads[:args.blocking_sample])
+        print(f"blocking: {args.blocking_sample / blocking:8.1f} calls/s ({args.blocking_sample} calls)")
+
+        elapsed, placed = asyncio.run(bench_async(server.base_url, leads, args.connections))
+        print(f"async:    {placed / elapsed:8.1f} calls/s ({placed}/{args.calls} calls, "
+              f"{args.connections} pooled connections)")
+
+
+if __name__ == '__main__':
+    main()
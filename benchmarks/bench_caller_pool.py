@@ -0,0 +1,99 @@
+"""
+Measure how the dial rate scales with the caller IDs in the pool, against the local fake Twilio server.
+
+    python benchmarks/bench_caller_pool.py --numbers 1 2 4 8 --number-cps 10 --accounts 2
+
+For each pool size the numbers are spread over the given accounts, each limited
+to --number-cps calls per second, and TwilioCallHandler dials --seconds worth of
+calls through the DialingEngine at the rate the pool allows. The rate should grow
+linearly with the numbers, and every number should place about the same share.
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+from collections import Counter
+
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.fake_twilio import FakeTwilioServer
+
+
+def make_config(base_url, numbers, args):
+    accounts = [
+        {
+            'account_sid': f'ACfake{a}',
+            'auth_token': 'fake',
+            'numbers': [f'+1555000{n:04d}' for n in range(numbers) if n % args.accounts == a],
+        }
+        for a in range(min(args.accounts, numbers))
+    ]
+    return {
+        'twilio': {
+            'account_sid': 'ACfake0',
+            'auth_token': 'fake',
+            'phone_number': '+15550000000',
+            'test_number': '+15550000001',
+            'twiml_url': 'http://localhost:5001/voice',
+            'api_base_url': base_url,
+            'number_calls_per_second': args.number_cps,
+            'caller_id_selection': args.strategy,
+            'accounts': accounts,
+        },
+        'call_settings': {'max_concurrent_calls': args.concurrency},
+    }
+
+
+def write_config(path, config):
+    with open(path, 'w') as f:
+        yaml.safe_dump(config, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--numbers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--accounts', type=int, default=2)
+    parser.add_argument('--number-cps', type=float, default=10, help='Calls per second per caller ID')
+    parser.add_argument('--strategy', default='least_loaded', choices=['least_loaded', 'round_robin'])
+    parser.add_argument('--seconds', type=float, default=3, help='Dialing time per pool size at the expected rate')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--latency', type=float, default=0.05, help='Fake API latency in seconds')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_caller_pool_')
+    with FakeTwilioServer(latency=args.latency) as server:
+        # The call handler module builds its singleton from config.yaml in the working directory
+        write_config(os.path.join(workdir, 'config.yaml'), make_config(server.base_url, 1, args))
+        os.chdir(workdir)
+        from src.call_handler import TwilioCallHandler
+        from src.dialer import DialingEngine
+        logging.getLogger().setLevel(logging.WARNING)
+
+        print(f"{'numbers':>8} {'expected':>10} {'measured':>10} {'per number min/max':>20}")
+        for numbers in args.numbers:
+            config_path = os.path.join(workdir, f'config_{numbers}.yaml')
+            write_config(config_path, make_config(server.base_url, numbers, args))
+            handler = TwilioCallHandler(config_path)
+            engine = DialingEngine(handler.create_call, calls_per_second=handler.calls_per_second,
+                                   max_concurrent_calls=handler.max_concurrent_calls, burst=1)
+            count = int(handler.pool.rate * args.seconds)
+            leads = ({'name': f'Lead {i}', 'phone': f'+1585{200 + i // 10000:03d}{i % 10000:04d}'}
+                     for i in range(count))
+
+            first_call = len(server.calls)
+            start = time.perf_counter()
+            results = engine.dial(leads)
+            elapsed = time.perf_counter() - start
+
+            per_number = Counter(call['from'] for call in server.calls[first_call:])
+            placed = sum(1 for r in results if r.success)
+            print(f"{numbers:>8} {handler.pool.rate:>8.1f}/s {placed / elapsed:>8.1f}/s "
+                  f"{min(per_number.values(), default=0):>10}/{max(per_number.values(), default=0)}")
+
+
+if __name__ == '__main__':
+    main()
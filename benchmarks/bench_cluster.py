@@ -0,0 +1,132 @@
+"""
+Run a coordinator and several dialing worker processes against the local fake Twilio server.
+
+    python benchmarks/bench_cluster.py --leads 2000 --workers 4 --rate 200 --kill-after 2
+
+Everything runs in a temporary directory with its own config.yaml and stores.
+The lead file is split in-process, then worker processes (`run.py worker`) dial
+the partitions through the shared rate limit. With --kill-after one worker is
+SIGKILLed mid-run, and its partitions are picked up by the others once its
+lease expires. At the end every number should have been dialed, at most a
+handful twice (calls in flight when the worker died), and no second should
+have seen more calls than the rate plus one second of burst.
+
+With --window (e.g. 00:00-24:00) the workers dial through the calling-window
+scheduler instead, holding their partitions until every lead is dialed.
+"""
+import os
+import sys
+import time
+import signal
+import argparse
+import tempfile
+import subprocess
+from collections import Counter
+
+import yaml
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from src.fake_twilio import FakeTwilioServer
+
+
+def write_config(workdir, base_url, args):
+    config = {
+        'twilio': {
+            'account_sid': 'ACfake',
+            'auth_token': 'fake',
+            'phone_number': '+15550000000',
+            'test_number': '+15550000001',
+            'twiml_url': 'http://localhost:5001/voice',
+            'api_base_url': base_url,
+        },
+        'call_settings': {'max_concurrent_calls': args.concurrency},
+        'cluster': {
+            'store': os.path.join(workdir, 'cluster.db'),
+            'state_db': os.path.join(workdir, 'dialer_state.db'),
+            'partitions_dir': os.path.join(workdir, 'partitions'),
+            'partitions': args.partitions,
+            'calls_per_second': args.rate,
+            'lease_ttl': args.lease_ttl,
+            'heartbeat_interval': args.lease_ttl / 3,
+        },
+    }
+    if args.window:
+        config['scheduling'] = {'windows': {'default': [args.window]}}
+    with open(os.path.join(workdir, 'config.yaml'), 'w') as f:
+        yaml.safe_dump(config, f)
+
+
+def write_leads(workdir, count):
+    os.makedirs(os.path.join(workdir, 'leads'))
+    path = os.path.join(workdir, 'leads', 'leads.csv')
+    with open(path, 'w') as f:
+        f.write("name,phone\n")
+        for i in range(count):
+            f.write(f"Lead {i},+1585{200 + i // 10000:03d}{i % 10000:04d}\n")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--leads', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--partitions', type=int, default=16)
+    parser.add_argument('--rate', type=float, default=200, help='Cluster-wide calls per second')
+    parser.add_argument('--concurrency', type=int, default=8, help='Dialer threads per worker')
+    parser.add_argument('--latency', type=float, default=0.05, help='Fake API latency in seconds')
+    parser.add_argument('--lease-ttl', type=float, default=3.0)
+    parser.add_argument('--kill-after', type=float, default=None,
+                        help='SIGKILL the first worker after this many seconds')
+    parser.add_argument('--window', default=None,
+                        help='Calling window for every day (e.g. 00:00-24:00) to dial through the scheduler')
+    parser.add_argument('--timeout', type=float, default=300)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_cluster_')
+    with FakeTwilioServer(latency=args.latency) as server:
+        write_config(workdir, server.base_url, args)
+        lead_file = write_leads(workdir, args.leads)
+        # The call handler reads config.yaml from the working directory on import
+        os.chdir(workdir)
+        from src.cluster import ClusterStore, Coordinator
+
+        store = ClusterStore(os.path.join(workdir, 'cluster.db'))
+        coordinator = Coordinator(store, args.partitions, os.path.join(workdir, 'partitions'))
+        coordinator.split_file(lead_file)
+
+        start = time.time()
+        workers = [
+            subprocess.Popen([sys.executable, os.path.join(ROOT, 'run.py'), 'worker',
+                              '--worker-id', f'worker-{i}', '--exit-when-idle'], cwd=workdir)
+            for i in range(args.workers)
+        ]
+        killed = False
+        while any(w.poll() is None for w in workers) and time.time() - start < args.timeout:
+            if args.kill_after is not None and not killed and time.time() - start >= args.kill_after:
+                workers[0].send_signal(signal.SIGKILL)
+                killed = True
+                print(f"killed worker-0 after {time.time() - start:.1f}s ({len(server.calls)} calls placed)")
+            coordinator.reap()
+            time.sleep(0.2)
+        elapsed = time.time() - start
+        for w in workers:
+            if w.poll() is None:
+                w.terminate()
+
+        calls = list(server.calls)
+
+    per_number = Counter(call['to'] for call in calls)
+    per_second = Counter(call['date_created'] for call in calls)
+    print(f"workers:     {args.workers} ({'one killed' if killed else 'none killed'}), "
+          f"{args.partitions} partitions, {elapsed:.1f}s")
+    print(f"dialed:      {len(per_number)}/{args.leads} numbers, {len(calls) - len(per_number)} dialed twice")
+    print(f"rate:        {len(calls) / elapsed:.1f} calls/s overall, peak {max(per_second.values(), default=0)} "
+          f"in one second (limit {args.rate:g}/s)")
+    print(f"partitions:  {store.status()['partitions']}")
+    print(f"work dir:    {workdir}")
+
+
+if __name__ == '__main__':
+    main()
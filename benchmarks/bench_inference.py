@@ -0,0 +1,90 @@
+"""
+Compare inference backends for Whisper and BART on the same inputs.
+
+For every backend this reports load time, resident memory growth, mean
+latency per input and similarity of the outputs to the plain PyTorch run:
+
+    python benchmarks/bench_inference.py downloads/*.mp3 --backends torch torch-int8 onnx
+
+Each backend runs in its own process so memory numbers do not overlap.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from inference_backends import BACKENDS, TORCH, build_pipeline, check_against_baseline
+from model_registry import WHISPER_MODEL, SUMMARIZER_MODEL, _rss_bytes
+
+SUMMARY_INPUT = (
+    "The customer has provided the following information: The customer has visited a dentist "
+    "in the last 6 months. The customer does currently have dental insurance. The customer "
+    "would like to be connected with a dental care specialist now."
+)
+
+
+def run_backend(backend, files):
+    """Measure one backend in the current process and return its results."""
+    report = {'backend': backend}
+
+    rss = _rss_bytes()
+    start = time.perf_counter()
+    asr = build_pipeline("automatic-speech-recognition", WHISPER_MODEL, backend)
+    report['whisper_load_s'] = time.perf_counter() - start
+    report['whisper_rss_mb'] = (_rss_bytes() - rss) / 2**20
+
+    start = time.perf_counter()
+    report['transcripts'] = [asr(f, return_timestamps=True)['text'] for f in files]
+    report['whisper_latency_s'] = (time.perf_counter() - start) / max(len(files), 1)
+
+    rss = _rss_bytes()
+    start = time.perf_counter()
+    summarizer = build_pipeline("summarization", SUMMARIZER_MODEL, backend)
+    report['bart_load_s'] = time.perf_counter() - start
+    report['bart_rss_mb'] = (_rss_bytes() - rss) / 2**20
+
+    inputs = [SUMMARY_INPUT] + [t for t in report['transcripts'] if len(t.split()) > 20]
+    start = time.perf_counter()
+    report['summaries'] = [
+        summarizer(text, max_length=60, min_length=20, do_sample=False)[0]['summary_text'] for text in inputs
+    ]
+    report['bart_latency_s'] = (time.perf_counter() - start) / len(inputs)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('files', nargs='+', help='Recordings to transcribe')
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_backend(args.worker, args.files)))
+        return
+
+    reports = {}
+    for backend in [TORCH] + [b for b in args.backends if b != TORCH]:
+        out = subprocess.run(
+            [sys.executable, __file__, '--worker', backend, *args.files],
+            capture_output=True, text=True, check=True
+        ).stdout
+        reports[backend] = json.loads(out.strip().splitlines()[-1])
+
+    baseline = reports[TORCH]
+    print(f"{'backend':<12}{'whisper s':>10}{'whisper MB':>12}{'bart s':>9}{'bart MB':>9}{'asr sim':>9}{'sum sim':>9}")
+    for backend, r in reports.items():
+        asr = check_against_baseline(baseline['transcripts'], r['transcripts'])
+        summ = check_against_baseline(baseline['summaries'], r['summaries'])
+        print(f"{backend:<12}{r['whisper_latency_s']:>10.2f}{r['whisper_rss_mb']:>12.0f}"
+              f"{r['bart_latency_s']:>9.2f}{r['bart_rss_mb']:>9.0f}"
+              f"{asr['mean_similarity']:>9.3f}{summ['mean_similarity']:>9.3f}"
+              f"{'' if asr['passed'] and summ['passed'] else '  (below threshold)'}")
+
+
+if __name__ == '__main__':
+    main()
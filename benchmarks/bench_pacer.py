@@ -0,0 +1,65 @@
+"""
+Compare fixed-rate dialing with the predictive pacer on simulated call traffic.
+
+    python benchmarks/bench_pacer.py --hours 8 --target-abandon 0.03
+    python benchmarks/bench_pacer.py --agents 5 --answer-rate 0.4 --handle-time 90
+
+Without --agents every built-in scenario is run. The fixed rate defaults to the
+old one call per delay_between_calls (2s).
+"""
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from pacer import Pacer, DialerSimulator
+
+# (agents, answer rate, mean handle time in seconds)
+SCENARIOS = [
+    (1, 0.3, 120),
+    (5, 0.3, 120),
+    (5, 0.6, 60),
+    (20, 0.2, 180),
+    (50, 0.3, 120),
+]
+
+
+def report(label, result):
+    print(f"  {label:<14} {result['calls_per_second']:6.3f} calls/s  "
+          f"answered {result['answered']:6d}  abandoned {result['abandon_rate']:6.1%}  "
+          f"utilization {result['utilization']:6.1%}  "
+          f"connects/agent-hour {result['connects_per_agent_hour']:5.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=float, default=8)
+    parser.add_argument("--agents", type=int)
+    parser.add_argument("--answer-rate", type=float, default=0.3)
+    parser.add_argument("--handle-time", type=float, default=120)
+    parser.add_argument("--ring-time", type=float, default=15)
+    parser.add_argument("--ivr-time", type=float, default=30,
+                        help="Seconds of IVR questions before an answered call needs an agent")
+    parser.add_argument("--fixed-rate", type=float, default=0.5)
+    parser.add_argument("--target-abandon", type=float, default=0.03)
+    parser.add_argument("--max-rate", type=float, default=20)
+    parser.add_argument("--margin", type=float, default=1.0,
+                        help="Standard deviations of safety on expected hangups and answers")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    scenarios = [(args.agents, args.answer_rate, args.handle_time)] if args.agents else SCENARIOS
+    duration = args.hours * 3600
+    for agents, answer_rate, handle_time in scenarios:
+        sim = DialerSimulator(agents=agents, answer_rate=answer_rate, ring_time=args.ring_time,
+                              handle_time=handle_time, ivr_time=args.ivr_time, seed=args.seed)
+        print(f"{agents} agents, {answer_rate:.0%} answer rate, {handle_time:.0f}s handle time, {args.hours:g}h:")
+        report("fixed rate", sim.run(duration, fixed_rate=args.fixed_rate))
+        pacer = Pacer(agents=agents, target_abandon_rate=args.target_abandon, max_rate=args.max_rate,
+                      margin=args.margin, ivr_time=args.ivr_time)
+        report("pacer", sim.run(duration, pacer=pacer))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Compare the old per-row open/append CSV logging with the buffered RecordWriter.
+
+    python benchmarks/bench_record_writer.py --rows 20000 --threads 8
+"""
+import os
+import sys
+import csv
+import time
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from record_writer import RecordWriter, SCHEMAS, FSYNC_POLICIES
+
+FIELDS = SCHEMAS['responses']
+
+
+def make_row(i):
+    return {'phone_number': f'+1555{i % 10000:07d}', 'question': 'Do you currently have dental insurance?',
+            'answer': '1', 'timestamp': '2025-01-01 00:00:00', 'call_sid': f'CA{i:032d}'}
+
+
+def per_row_append(path, i):
+    """What voice_api.log_response used to do for every event."""
+    file_exists = os.path.isfile(path)
+    with open(path, 'a', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        if not file_exists:
+            writer.writeheader()
+        writer.writerow(make_row(i))
+
+
+def run_threads(n_threads, rows, fn):
+    per_thread = rows // n_threads
+    threads = [threading.Thread(target=lambda t=t: [fn(t * per_thread + i) for i in range(per_thread)])
+               for t in range(n_threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start
+
+
+def count_rows(path):
+    with open(path, newline='') as f:
+        return sum(1 for _ in csv.DictReader(f))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'per_row.csv')
+        elapsed = run_threads(args.threads, args.rows, lambda i: per_row_append(path, i))
+        print(f"per-row open/append: {args.rows / elapsed:10.0f} rows/s ({count_rows(path)} rows written)")
+
+        for policy in FSYNC_POLICIES:
+            path = os.path.join(tmp, f'writer_{policy}.csv')
+            rows = args.rows if policy != 'always' else min(args.rows, 2000)
+            writer = RecordWriter(path, FIELDS, fsync=policy)
+            elapsed = run_threads(args.threads, rows, lambda i: writer.write(make_row(i)))
+            start = time.perf_counter()
+            writer.close()
+            drain = time.perf_counter() - start
+            print(f"RecordWriter fsync={policy:<6}: {rows / (elapsed + drain):10.0f} rows/s "
+                  f"({count_rows(path)} rows written, {drain * 1000:.0f} ms final flush)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Measure the lead scheduler's add, restore and release throughput.
+
+    python benchmarks/bench_scheduler.py --leads 1000000
+
+Leads get random US/Canadian numbers and priorities and are scheduled against
+the default 09:00-20:00 window on a simulated clock, then released a full day
+later so every lead is due.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from scheduler import AREA_CODE_TIMEZONES, LeadScheduler
+from state_store import StateStore
+
+BATCH = 1000
+
+
+def make_leads(count, seed):
+    rng = random.Random(seed)
+    area_codes = sorted(AREA_CODE_TIMEZONES)
+    return [{'name': f"Lead {i}", 'phone': f"+1{rng.choice(area_codes)}{rng.randint(200, 999)}{i % 10000:04d}",
+             'priority': rng.randint(0, 9)} for i in range(count)]
+
+
+def rate(count, seconds):
+    return f"{count / seconds:>10,.0f} leads/s ({seconds:.1f}s)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    leads = make_leads(args.leads, args.seed)
+    clock = [1760000000.0]
+    with tempfile.TemporaryDirectory() as tmp:
+        store = StateStore(os.path.join(tmp, "state.db"))
+        scheduler = LeadScheduler(store, clock=lambda: clock[0])
+
+        start = time.perf_counter()
+        for i in range(0, len(leads), BATCH):
+            scheduler.add_many(leads[i:i + BATCH])
+        added = time.perf_counter() - start
+        count = len(scheduler)
+        print(f"add      {rate(count, added)}, {count:,} unique numbers")
+
+        restored = LeadScheduler(store, clock=lambda: clock[0])
+        start = time.perf_counter()
+        restored.restore()
+        print(f"restore  {rate(count, time.perf_counter() - start)}")
+
+        # A day later every lead is inside a window at some point; release at 15:00 UTC, inside the
+        # window across the continental US (Hawaii, Alaska and the Pacific territories stay waiting)
+        clock[0] = clock[0] - clock[0] % 86400 + 86400 + 15 * 3600
+        start = time.perf_counter()
+        released = 0
+        while restored.pop_ready() is not None:
+            released += 1
+        print(f"release  {rate(released, time.perf_counter() - start)}, {len(restored):,} still waiting")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Compare recordings-per-minute of the per-file Whisper loop with the batching
+TranscriptionService on the same recordings.
+
+    python benchmarks/bench_transcription.py downloads/*.mp3 --batch 8
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from transcribe import transcriber
+from transcription_service import TranscriptionService
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('files', nargs='+', help='Audio files to transcribe')
+    parser.add_argument('--batch', type=int, default=8, help='Max batch size for the service')
+    parser.add_argument('--max-wait', type=float, default=0.5)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    for f in args.files:
+        transcriber(f, return_timestamps=True)
+    loop = time.perf_counter() - start
+    print(f"per-file loop: {len(args.files) / loop * 60:8.1f} recordings/min")
+
+    service = TranscriptionService(transcriber, max_batch_size=args.batch, max_wait=args.max_wait)
+    start = time.perf_counter()
+    service.transcribe_many(args.files)
+    batched = time.perf_counter() - start
+    service.stop()
+    print(f"batched (<= {args.batch}): {len(args.files) / batched * 60:8.1f} recordings/min "
+          f"({loop / batched:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Compare building IVR TwiML per request with rendering the precompiled cache.
+
+    python benchmarks/bench_twiml.py --iterations 20000
+"""
+import os
+import sys
+import timeit
+import argparse
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from twilio.twiml.voice_response import VoiceResponse, Gather
+from twiml_cache import TwimlCache, compile_twiml, slot
+
+QUESTIONS = {
+    1: "Have you visited a dentist in the last 6 months?",
+    2: "Do you currently have dental insurance?",
+    3: "Would you like to be connected with a dental care specialist now?"
+}
+
+
+def build_per_request(step, campaign):
+    """What /voice used to do on every hit."""
+    response = VoiceResponse()
+    gather = Gather(num_digits=1, action=f"/voice?step={step + 1}" + (f"&campaign={quote(campaign)}" if campaign else ""),
+                    method="POST", timeout=10)
+    gather.say(QUESTIONS[step])
+    response.append(gather)
+    return str(response).encode('utf-8')
+
+
+def compile_questions(questions):
+    compiled = {}
+    for step, question in questions.items():
+        response = VoiceResponse()
+        gather = Gather(num_digits=1, action=f"/voice?step={step + 1}{slot('campaign')}", method="POST", timeout=10)
+        gather.say(question)
+        response.append(gather)
+        compiled[step] = compile_twiml(response)
+    return compiled
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    cache = TwimlCache(compile_questions)
+    campaign = "spring-recall"
+    assert cache.get(QUESTIONS, 2, version=1).render(campaign=f"&campaign={quote(campaign)}") == build_per_request(2, campaign)
+
+    built = timeit.timeit(lambda: build_per_request(2, campaign), number=args.iterations)
+    cached = timeit.timeit(lambda: cache.get(QUESTIONS, 2, version=1).render(campaign=f"&campaign={quote(campaign)}"),
+                           number=args.iterations)
+    print(f"build per request: {built / args.iterations * 1e6:7.1f} us/response")
+    print(f"compiled cache:    {cached / args.iterations * 1e6:7.1f} us/response ({built / cached:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
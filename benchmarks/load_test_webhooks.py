@@ -0,0 +1,119 @@
+"""
+Load-test the /voice webhook and report requests per second and latency.
+
+Starts the production server (src/serve.py) with the given worker and thread
+counts on a free port, or targets a running server with --url:
+
+    python benchmarks/load_test_webhooks.py --workers 4 --threads 8 --requests 5000 --concurrency 64
+    python benchmarks/load_test_webhooks.py --url http://localhost:5001
+
+Requests are the first IVR step, which only renders TwiML. Pass --with-answers
+to also post keypad answers, which are written to logs/ like real calls.
+"""
+import os
+import sys
+import time
+import socket
+import argparse
+import statistics
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+SERVE_SCRIPT = os.path.join(os.path.dirname(__file__), '..', 'src', 'serve.py')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, workers, threads):
+    env = dict(os.environ, HOST='127.0.0.1', PORT=str(port), WEB_WORKERS=str(workers),
+               WEB_THREADS=str(threads), MODEL_WARMUP='0')
+    proc = subprocess.Popen([sys.executable, SERVE_SCRIPT], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            requests.get(url + "/", timeout=1)
+            return proc, url
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("Server did not start within 30s")
+
+
+def run_load(url, total, concurrency, with_answers):
+    local = threading.local()
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def one(i):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        if with_answers:
+            path, data = "/voice?step=2", {'Digits': '1', 'From': f'+1555{i % 10000:07d}', 'CallSid': f'CALOAD{i:026d}'}
+        else:
+            path, data = "/voice?step=1", {'From': f'+1555{i % 10000:07d}', 'CallSid': f'CALOAD{i:026d}'}
+        start = time.perf_counter()
+        try:
+            ok = session.post(url + path, data=data, timeout=30).status_code == 200
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors[0] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - start
+    return wall, sorted(latencies), errors[0]
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(int(len(sorted_values) * p), len(sorted_values) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Target a running server instead of starting one")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--with-answers", action="store_true")
+    args = parser.parse_args()
+
+    proc = None
+    url = args.url
+    if url is None:
+        proc, url = start_server(free_port(), args.workers, args.threads)
+    try:
+        run_load(url, min(args.requests, 100), args.concurrency, args.with_answers)  # warm connections
+        wall, latencies, errors = run_load(url, args.requests, args.concurrency, args.with_answers)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    label = url if args.url else f"{args.workers} workers x {args.threads} threads"
+    print(f"{label}: {args.requests} requests, concurrency {args.concurrency}")
+    print(f"  {args.requests / wall:8.1f} req/s, {errors} errors")
+    print(f"  latency p50 {percentile(latencies, 0.5) * 1000:.1f} ms, "
+          f"p95 {percentile(latencies, 0.95) * 1000:.1f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.1f} ms, "
+          f"mean {statistics.mean(latencies) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
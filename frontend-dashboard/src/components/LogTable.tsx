@@ -1,54 +1,163 @@
 import React, { useEffect, useState } from 'react';
-import Papa from 'papaparse';
 
 type LogRow = {
   phone_number: string;
   question?: string;
   answer?: string;
-  summary?: string;
-  action_items?: string;
+  call_sid?: string;
   timestamp?: string;
 };
 
+type LogPage = {
+  items: LogRow[];
+  page: number;
+  page_size: number;
+  total: number;
+  pages: number;
+};
+
+type Filters = {
+  phone: string;
+  call_sid: string;
+  date_from: string;
+  date_to: string;
+};
+
+type CallStatus = {
+  call_sid: string;
+  status: string;
+  phone_number?: string;
+};
+
+const PAGE_SIZE = 50;
+const MAX_RECENT_CALLS = 20;
+const emptyFilters: Filters = { phone: '', call_sid: '', date_from: '', date_to: '' };
+
 const LogTable: React.FC = () => {
-  const [data, setData] = useState<LogRow[]>([]);
+  const [data, setData] = useState<LogPage | null>(null);
+  const [page, setPage] = useState(1);
+  const [filters, setFilters] = useState<Filters>(emptyFilters);
+  const [sortAsc, setSortAsc] = useState(false);
+  const [reloadToken, setReloadToken] = useState(0);
+  const [calls, setCalls] = useState<CallStatus[]>([]);
 
   useEffect(() => {
-    fetch('/logs/responses.csv')
-      .then(response => response.text())
-      .then(csvText => {
-        const parsed = Papa.parse<LogRow>(csvText, { header: true });
-        setData(parsed.data);
+    const params = new URLSearchParams({
+      page: String(page),
+      page_size: String(PAGE_SIZE),
+      order: sortAsc ? 'asc' : 'desc',
+    });
+    Object.entries(filters).forEach(([key, value]) => {
+      if (value) params.set(key, value);
+    });
+
+    const controller = new AbortController();
+    fetch(`/api/logs/responses?${params}`, { signal: controller.signal })
+      .then(response => response.json())
+      .then((body: LogPage) => setData(body))
+      .catch(error => {
+        if (error.name !== 'AbortError') console.error('Failed to load logs', error);
       });
-  }, []);
+    return () => controller.abort();
+  }, [page, filters, sortAsc, reloadToken]);
+
+  // Live updates: new answers are applied to the first page in place instead of refetching
+  useEffect(() => {
+    const source = new EventSource('/events?kinds=response,call_status,resync');
+
+    source.addEventListener('response', (event: MessageEvent) => {
+      const row: LogRow = JSON.parse(event.data);
+      const matches =
+        (!filters.phone || row.phone_number === filters.phone) &&
+        (!filters.call_sid || row.call_sid === filters.call_sid) &&
+        (!filters.date_from || (row.timestamp ?? '') >= filters.date_from) &&
+        (!filters.date_to || (row.timestamp ?? '') <= `${filters.date_to} 23:59:59`);
+      if (!matches) return;
+
+      setData(current => {
+        if (!current) return current;
+        const total = current.total + 1;
+        const pages = Math.ceil(total / current.page_size);
+        const items = page === 1 && !sortAsc
+          ? [row, ...current.items].slice(0, current.page_size)
+          : current.items;
+        return { ...current, items, total, pages };
+      });
+    });
+
+    source.addEventListener('call_status', (event: MessageEvent) => {
+      const update: CallStatus = JSON.parse(event.data);
+      setCalls(current =>
+        [update, ...current.filter(call => call.call_sid !== update.call_sid)].slice(0, MAX_RECENT_CALLS)
+      );
+    });
+
+    // Events were missed (slow connection or server restart): reload the current page
+    source.addEventListener('resync', () => setReloadToken(token => token + 1));
+
+    return () => source.close();
+  }, [page, filters, sortAsc]);
+
+  const updateFilter = (key: keyof Filters) => (event: React.ChangeEvent<HTMLInputElement>) => {
+    setFilters({ ...filters, [key]: event.target.value });
+    setPage(1);
+  };
+
+  const pages = data?.pages ?? 0;
 
   return (
     <div className="p-4">
       <h1 className="text-xl font-bold mb-4">Call Log Dashboard</h1>
+      {calls.length > 0 && (
+        <div className="flex flex-wrap gap-2 mb-4">
+          {calls.map(call => (
+            <span key={call.call_sid} className="border rounded px-2 py-1 text-sm">
+              {call.phone_number ?? call.call_sid}: {call.status}
+            </span>
+          ))}
+        </div>
+      )}
+      <div className="flex gap-2 mb-4">
+        <input className="border p-2" placeholder="Phone" value={filters.phone} onChange={updateFilter('phone')} />
+        <input className="border p-2" placeholder="CallSid" value={filters.call_sid} onChange={updateFilter('call_sid')} />
+        <input className="border p-2" type="date" value={filters.date_from} onChange={updateFilter('date_from')} />
+        <input className="border p-2" type="date" value={filters.date_to} onChange={updateFilter('date_to')} />
+      </div>
       <table className="table-auto border-collapse border border-gray-300 w-full">
         <thead>
           <tr>
             <th className="border p-2">Phone</th>
             <th className="border p-2">Question</th>
             <th className="border p-2">Answer</th>
-            <th className="border p-2">Summary</th>
-            <th className="border p-2">Action Items</th>
-            <th className="border p-2">Timestamp</th>
+            <th className="border p-2">CallSid</th>
+            <th className="border p-2 cursor-pointer" onClick={() => setSortAsc(!sortAsc)}>
+              Timestamp {sortAsc ? '▲' : '▼'}
+            </th>
           </tr>
         </thead>
         <tbody>
-          {data.map((row, idx) => (
+          {data?.items.map((row, idx) => (
             <tr key={idx}>
               <td className="border p-2">{row.phone_number}</td>
               <td className="border p-2">{row.question}</td>
               <td className="border p-2">{row.answer}</td>
-              <td className="border p-2">{row.summary}</td>
-              <td className="border p-2">{row.action_items}</td>
+              <td className="border p-2">{row.call_sid}</td>
               <td className="border p-2">{row.timestamp}</td>
             </tr>
           ))}
         </tbody>
       </table>
+      <div className="flex items-center gap-4 mt-4">
+        <button className="border p-2" disabled={page <= 1} onClick={() => setPage(page - 1)}>
+          Previous
+        </button>
+        <span>
+          Page {pages ? page : 0} of {pages} ({data?.total ?? 0} rows)
+        </span>
+        <button className="border p-2" disabled={page >= pages} onClick={() => setPage(page + 1)}>
+          Next
+        </button>
+      </div>
     </div>
   );
 };
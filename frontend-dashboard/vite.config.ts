@@ -4,4 +4,12 @@ import react from '@vitejs/plugin-react'
 // https://vite.dev/config/
 export default defineConfig({
   plugins: [react()],
+  server: {
+    // Forward API calls to the Flask voice server during development
+    proxy: {
+      '/api': 'http://localhost:5001',
+      '/logs': 'http://localhost:5001',
+      '/events': 'http://localhost:5001',
+    },
+  },
 })
@@ -1,4 +1,43 @@
-from src import watcher
+import os
+import sys
+import signal
+import logging
+import argparse
+
+SERVE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src', 'serve.py')
 
 if __name__ == "__main__":
-    watcher.run()
+    parser = argparse.ArgumentParser(description="Run the outbound dialer")
+    parser.add_argument("mode", nargs="?", choices=["watcher", "web", "jobs", "all", "coordinator", "worker"],
+                        default="watcher",
+                        help="watcher: lead file watcher (default); web: webhook server and its "
+                             "job consumers; jobs: the job consumers alone; all: watcher and web, "
+                             "supervised in one process tree; coordinator / worker: "
+                             "multi-process dialing, see the cluster section of config.yaml")
+    parser.add_argument("--worker-id", help="worker mode: unique worker name (default: host and pid)")
+    parser.add_argument("--exit-when-idle", action="store_true",
+                        help="worker mode: exit once every partition is done")
+    args = parser.parse_args()
+
+    if args.mode == "watcher":
+        from src import watcher
+        watcher.run()
+    elif args.mode == "coordinator":
+        from src import cluster
+        cluster.run_coordinator()
+    elif args.mode == "worker":
+        from src import cluster
+        cluster.run_worker(args.worker_id, exit_when_idle=args.exit_when_idle)
+    elif args.mode == "jobs":
+        os.execv(sys.executable, [sys.executable, SERVE_SCRIPT, '--jobs'])
+    else:
+        from src.supervisor import Supervisor
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        # The web workers only enqueue jobs; one jobs process runs them and holds the models
+        commands = {
+            'web': [sys.executable, SERVE_SCRIPT],
+            'jobs': [sys.executable, SERVE_SCRIPT, '--jobs'],
+        }
+        if args.mode == "all":
+            commands['watcher'] = [sys.executable, os.path.abspath(__file__), 'watcher']
+        Supervisor(commands, reload_signals={'web': signal.SIGHUP}).run()
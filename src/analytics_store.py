@@ -0,0 +1,382 @@
+"""
+Columnar call-analytics store.
+
+Events are appended as JSON lines to small per-process segment files:
+
+    logs/analytics/segments/<kind>/<pid>-<time>.jsonl
+
+A compactor periodically turns closed segments into Parquet, partitioned by
+event date, and merges small files within a partition:
+
+    logs/analytics/<kind>/date=YYYY-MM-DD/part-*.parquet
+
+Queries go through pyarrow.dataset, so they read only the requested columns
+and prune partitions outside the requested date range.
+"""
+import os
+import json
+import glob
+import time
+import uuid
+import threading
+import logging
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_DIR = os.path.join(os.path.dirname(__file__), '..', 'logs', 'analytics')
+
+# Columns stored for each event kind; every column is a string
+EVENT_COLUMNS = {
+    'responses': ['phone_number', 'question', 'answer', 'call_sid', 'campaign', 'timestamp'],
+    'summaries': ['phone_number', 'call_sid', 'transcript', 'summary', 'action_items', 'campaign', 'timestamp'],
+}
+
+_OPEN_SUFFIX = '.jsonl.open'
+_CLOSED_SUFFIX = '.jsonl'
+
+
+# Seconds past segment_max_age before an idle segment of a live process counts as orphaned
+_ORPHAN_GRACE = 5.0
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == 'nt':
+        # os.kill would terminate it; fall back on the segment's age
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _event_date(timestamp: str) -> str:
+    return (timestamp or datetime.now().strftime('%Y-%m-%d'))[:10]
+
+
+class AnalyticsStore:
+    """Append events to JSONL segments and query compacted, date-partitioned Parquet."""
+
+    def __init__(self, root: str = ANALYTICS_DIR, segment_max_bytes: int = 4 * 2**20,
+                 segment_max_age: float = 60, merge_threshold: int = 8):
+        """
+        Args:
+            root: Directory holding segments and Parquet partitions
+            segment_max_bytes: Size at which the open segment is closed
+            segment_max_age: Seconds after which the open segment is closed
+            merge_threshold: Parquet files in one partition that trigger a merge
+        """
+        self.root = root
+        self.segment_max_bytes = segment_max_bytes
+        self.segment_max_age = segment_max_age
+        self.merge_threshold = merge_threshold
+        self._segments: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._compactor: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # Appending
+
+    def _segment_dir(self, kind: str) -> str:
+        return os.path.join(self.root, 'segments', kind)
+
+    def _open_segment(self, kind: str) -> Dict[str, Any]:
+        os.makedirs(self._segment_dir(kind), exist_ok=True)
+        name = f"{os.getpid()}-{time.time_ns()}"
+        path = os.path.join(self._segment_dir(kind), name + _OPEN_SUFFIX)
+        return {'path': path, 'file': open(path, 'a', buffering=1), 'opened': time.monotonic(), 'bytes': 0}
+
+    def _close_segment(self, kind: str) -> None:
+        segment = self._segments.pop(kind, None)
+        if segment is None:
+            return
+        segment['file'].close()
+        try:
+            os.replace(segment['path'], segment['path'][:-len(_OPEN_SUFFIX)] + _CLOSED_SUFFIX)
+        except FileNotFoundError:
+            # Already closed out by another process's compactor (see _close_orphaned_segments)
+            pass
+
+    def append(self, kind: str, event: Dict[str, Any]) -> None:
+        """Append one event. Columns missing from the event are stored empty."""
+        columns = EVENT_COLUMNS[kind]
+        record = {col: '' if event.get(col) is None else str(event.get(col)) for col in columns}
+        line = json.dumps(record) + '\n'
+        with self._lock:
+            segment = self._segments.get(kind)
+            if segment is not None and (segment['bytes'] >= self.segment_max_bytes
+                                        or time.monotonic() - segment['opened'] >= self.segment_max_age):
+                self._close_segment(kind)
+                segment = None
+            if segment is None:
+                segment = self._segments[kind] = self._open_segment(kind)
+            segment['file'].write(line)
+            segment['bytes'] += len(line)
+
+    def rotate(self) -> None:
+        """Close this process's open segments so the compactor can pick them up."""
+        with self._lock:
+            for kind in list(self._segments):
+                self._close_segment(kind)
+
+    # Compaction
+
+    def _schema(self, kind: str):
+        import pyarrow as pa
+        return pa.schema([(col, pa.string()) for col in EVENT_COLUMNS[kind]])
+
+    def _partition_dir(self, kind: str, day: str) -> str:
+        return os.path.join(self.root, kind, f"date={day}")
+
+    def _write_parquet(self, table, path: str) -> None:
+        import pyarrow.parquet as pq
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Dot-prefixed so dataset discovery never sees a half-written file
+        tmp = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+        pq.write_table(table, tmp, compression='zstd')
+        os.replace(tmp, path)
+
+    def compact(self) -> int:
+        """
+        Convert closed segments to Parquet and merge small partition files.
+
+        Segment output files are named after the segment, so re-running after a
+        crash overwrites rather than duplicates.
+
+        Returns:
+            int: Number of segments compacted
+        """
+        import pyarrow as pa
+
+        self._close_stale_segments()
+        with self._compaction_lock():
+            self._close_orphaned_segments()
+            return self._compact(pa)
+
+    @contextmanager
+    def _compaction_lock(self):
+        """Exclusive across processes sharing the store, so segments are compacted once."""
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, '.compact.lock'), 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _compact(self, pa) -> int:
+        compacted = 0
+        for kind in EVENT_COLUMNS:
+            touched = set()
+            for segment_path in sorted(glob.glob(os.path.join(self._segment_dir(kind), '*' + _CLOSED_SUFFIX))):
+                by_day: Dict[str, List[Dict[str, str]]] = {}
+                with open(segment_path) as f:
+                    for line in f:
+                        if line.strip():
+                            record = json.loads(line)
+                            by_day.setdefault(_event_date(record.get('timestamp')), []).append(record)
+                stem = os.path.basename(segment_path)[:-len(_CLOSED_SUFFIX)]
+                for day, records in by_day.items():
+                    table = pa.Table.from_pylist(records, schema=self._schema(kind))
+                    self._write_parquet(table, os.path.join(self._partition_dir(kind, day), f"seg-{stem}.parquet"))
+                    touched.add(day)
+                os.remove(segment_path)
+                compacted += 1
+            for day in touched:
+                self._merge_partition(kind, day)
+        if compacted:
+            logger.info(f"Compacted {compacted} analytics segments")
+        return compacted
+
+    def _close_stale_segments(self) -> None:
+        with self._lock:
+            for kind, segment in list(self._segments.items()):
+                if time.monotonic() - segment['opened'] >= self.segment_max_age:
+                    self._close_segment(kind)
+
+    def _close_orphaned_segments(self) -> int:
+        """
+        Close open segments left by other processes that exited or were killed
+        (e.g. recycled server workers), so their events still get compacted.
+
+        A segment is orphaned if the process in its name is gone, or if it has
+        not been written for segment_max_age: its owner would close it before
+        writing again. Returns the number of segments closed.
+        """
+        with self._lock:
+            own = {segment['path'] for segment in self._segments.values()}
+        closed = 0
+        cutoff = time.time() - self.segment_max_age - _ORPHAN_GRACE
+        for kind in EVENT_COLUMNS:
+            for path in glob.glob(os.path.join(self._segment_dir(kind), '*' + _OPEN_SUFFIX)):
+                if path in own:
+                    continue
+                try:
+                    pid = int(os.path.basename(path).split('-', 1)[0])
+                    if _pid_alive(pid) and os.path.getmtime(path) >= cutoff:
+                        continue
+                    os.replace(path, path[:-len(_OPEN_SUFFIX)] + _CLOSED_SUFFIX)
+                except (ValueError, OSError):
+                    continue
+                closed += 1
+        if closed:
+            logger.info(f"Closed {closed} analytics segments left by other processes")
+        return closed
+
+    def _merge_partition(self, kind: str, day: str) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        files = sorted(glob.glob(os.path.join(self._partition_dir(kind, day), '*.parquet')))
+        if len(files) < self.merge_threshold:
+            return
+        table = pa.concat_tables([pq.read_table(f, schema=self._schema(kind)) for f in files])
+        self._write_parquet(table, os.path.join(self._partition_dir(kind, day), f"part-{uuid.uuid4().hex}.parquet"))
+        for f in files:
+            os.remove(f)
+
+    def start_compactor(self, interval: float = 60) -> None:
+        """Run compact() every `interval` seconds on a daemon thread."""
+        if self._compactor is not None:
+            return
+
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.compact()
+                except Exception as e:
+                    logger.error(f"Analytics compaction failed: {str(e)}")
+
+        self._compactor = threading.Thread(target=loop, name="analytics-compactor", daemon=True)
+        self._compactor.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.rotate()
+
+    # Queries
+
+    def query(self, kind: str, columns: Optional[Sequence[str]] = None, phone_number: Optional[str] = None,
+              call_sid: Optional[str] = None, campaign: Optional[str] = None,
+              date_from: Optional[date] = None, date_to: Optional[date] = None):
+        """
+        Read compacted events as a pyarrow Table.
+
+        Only the requested columns are read, and date partitions outside
+        [date_from, date_to] are skipped without opening their files.
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        base = os.path.join(self.root, kind)
+        columns = list(columns or EVENT_COLUMNS[kind])
+        if not os.path.isdir(base):
+            return pa.table({col: pa.array([], pa.string()) for col in columns})
+
+        partitioning = ds.partitioning(pa.schema([('date', pa.string())]), flavor='hive')
+        dataset = ds.dataset(base, format='parquet', partitioning=partitioning)
+
+        filters = []
+        if date_from is not None:
+            filters.append(ds.field('date') >= str(date_from))
+        if date_to is not None:
+            filters.append(ds.field('date') <= str(date_to))
+        for col, value in (('phone_number', phone_number), ('call_sid', call_sid), ('campaign', campaign)):
+            if value is not None:
+                filters.append(ds.field(col) == value)
+        expression = None
+        for f in filters:
+            expression = f if expression is None else expression & f
+        return dataset.to_table(columns=columns, filter=expression)
+
+    def per_number(self, phone_number: str, kind: str = 'responses', **kwargs) -> List[Dict[str, str]]:
+        """All events for one phone number."""
+        return self.query(kind, phone_number=phone_number, **kwargs).to_pylist()
+
+    def _count_by(self, key: str, kind: str, **kwargs) -> Dict[str, Dict[str, int]]:
+        columns = ['call_sid'] if key == 'date' else [key, 'call_sid']
+        table = self.query(kind, columns=columns + (['date'] if key == 'date' else []), **kwargs)
+        grouped = table.group_by(key).aggregate([('call_sid', 'count'), ('call_sid', 'count_distinct')])
+        return {
+            row[key]: {'events': row['call_sid_count'], 'calls': row['call_sid_count_distinct']}
+            for row in grouped.to_pylist()
+        }
+
+    def per_day(self, kind: str = 'responses', **kwargs) -> Dict[str, Dict[str, int]]:
+        """Event and distinct-call counts per day."""
+        return self._count_by('date', kind, **kwargs)
+
+    def per_campaign(self, kind: str = 'responses', **kwargs) -> Dict[str, Dict[str, int]]:
+        """Event and distinct-call counts per campaign."""
+        return self._count_by('campaign', kind, **kwargs)
+
+
+    def import_csv(self, kind: str, csv_path: str, campaign: str = '') -> int:
+        """Append historical rows from a responses.csv or summaries.csv as events."""
+        import csv
+        count = 0
+        with open(csv_path, newline='') as f:
+            for row in csv.DictReader(f):
+                row.setdefault('campaign', campaign)
+                self.append(kind, row)
+                count += 1
+        self.rotate()
+        return count
+
+
+_store: Optional[AnalyticsStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> AnalyticsStore:
+    """Process-wide AnalyticsStore."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = AnalyticsStore()
+        return _store
+
+
+def record_event(kind: str, event: Dict[str, Any]) -> None:
+    """Append an event to the process-wide store, logging instead of raising on failure."""
+    try:
+        get_store().append(kind, event)
+    except Exception as e:
+        logger.error(f"Failed to record {kind} analytics event: {str(e)}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage the call-analytics store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="Import a CSV log as events")
+    imp.add_argument("kind", choices=sorted(EVENT_COLUMNS))
+    imp.add_argument("csv_path")
+    imp.add_argument("--campaign", default="")
+    sub.add_parser("compact", help="Compact closed segments into Parquet")
+    days = sub.add_parser("per-day", help="Print per-day counts")
+    days.add_argument("kind", choices=sorted(EVENT_COLUMNS))
+    args = parser.parse_args()
+
+    store = AnalyticsStore()
+    if args.command == "import":
+        print(f"✅ Imported {store.import_csv(args.kind, args.csv_path, args.campaign)} events")
+        store.compact()
+    elif args.command == "compact":
+        print(f"✅ Compacted {store.compact()} segments")
+    else:
+        for day, counts in sorted(store.per_day(args.kind).items()):
+            print(f"{day}: {counts['calls']} calls, {counts['events']} events")
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+from typing import Optional, Dict, Any, Iterable, List
+import aiohttp
+from .utils import load_config, format_phone_number
+from .script_engine import lead_url
+from .retry_policy import RetryPolicy, classify_api_error, API_ERROR
+from .caller_pool import account_settings
+
+logger = logging.getLogger(__name__)
+
+TWILIO_API_BASE_URL = "https://api.twilio.com"
+
+class AsyncTwilioCallHandler:
+    """
+    Asyncio variant of TwilioCallHandler.
+
+    All calls share one aiohttp session, so connections to the Twilio API are
+    pooled and kept alive. A semaphore bounds the number of in-flight call
+    creations; retries back off with asyncio.sleep instead of blocking a thread,
+    following the same per-outcome RetryPolicy as the synchronous handler.
+
+    Usage:
+        async with AsyncTwilioCallHandler() as handler:
+            sids = await handler.place_calls_async(leads)
+    """
+
+    def __init__(
+        self,
+        config_path: str = 'config.yaml',
+        config: Optional[Dict[str, Any]] = None,
+        max_connections: int = 100,
+        max_in_flight: int = 1000,
+        retry_policy: Optional[RetryPolicy] = None,
+        request_timeout: float = 30.0
+    ):
+        """
+        Args:
+            config_path: Path to the YAML config, used when config is not given
+            config: Already-loaded configuration dictionary
+            max_connections: Size of the keep-alive connection pool
+            max_in_flight: Maximum concurrent call creations on the event loop
+            retry_policy: Attempt limits and backoff per outcome, from the
+                `retries` section of the config if not given
+            request_timeout: Total timeout for one API request in seconds
+        """
+        self.config = config if config is not None else load_config(config_path)
+        twilio_config = self.config['twilio']
+        # Calls go out from the first number of the primary account (no caller ID pool here)
+        primary = account_settings(twilio_config)[0]
+        self.account_sid = primary['account_sid']
+        self.auth_token = primary['auth_token']
+        self.from_number = format_phone_number(primary['numbers'][0]['number'])
+        self.base_url = twilio_config.get('api_base_url', TWILIO_API_BASE_URL).rstrip('/')
+        self.max_connections = max_connections
+        self.max_in_flight = max_in_flight
+        self.retry_policy = retry_policy or RetryPolicy.from_config(self.config.get('retries'))
+        self.request_timeout = request_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def calls_url(self) -> str:
+        return f"{self.base_url}/2010-04-01/Accounts/{self.account_sid}/Calls.json"
+
+    async def open(self) -> None:
+        """Create the pooled HTTP session. Must be called from the running loop."""
+        if self._session is not None:
+            return
+        connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            auth=aiohttp.BasicAuth(self.account_sid, self.auth_token),
+            timeout=aiohttp.ClientTimeout(total=self.request_timeout)
+        )
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+
+    async def close(self) -> None:
+        """Close the session and its pooled connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+            self._semaphore = None
+
+    async def __aenter__(self) -> "AsyncTwilioCallHandler":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def _create_call(self, to_number: str, from_number: str, url: str) -> Dict[str, Any]:
+        """POST one call creation and return the HTTP status with the decoded body."""
+        data = [
+            ('To', to_number),
+            ('From', from_number),
+            ('Url', url),
+        ]
+        status_callback = self.config['twilio'].get('status_callback_url')
+        if status_callback:
+            data.append(('StatusCallback', status_callback))
+            data.append(('StatusCallbackMethod', 'POST'))
+            data.extend(('StatusCallbackEvent', event) for event in ('initiated', 'ringing', 'answered', 'completed'))
+        if self.config['twilio'].get('machine_detection'):
+            data.append(('MachineDetection', 'Enable'))
+        async with self._session.post(self.calls_url, data=data) as response:
+            try:
+                body = await response.json(content_type=None)
+            except ValueError:
+                body = {'message': await response.text()}
+            return {'status': response.status, 'body': body or {}}
+
+    async def place_call_async(self, lead: Dict[str, Any], test_mode: bool = False) -> Optional[str]:
+        """
+        Place a call using Twilio's REST API without blocking the event loop.
+
+        Args:
+            lead: Dictionary containing lead information
+            test_mode: If True, use test phone number instead of lead's number
+
+        Returns:
+            Optional[str]: Call SID if successful, None if failed
+        """
+        if self._session is None:
+            await self.open()
+
+        raw_number = self.config['twilio']['test_number'] if test_mode else lead.get('phone', '')
+        to_number = format_phone_number(str(raw_number)) if raw_number else ""
+        if not to_number:
+            logger.error(f"No valid phone number found for lead: {lead}")
+            return None
+
+        from_number = self.from_number
+        url = lead_url(self.config['twilio']['twiml_url'], lead, (self.config.get('ivr') or {}).get('script'))
+        name = lead.get('name', 'Unknown')
+
+        attempts = 0
+        while True:
+            attempts += 1
+            # Hold an in-flight slot only for the request itself, not for the backoff
+            async with self._semaphore:
+                try:
+                    result = await self._create_call(to_number, from_number, url)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    result = None
+                    error = f"{type(e).__name__}: {str(e)}"
+                    outcome = API_ERROR
+
+            if result is not None:
+                body = result['body']
+                if result['status'] < 300 and body.get('sid'):
+                    logger.info(f"✅ Call initiated to {name} (SID: {body['sid']})")
+                    return body['sid']
+                code = body.get('code')
+                error = f"HTTP {result['status']} ({code}): {body.get('message')}"
+                outcome = classify_api_error(result['status'], code)
+
+            delay = self.retry_policy.delay(outcome, attempts)
+            if delay is None:
+                logger.error(f"❌ Failed to call {name}: {error}")
+                return None
+            logger.warning(f"Attempt {attempts} failed ({error}), retrying in {delay:.1f} seconds...")
+            await asyncio.sleep(delay)
+
+    async def place_calls_async(self, leads: Iterable[Dict[str, Any]], test_mode: bool = False) -> List[Optional[str]]:
+        """
+        Place calls for many leads concurrently on the current event loop.
+
+        Returns:
+            List[Optional[str]]: Call SID (or None) for each lead, in input order
+        """
+        if self._session is None:
+            await self.open()
+        return await asyncio.gather(*(self.place_call_async(lead, test_mode) for lead in leads))
@@ -4,7 +4,13 @@ import time
 from typing import Optional, Dict, Any
 from twilio.rest import Client
 from twilio.base.exceptions import TwilioRestException
+from twilio.http.http_client import TwilioHttpClient
+from requests.adapters import HTTPAdapter
 import yaml
+from .script_engine import get_script, lead_url
+from .utils import format_phone_number
+from .caller_pool import CallerPool
+from .retry_policy import RetryPolicy, CallAttemptError, classify_api_error, API_ERROR, INVALID
 
 # Configure logging
 
@@ -25,10 +31,19 @@ class TwilioCallHandler:
     def __init__(self, config_path: str = 'config.yaml'):
         """Initialize the Twilio call handler with configuration."""
         self.config = self._load_config(config_path)
-        self.client = self._initialize_twilio_client()
-        self.rate_limit_delay = self.config.get('call_settings', {}).get('delay_between_calls', 2)
-        self.max_retries = 3
-        self.retry_delay = 5  # seconds
+        call_settings = self.config.get('call_settings', {})
+        self.rate_limit_delay = call_settings.get('delay_between_calls', 2)
+        self.max_concurrent_calls = call_settings.get('max_concurrent_calls', 10)
+        # Accounts and caller IDs calls are spread over, each account with its own pooled client
+        self.pool = self._initialize_caller_pool()
+        self.client = self.pool.accounts[0].client
+        # Outbound pacing for batch dialing: what the caller IDs allow together when they have CPS
+        # limits, otherwise the old one-call-per-delay rate
+        self.calls_per_second = call_settings.get(
+            'calls_per_second', self.pool.rate or 1.0 / max(self.rate_limit_delay, 0.001)
+        )
+        # Per-outcome attempt limits and jittered backoff (`retries` section of config.yaml)
+        self.retry_policy = RetryPolicy.from_config(self.config.get('retries'))
 
     def _load_config(self, config_path: str) -> Dict[str, Any]:
         """Load configuration from YAML file."""
@@ -39,85 +54,136 @@ class TwilioCallHandler:
             logger.error(f"Failed to load config from {config_path}: {str(e)}")
             raise
 
-    def _initialize_twilio_client(self) -> Client:
-        """Initialize Twilio client with credentials."""
+    def _make_client(self, account_sid: str, auth_token: str) -> Client:
+        """Twilio client for one account, keeping up to max_concurrent_calls connections alive."""
+        http_client = TwilioHttpClient(pool_connections=True)
+        adapter = HTTPAdapter(pool_maxsize=self.max_concurrent_calls)
+        http_client.session.mount('https://', adapter)
+        http_client.session.mount('http://', adapter)
+        client = Client(account_sid, auth_token, http_client=http_client)
+        api_base_url = self.config['twilio'].get('api_base_url')
+        if api_base_url:
+            # e.g. a local fake_twilio server for offline runs
+            client.api.base_url = api_base_url.rstrip('/')
+        return client
+
+    def _initialize_caller_pool(self) -> CallerPool:
+        """Initialize a Twilio client per account and the caller IDs to dial from."""
         try:
-            account_sid = os.getenv("TWILIO_ACCOUNT_SID", self.config['twilio']['account_sid'])
-            auth_token = os.getenv("TWILIO_AUTH_TOKEN", self.config['twilio']['auth_token'])
-            return Client(account_sid, auth_token)
+            return CallerPool.from_config(self.config['twilio'], self._make_client)
         except Exception as e:
             logger.error(f"Failed to initialize Twilio client: {str(e)}")
             raise
 
     def _format_phone_number(self, phone: str) -> str:
-        """Ensure phone number is in E.164 format."""
+        """Ensure phone number is in E.164 format ("" if it cannot be)."""
         if not phone:
             return ""
-        # Convert to string if it's an integer
-        phone_str = str(phone)
-        # Remove any spaces or special characters
-        phone_str = ''.join(filter(str.isdigit, phone_str))
-        # Add + if not present
-        return phone_str if phone_str.startswith('+') else f"+{phone_str}"
+        return format_phone_number(str(phone))
+
+    def _call_url(self, lead: Dict[str, Any]) -> str:
+        """TwiML webhook URL selecting the lead's script (default ivr.script from config) and campaign."""
+        return lead_url(self.config['twilio']['twiml_url'], lead, (self.config.get('ivr') or {}).get('script'))
 
     def _get_twiml(self, lead: Dict[str, Any]) -> str:
-        """Generate TwiML for the call."""
-        # You can customize this based on your needs
+        """Generate greeting TwiML for the call from the lead's IVR script."""
+        script = lead.get('script') if isinstance(lead.get('script'), str) else None
+        greeting = get_script(script or (self.config.get('ivr') or {}).get('script')).greeting
+        greeting = greeting or "I have a few quick questions for you."
         return f'''<Response>
-            <Say>Hello {lead.get('name', 'there')}! This is Rexy, your AI agent. 
-            I have a few quick questions for you.</Say>
+            <Say>Hello {lead.get('name', 'there')}! {greeting}</Say>
         </Response>'''
 
-    def place_call(self, lead: Dict[str, Any], test_mode: bool = False) -> Optional[str]:
+    def _call_kwargs(self) -> Dict[str, Any]:
+        """Optional call creation parameters from config."""
+        call_kwargs: Dict[str, Any] = {}
+        status_callback = self.config['twilio'].get('status_callback_url')
+        if status_callback:
+            # Lets the voice server follow each call's lifecycle (e.g. https://<host>/call-status)
+            call_kwargs.update({
+                'status_callback': status_callback,
+                'status_callback_event': ['initiated', 'ringing', 'answered', 'completed'],
+                'status_callback_method': 'POST'
+            })
+        if self.config['twilio'].get('machine_detection'):
+            # Reports AnsweredBy in status callbacks, so calls reaching voicemail can be redialed
+            call_kwargs['machine_detection'] = 'Enable'
+        return call_kwargs
+
+    def create_call(self, lead: Dict[str, Any], test_mode: bool = False) -> str:
         """
-        Place a call using Twilio's REST API.
-        
+        Make a single attempt at placing a call, without retrying.
+
         Args:
             lead: Dictionary containing lead information
             test_mode: If True, use test phone number instead of lead's number
-            
+
         Returns:
-            Optional[str]: Call SID if successful, None if failed
+            str: Call SID
+
+        Raises:
+            CallAttemptError: With the outcome class deciding whether the attempt may be retried
         """
         to_number = self._format_phone_number(
             self.config['twilio']['test_number'] if test_mode else lead.get('phone', '')
         )
-        
+
         if not to_number:
-            logger.error(f"No valid phone number found for lead: {lead}")
-            return None
+            raise CallAttemptError(INVALID, f"No valid phone number found for lead: {lead}")
 
-        from_number = self._format_phone_number(self.config['twilio']['phone_number'])
-        
-        logger.info(f"📞 Initiating call to {lead.get('name', 'Unknown')} at {to_number}")
+        # Blocks while every caller ID is at its calls-per-second limit
+        caller = self.pool.acquire()
+        from_number = self._format_phone_number(caller.number)
+
+        logger.info(f"📞 Initiating call to {lead.get('name', 'Unknown')} at {to_number} from {from_number}")
+
+        placed = False
+        try:
+            call = caller.account.client.calls.create(
+                to=to_number,
+                from_=from_number,
+                url=self._call_url(lead),  # e.g., ngrok/Flask endpoint
+                **self._call_kwargs()
+            )
+            placed = True
+        except TwilioRestException as e:
+            raise CallAttemptError(classify_api_error(e.status, e.code),
+                                   f"Twilio error {e.code} calling {to_number}: {e.msg}")
+        except Exception as e:
+            # Network errors and the like are worth another try
+            raise CallAttemptError(API_ERROR, f"Error calling {to_number}: {str(e)}")
+        finally:
+            self.pool.release(caller, placed)
+        logger.info(f"✅ Call initiated to {lead.get('name', 'Unknown')} (SID: {call.sid})")
+        return call.sid
+
+    def place_call(self, lead: Dict[str, Any], test_mode: bool = False) -> Optional[str]:
+        """
+        Place a call using Twilio's REST API, retrying failed attempts in place.
+
+        Waits out the retry policy's backoff between attempts, so it is meant for
+        single calls; batch dialing retries through the dialer instead (see
+        trigger_call.dial_leads) and keeps its worker threads free.
         
-        for attempt in range(self.max_retries):
+        Args:
+            lead: Dictionary containing lead information
+            test_mode: If True, use test phone number instead of lead's number
+            
+        Returns:
+            Optional[str]: Call SID if successful, None if failed
+        """
+        attempts = 0
+        while True:
+            attempts += 1
             try:
-                call = self.client.calls.create(
-                    to=to_number,
-                    from_=from_number,
-                    url=self.config['twilio']['twiml_url']  # e.g., ngrok/Flask endpoint
-)
-                logger.info(f"✅ Call initiated to {lead.get('name', 'Unknown')} (SID: {call.sid})")
-                return call.sid
-                
-            except TwilioRestException as e:
-                if e.code == 21211:  # Invalid phone number
-                    logger.error(f"Invalid phone number format: {to_number}")
-                    return None
-                elif e.code == 21214:  # Phone number not verified
-                    logger.error(f"Phone number not verified: {to_number}")
-                    return None
-                elif attempt < self.max_retries - 1:
-                    logger.warning(f"Attempt {attempt + 1} failed, retrying in {self.retry_delay} seconds...")
-                    time.sleep(self.retry_delay)
-                else:
+                return self.create_call(lead, test_mode)
+            except CallAttemptError as e:
+                delay = self.retry_policy.delay(e.outcome, attempts)
+                if delay is None:
                     logger.error(f"❌ Failed to call {lead.get('name', 'Unknown')}: {str(e)}")
                     return None
-                    
-            except Exception as e:
-                logger.error(f"❌ Unexpected error calling {lead.get('name', 'Unknown')}: {str(e)}")
-                return None
+                logger.warning(f"Attempt {attempts} failed ({e.outcome}), retrying in {delay:.1f} seconds...")
+                time.sleep(delay)
 
    
 # Create a singleton instance
@@ -0,0 +1,204 @@
+"""
+Pool of Twilio accounts and caller IDs that outbound calls are spread over.
+
+Carriers limit how many calls per second one caller ID may place, and Twilio
+limits the API rate of each account, so dial rate grows with the numbers and
+accounts calls are spread over. Every caller ID has its own token bucket (its
+CPS limit), every account an optional one for its API cap, and each call takes
+the next caller ID with a token free in both:
+
+    least_loaded   the number with the fewest call creations in flight, then
+                   the most unused rate (default)
+    round_robin    the next number in turn
+"""
+import os
+import time
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from .dialer import TokenBucket
+except ImportError:  # imported as a top-level module by the voice server (download_recording)
+    from dialer import TokenBucket
+
+LEAST_LOADED = 'least_loaded'
+ROUND_ROBIN = 'round_robin'
+STRATEGIES = (LEAST_LOADED, ROUND_ROBIN)
+
+# Longest single sleep while every caller ID is at its limit
+_MAX_WAIT = 1.0
+
+
+def _wait_for(bucket: Optional[TokenBucket]) -> float:
+    """Seconds until a bucket has a whole token, 0 for no bucket."""
+    if bucket is None:
+        return 0.0
+    missing = 1.0 - bucket.available()
+    return missing / bucket.rate if missing > 0 else 0.0
+
+
+def account_settings(twilio_config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    The accounts of the `twilio` section of config.yaml, the primary one first.
+
+    Without an `accounts` list this is the single account_sid / phone_number of
+    the section (TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN override the
+    credentials). Numbers come back as `{number, calls_per_second}` mappings.
+    """
+    default_cps = twilio_config.get('number_calls_per_second')
+    accounts = twilio_config.get('accounts') or [{
+        'account_sid': os.getenv("TWILIO_ACCOUNT_SID", twilio_config['account_sid']),
+        'auth_token': os.getenv("TWILIO_AUTH_TOKEN", twilio_config['auth_token']),
+        'numbers': [twilio_config['phone_number']],
+    }]
+    settings = []
+    for account in accounts:
+        numbers = []
+        for number in account.get('numbers') or []:
+            if not isinstance(number, dict):
+                number = {'number': number}
+            numbers.append({'number': str(number['number']),
+                            'calls_per_second': number.get('calls_per_second', default_cps)})
+        settings.append(dict(account, numbers=numbers))
+    return settings
+
+
+def account_credentials(twilio_config: Dict[str, Any]) -> Dict[str, str]:
+    """Auth token per account SID of the `twilio` section of config.yaml, the primary account first."""
+    return {account['account_sid']: account['auth_token'] for account in account_settings(twilio_config)}
+
+
+class TwilioAccount:
+    """One Twilio account: its API client, optional API rate limit and caller IDs."""
+
+    def __init__(self, sid: str, client: Any, calls_per_second: Optional[float] = None):
+        self.sid = sid
+        self.client = client
+        self.limiter = TokenBucket(calls_per_second) if calls_per_second else None
+        self.numbers: List['CallerId'] = []
+
+
+class CallerId:
+    """A number calls are placed from, with its CPS limit and load."""
+
+    __slots__ = ('number', 'account', 'limiter', 'in_flight', 'placed', 'failed')
+
+    def __init__(self, number: str, account: TwilioAccount, calls_per_second: Optional[float] = None):
+        self.number = number
+        self.account = account
+        self.limiter = TokenBucket(calls_per_second, 1) if calls_per_second else None
+        # Call creations currently waiting on the API
+        self.in_flight = 0
+        self.placed = 0
+        self.failed = 0
+
+    def wait(self) -> float:
+        """Seconds until both this number and its account may place a call."""
+        return max(_wait_for(self.limiter), _wait_for(self.account.limiter))
+
+    def headroom(self) -> float:
+        """Unused share of this number's rate, 1 for a number without a limit."""
+        if self.limiter is None:
+            return 1.0
+        return self.limiter.available() / self.limiter.capacity
+
+    def take(self) -> None:
+        for bucket in (self.limiter, self.account.limiter):
+            if bucket is not None:
+                bucket.try_acquire()
+
+
+class CallerPool:
+    """Thread-safe selection of caller IDs across accounts, within per-number and per-account rates."""
+
+    def __init__(self, accounts: List[TwilioAccount], strategy: str = LEAST_LOADED):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown caller ID strategy '{strategy}', expected one of {STRATEGIES}")
+        self.accounts = accounts
+        self.callers = [caller for account in accounts for caller in account.numbers]
+        if not self.callers:
+            raise ValueError("The caller pool needs at least one phone number")
+        self.strategy = strategy
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, twilio_config: Dict[str, Any],
+                    make_client: Callable[[str, str], Any]) -> 'CallerPool':
+        """
+        Build the pool from the `twilio` section of config.yaml (see account_settings).
+
+        Args:
+            make_client: Returns a Twilio client for (account_sid, auth_token)
+        """
+        accounts = []
+        for settings in account_settings(twilio_config):
+            account = TwilioAccount(settings['account_sid'],
+                                    make_client(settings['account_sid'], settings['auth_token']),
+                                    settings.get('calls_per_second'))
+            for number in settings['numbers']:
+                account.numbers.append(CallerId(number['number'], account, number['calls_per_second']))
+            accounts.append(account)
+        return cls(accounts, twilio_config.get('caller_id_selection', LEAST_LOADED))
+
+    @property
+    def rate(self) -> Optional[float]:
+        """Calls per second the whole pool can place, None if some caller ID is unlimited."""
+        total = 0.0
+        for account in self.accounts:
+            if any(caller.limiter is None for caller in account.numbers):
+                if account.limiter is None:
+                    return None
+                total += account.limiter.rate
+                continue
+            numbers_rate = sum(caller.limiter.rate for caller in account.numbers)
+            total += min(numbers_rate, account.limiter.rate) if account.limiter is not None else numbers_rate
+        return total
+
+    def _pick(self) -> Tuple[Optional[CallerId], float]:
+        best: Optional[CallerId] = None
+        best_key: Tuple[int, float] = (0, 0.0)
+        best_index = 0
+        wait = _MAX_WAIT
+        count = len(self.callers)
+        for i in range(count):
+            index = (self._next + i) % count
+            caller = self.callers[index]
+            caller_wait = caller.wait()
+            if caller_wait > 0:
+                wait = min(wait, caller_wait)
+                continue
+            key = (caller.in_flight, -caller.headroom())
+            if best is None or key < best_key:
+                best, best_key, best_index = caller, key, index
+            if self.strategy == ROUND_ROBIN:
+                break
+        if best is not None:
+            # Ties go to the next number in turn
+            self._next = (best_index + 1) % count
+            best.take()
+            best.in_flight += 1
+        return best, wait
+
+    def acquire(self) -> CallerId:
+        """Block until a caller ID may place a call and claim it; hand it back with release()."""
+        while True:
+            with self._lock:
+                caller, wait = self._pick()
+            if caller is not None:
+                return caller
+            time.sleep(min(wait, _MAX_WAIT))
+
+    def release(self, caller: CallerId, placed: bool) -> None:
+        with self._lock:
+            caller.in_flight -= 1
+            if placed:
+                caller.placed += 1
+            else:
+                caller.failed += 1
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Calls placed and failed per caller ID."""
+        with self._lock:
+            return [{'number': c.number, 'account_sid': c.account.sid, 'placed': c.placed,
+                     'failed': c.failed, 'in_flight': c.in_flight} for c in self.callers]
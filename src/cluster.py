@@ -0,0 +1,851 @@
+"""
+Coordinator/worker mode for dialing from several processes.
+
+The coordinator splits every new lead file in the watched directory into
+partitions by a hash of the phone number, so a number always lands in the same
+partition, and registers them in a shared SQLite store. Workers lease one
+partition at a time, renew their leases with a heartbeat and dial through a
+token bucket kept in the same store, so the call rate is global across workers.
+A partition whose lease expires (its worker died or hung) goes to the next
+worker that asks for one, which resumes after the partition's last processed row.
+
+With calling windows (`scheduling`) or redials (`retries`) configured, workers
+schedule the leads of their partitions instead of dialing them straight away,
+and keep each lease until every lead of the partition is dialed. The scheduled
+leads are persisted with their partition, so whoever holds a partition's lease
+dials them. A redial of a lead whose partition is held by another worker (or
+already done) is persisted for that partition, and a done partition is
+reopened for the next worker to lease.
+
+    python run.py coordinator
+    python run.py worker        # as many as the host and trunks allow
+
+The store is SQLite, so every process must run on the same host (or at least
+share a local filesystem with working locks, which rules out NFS).
+"""
+import os
+import glob
+import json
+import zlib
+import socket
+import sqlite3
+import threading
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from .call_handler import call_handler
+from .trigger_call import dial_leads, make_scheduler, make_redial_monitor
+from .dialer import CallResult, TokenBucket
+from .state_store import StateStore, FileProgress, STATE_DB, enable_wal, file_fingerprint
+from .scheduler import LeadScheduler, SOURCE_KEY
+from .retry_policy import RedialMonitor
+from .lead_normalizer import LeadNormalizer, rejects_path, write_rejects
+from .watcher import WATCH_DIR, REQUIRED_COLUMNS, CHUNK_SIZE, ROW_KEY
+
+logger = logging.getLogger(__name__)
+
+CLUSTER_DB = os.path.join(os.path.dirname(__file__), '..', 'logs', 'cluster.db')
+PARTITIONS_DIR = os.path.join(os.path.dirname(__file__), '..', 'logs', 'partitions')
+
+# Partition statuses
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+
+# Token bucket holding the cluster-wide call rate
+CALLS_BUCKET = 'calls'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cluster_files (
+    path TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    partitions INTEGER NOT NULL,
+    leads INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS partitions (
+    path TEXT PRIMARY KEY,
+    source_file TEXT NOT NULL,
+    status TEXT NOT NULL,
+    owner TEXT,
+    lease_until REAL,
+    leases INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_partitions_status ON partitions(status, lease_until);
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    started_at REAL NOT NULL,
+    heartbeat REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS token_buckets (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    rate REAL NOT NULL,
+    capacity REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+class ClusterStore:
+    """
+    SQLite (WAL) store shared by the coordinator and workers: lead-file
+    partitions and their leases, live workers, and shared token buckets.
+
+    Every read-modify-write runs in a BEGIN IMMEDIATE transaction, which takes
+    the database write lock up front, so the processes never race on a lease or
+    on the tokens of a bucket.
+    """
+
+    def __init__(self, path: str = CLUSTER_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        # Set first: the coordinator and every worker open the file at startup
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        enable_wal(self._conn)
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    # Lead files and partitions
+
+    def file_registered(self, path: str, fingerprint: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM cluster_files WHERE path = ? AND fingerprint = ?", (path, fingerprint)
+            ).fetchone()
+        return row is not None
+
+    def add_partitions(self, source_file: str, fingerprint: str, paths: List[str], leads: int) -> None:
+        """Register a split lead file and its partitions, in one transaction."""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cluster_files (path, fingerprint, partitions, leads, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (source_file, fingerprint, len(paths), leads, now)
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO partitions (path, source_file, status, updated_at) VALUES (?, ?, ?, ?)",
+                ((path, source_file, PENDING, now) for path in paths)
+            )
+
+    def acquire_partition(self, worker_id: str, ttl: float) -> Optional[Dict[str, Any]]:
+        """
+        Lease the oldest pending partition, or one whose lease has expired.
+
+        Returns:
+            Optional[Dict[str, Any]]: The partition row as leased, with the
+            previous holder under `previous_owner`; None if there is nothing to lease
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT * FROM partitions WHERE status = ? OR (status = ? AND lease_until < ?) "
+                "ORDER BY updated_at, path LIMIT 1",
+                (PENDING, LEASED, now)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE partitions SET status = ?, owner = ?, lease_until = ?, leases = leases + 1, "
+                "updated_at = ? WHERE path = ?",
+                (LEASED, worker_id, now + ttl, now, row['path'])
+            )
+        lease = dict(row)
+        lease['previous_owner'] = lease['owner']
+        lease.update(status=LEASED, owner=worker_id, lease_until=now + ttl, leases=row['leases'] + 1)
+        return lease
+
+    def heartbeat(self, worker_id: str, ttl: float) -> Set[str]:
+        """
+        Record that a worker is alive and extend its leases.
+
+        Returns:
+            Set[str]: Partitions the worker still holds; any others it thinks it holds were lost
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO workers (id, started_at, heartbeat) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET heartbeat = excluded.heartbeat",
+                (worker_id, now, now)
+            )
+            conn.execute(
+                "UPDATE partitions SET lease_until = ? WHERE owner = ? AND status = ? AND lease_until >= ?",
+                (now + ttl, worker_id, LEASED, now)
+            )
+            rows = conn.execute(
+                "SELECT path FROM partitions WHERE owner = ? AND status = ? AND lease_until >= ?",
+                (worker_id, LEASED, now)
+            ).fetchall()
+        return {row['path'] for row in rows}
+
+    def complete_partition(self, path: str, worker_id: str) -> bool:
+        """Mark a partition done. Returns False if the worker no longer held it."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE partitions SET status = ?, lease_until = NULL, updated_at = ? "
+                "WHERE path = ? AND owner = ? AND status = ?",
+                (DONE, time.time(), path, worker_id, LEASED)
+            )
+        return cursor.rowcount > 0
+
+    def release_partition(self, path: str, worker_id: str) -> bool:
+        """Give a partition back unfinished, e.g. on shutdown. The owner is kept, see acquire_partition."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE partitions SET status = ?, lease_until = NULL, updated_at = ? "
+                "WHERE path = ? AND owner = ? AND status = ?",
+                (PENDING, time.time(), path, worker_id, LEASED)
+            )
+        return cursor.rowcount > 0
+
+    def reopen_partition(self, path: str) -> bool:
+        """Return a done partition to pending, e.g. for a redial of one of its leads."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE partitions SET status = ?, updated_at = ? WHERE path = ? AND status = ?",
+                (PENDING, time.time(), path, DONE)
+            )
+        return cursor.rowcount > 0
+
+    def expire_leases(self) -> List[Dict[str, Any]]:
+        """Return partitions with expired leases to pending. Returns the expired partitions."""
+        now = time.time()
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT * FROM partitions WHERE status = ? AND lease_until < ?", (LEASED, now)
+            ).fetchall()
+            conn.execute(
+                "UPDATE partitions SET status = ?, lease_until = NULL, updated_at = ? "
+                "WHERE status = ? AND lease_until < ?",
+                (PENDING, now, LEASED, now)
+            )
+        return [dict(row) for row in rows]
+
+    def outstanding(self) -> int:
+        """Partitions not done yet."""
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*) FROM partitions WHERE status != ?", (DONE,)).fetchone()
+        return row[0]
+
+    # Workers
+
+    def remove_worker(self, worker_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM workers WHERE id = ?", (worker_id,))
+
+    def prune_workers(self, max_age: float) -> List[str]:
+        """Forget workers without a heartbeat for max_age seconds. Returns their ids."""
+        cutoff = time.time() - max_age
+        with self._transaction() as conn:
+            rows = conn.execute("SELECT id FROM workers WHERE heartbeat < ?", (cutoff,)).fetchall()
+            conn.execute("DELETE FROM workers WHERE heartbeat < ?", (cutoff,))
+        return [row['id'] for row in rows]
+
+    def status(self) -> Dict[str, Any]:
+        """Partition counts by status and the live workers with the partitions they hold."""
+        with self._lock:
+            counts = self._conn.execute("SELECT status, COUNT(*) FROM partitions GROUP BY status").fetchall()
+            workers = self._conn.execute("SELECT * FROM workers ORDER BY id").fetchall()
+            leases = self._conn.execute(
+                "SELECT owner, path FROM partitions WHERE status = ? ORDER BY path", (LEASED,)
+            ).fetchall()
+        held: Dict[str, List[str]] = {}
+        for owner, path in leases:
+            held.setdefault(owner, []).append(os.path.basename(path))
+        return {
+            'partitions': {status: count for status, count in counts},
+            'workers': [dict(row, partitions=held.get(row['id'], [])) for row in workers],
+        }
+
+    # Token buckets
+
+    @staticmethod
+    def _bucket_tokens(row: sqlite3.Row, now: float) -> float:
+        """Tokens in a bucket at `now`, refilled at its current rate since its last use."""
+        return min(row['capacity'], row['tokens'] + max(now - row['updated_at'], 0) * row['rate'])
+
+    def init_bucket(self, name: str, rate: float, capacity: float) -> None:
+        """Create a bucket full, or set the rate and capacity of an existing one."""
+        with self._transaction() as conn:
+            row = conn.execute("SELECT * FROM token_buckets WHERE name = ?", (name,)).fetchone()
+            now = time.time()
+            # Tokens earned so far keep the old rate; the new one applies from now on
+            tokens = capacity if row is None else min(self._bucket_tokens(row, now), capacity)
+            conn.execute(
+                "INSERT OR REPLACE INTO token_buckets (name, tokens, rate, capacity, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (name, tokens, rate, capacity, now)
+            )
+
+    def take_tokens(self, name: str, tokens: float, max_tokens: Optional[float] = None) -> Tuple[float, float]:
+        """
+        Refill a bucket by the wall-clock time since its last use and try to take tokens.
+
+        Args:
+            tokens: Tokens needed
+            max_tokens: Take up to this many if available, for the caller to hand out itself
+
+        Returns:
+            Tuple[float, float]: Tokens taken (0 or between tokens and max_tokens),
+            and if none were, seconds to wait before retrying
+        """
+        with self._transaction() as conn:
+            row = conn.execute("SELECT * FROM token_buckets WHERE name = ?", (name,)).fetchone()
+            now = time.time()
+            available = self._bucket_tokens(row, now)
+            if available >= tokens:
+                taken, wait = min(available, max(tokens, max_tokens or tokens)), 0.0
+            else:
+                taken, wait = 0.0, (tokens - available) / row['rate']
+            conn.execute("UPDATE token_buckets SET tokens = ?, updated_at = ? WHERE name = ?",
+                         (available - taken, now, name))
+        return taken, wait
+
+    def set_bucket_rate(self, name: str, rate: float) -> None:
+        """Change a bucket's rate, first crediting the tokens earned at the old rate."""
+        with self._transaction() as conn:
+            row = conn.execute("SELECT * FROM token_buckets WHERE name = ?", (name,)).fetchone()
+            now = time.time()
+            conn.execute("UPDATE token_buckets SET tokens = ?, rate = ?, updated_at = ? WHERE name = ?",
+                         (self._bucket_tokens(row, now), rate, now, name))
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    TokenBucket whose tokens live in a ClusterStore, so every process draws from one rate.
+
+    Each process takes up to `prefetch` tokens per transaction and hands them
+    out locally, so the store sees a few transactions per process per second
+    instead of one per call. The global rate still holds, since every token
+    comes out of the shared bucket.
+    """
+
+    def __init__(self, store: ClusterStore, name: str, rate: float, capacity: Optional[float] = None,
+                 prefetch: Optional[float] = None):
+        """
+        Args:
+            prefetch: Most tokens taken at once, defaults to 50ms worth (min 1)
+        """
+        super().__init__(rate, capacity)
+        self.store = store
+        self.name = name
+        self.prefetch = min(prefetch or max(1.0, self.rate * 0.05), self.capacity)
+        # Local stash of tokens taken from the store
+        self._tokens = 0.0
+        store.init_bucket(name, self.rate, self.capacity)
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        # One thread per process talks to the store at a time; the others wait on the local lock
+        with self._lock:
+            if self._tokens < tokens:
+                taken, wait = self.store.take_tokens(self.name, tokens - self._tokens, self.prefetch)
+                if not taken:
+                    return wait
+                self._tokens += taken
+            self._tokens -= tokens
+            return 0.0
+
+    def set_rate(self, rate: float) -> None:
+        """Change the rate for every process sharing the bucket."""
+        if rate <= 0:
+            raise ValueError(f"Rate must be positive, got {rate}")
+        self.rate = float(rate)
+        self.store.set_bucket_rate(self.name, self.rate)
+
+
+def _partition_stem(path: str, fingerprint: str) -> str:
+    # The fingerprint keeps a changed file from overwriting partitions of its old contents
+    name = os.path.splitext(os.path.basename(path))[0]
+    return f"{name}-{zlib.crc32(fingerprint.encode()):08x}"
+
+
+class Coordinator:
+    """Splits lead files into hash partitions and returns expired leases to the pool."""
+
+    def __init__(self, store: ClusterStore, partitions: int = 8, partitions_dir: str = PARTITIONS_DIR,
+                 chunk_size: int = CHUNK_SIZE, worker_timeout: float = 300):
+        """
+        Args:
+            store: Shared cluster store
+            partitions: Partitions per lead file; more than workers lets the load even out
+            partitions_dir: Where partition files are written (outside the watched directory)
+            chunk_size: Rows parsed per pandas chunk
+            worker_timeout: Seconds without a heartbeat after which a worker is forgotten
+        """
+        if partitions < 1:
+            raise ValueError(f"partitions must be >= 1, got {partitions}")
+        self.store = store
+        self.partitions = int(partitions)
+        self.partitions_dir = partitions_dir
+        self.chunk_size = chunk_size
+        self.worker_timeout = worker_timeout
+        os.makedirs(partitions_dir, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, settings: Dict[str, Any], store: ClusterStore) -> 'Coordinator':
+        """Build a coordinator from the `cluster` section of config.yaml."""
+        return cls(
+            store,
+            partitions=settings.get('partitions', 8),
+            partitions_dir=settings.get('partitions_dir', PARTITIONS_DIR)
+        )
+
+    def split_file(self, path: str) -> List[str]:
+        """
+        Normalize a lead file and split it into partition files by phone number hash.
+
+        Rejected rows go to the file's reject CSV as in single-process mode. A
+        file already split with the same contents is skipped.
+
+        Returns:
+            List[str]: Paths of the new partitions
+        """
+        path = os.path.abspath(path)
+        fingerprint = file_fingerprint(path)
+        if self.store.file_registered(path, fingerprint):
+            return []
+        columns = pd.read_csv(path, nrows=0).columns
+        if not all(col in columns for col in REQUIRED_COLUMNS):
+            logger.error(f"CSV file {path} missing required columns: {REQUIRED_COLUMNS}")
+            return []
+
+        stem = os.path.join(self.partitions_dir, _partition_stem(path, fingerprint))
+        partition_paths = [f"{stem}.p{k:03d}.csv" for k in range(self.partitions)]
+        for partial in partition_paths:
+            if os.path.exists(f"{partial}.tmp"):
+                os.remove(f"{partial}.tmp")
+
+        normalizer = LeadNormalizer()
+        reject_file = rejects_path(path)
+        if os.path.exists(reject_file):
+            # Left by an interrupted split or an earlier version of the file; the split starts over
+            os.remove(reject_file)
+        for chunk in pd.read_csv(path, chunksize=self.chunk_size, dtype={'phone': str}):
+            leads, rejects = normalizer.normalize(chunk)
+            write_rejects(rejects, reject_file)
+            # hash_pandas_object is seeded with a fixed key, so a number maps to the same partition every run
+            keys = pd.util.hash_pandas_object(leads['phone'], index=False).to_numpy() % self.partitions
+            for k, group in leads.groupby(keys):
+                partial = f"{partition_paths[k]}.tmp"
+                group.to_csv(partial, mode='a', header=not os.path.exists(partial), index=False)
+
+        # Partitions only appear under their final names once the whole file is split
+        written = []
+        for partition in partition_paths:
+            if os.path.exists(f"{partition}.tmp"):
+                os.replace(f"{partition}.tmp", partition)
+                written.append(partition)
+        self.store.add_partitions(path, fingerprint, written, normalizer.accepted)
+        logger.info(f"🧩 Split {path} into {len(written)} partitions ({normalizer.accepted} leads, "
+                    f"{normalizer.rejected} rejected)")
+        return written
+
+    def scan(self, watch_dir: str = WATCH_DIR) -> int:
+        """Split every lead file in the directory not split yet. Returns the partitions added."""
+        added = 0
+        for path in sorted(glob.glob(os.path.join(watch_dir, '*.csv'))):
+            try:
+                added += len(self.split_file(path))
+            except Exception as e:
+                logger.error(f"Failed to split {path}: {str(e)}")
+        return added
+
+    def reap(self) -> int:
+        """Return partitions of dead or hung workers to the pool. Returns how many were reclaimed."""
+        expired = self.store.expire_leases()
+        for partition in expired:
+            logger.warning(f"⚠️ Lease of {os.path.basename(partition['path'])} by {partition['owner']} expired, "
+                           f"reassigning")
+        for worker_id in self.store.prune_workers(self.worker_timeout):
+            logger.info(f"Forgot worker {worker_id} (no heartbeat for {self.worker_timeout:.0f}s)")
+        return len(expired)
+
+    def run(self, stop_event: threading.Event, watch_dir: str = WATCH_DIR, interval: float = 2.0) -> None:
+        """Scan for new lead files and reap expired leases until stop_event is set."""
+        os.makedirs(watch_dir, exist_ok=True)
+        while not stop_event.is_set():
+            self.scan(watch_dir)
+            self.reap()
+            stop_event.wait(interval)
+
+
+class PartitionScheduler:
+    """
+    A worker's calling-window scheduler, holding the scheduled leads of the partitions it has leased.
+
+    Also the scheduler its RedialMonitor adds redials to: a redial of a lead in
+    a partition held here goes straight into the heaps; any other is only
+    persisted, and its partition reopened in case it is done already.
+    """
+
+    # Overlap between loads of a partition's leads, for rows committed while the last load ran
+    _LOAD_OVERLAP = 5.0
+
+    def __init__(self, scheduler: LeadScheduler, store: ClusterStore):
+        self.scheduler = scheduler
+        self.store = store
+        # Held partition -> when its leads were last loaded
+        self._loaded: Dict[str, float] = {}
+
+    @property
+    def held(self) -> List[str]:
+        return list(self._loaded)
+
+    def hold(self, path: str) -> int:
+        """Start dialing a leased partition, with the leads its previous holders scheduled."""
+        self._loaded[path] = time.time()
+        return self.scheduler.load(path)
+
+    def refresh(self, path: str) -> int:
+        """Pick up leads scheduled for a held partition elsewhere (redials) since the last load."""
+        since = self._loaded[path] - self._LOAD_OVERLAP
+        self._loaded[path] = time.time()
+        return self.scheduler.load(path, since=since)
+
+    def drop(self, path: str) -> None:
+        """Stop dialing a partition that is done, lost or released."""
+        self._loaded.pop(path, None)
+        self.scheduler.forget(path)
+
+    def add(self, lead: Dict[str, Any], due_at: Optional[float] = None) -> None:
+        path = lead.get(SOURCE_KEY)
+        if path in self._loaded:
+            self.scheduler.add(lead, due_at)
+            return
+        self.scheduler.defer(lead, due_at)
+        if path is not None and self.store.reopen_partition(path):
+            logger.info(f"Reopened {os.path.basename(path)} for a redial")
+
+
+class Worker:
+    """
+    Dials leased partitions through the cluster-wide rate limit.
+
+    Without a scheduler, partitions are leased and dialed one at a time. With
+    one, the worker leases every partition it can get, schedules their leads
+    and dials them as their calling windows open, completing each partition
+    once none of its leads is left.
+
+    A heartbeat thread renews the worker's leases every `heartbeat_interval`
+    seconds. If a renewal finds a lease gone (it expired while the worker
+    was stalled and another worker took the partition), dialing of that
+    partition stops before the next call.
+    """
+
+    def __init__(self, store: ClusterStore, state_store: StateStore, worker_id: Optional[str] = None,
+                 calls_per_second: float = 1.0, lease_ttl: float = 30, heartbeat_interval: float = 10,
+                 poll_interval: float = 2.0, scheduler: Optional[LeadScheduler] = None,
+                 redial_monitor: Optional[RedialMonitor] = None):
+        """
+        Args:
+            store: Shared cluster store
+            state_store: Shared store of dialed numbers and partition progress
+            worker_id: Unique name of this worker, host and pid by default
+            calls_per_second: Call rate of the whole cluster
+            lease_ttl: Seconds a lease lasts without renewal
+            heartbeat_interval: Seconds between renewals, well below lease_ttl
+            poll_interval: Seconds between lease attempts while there is no work
+            scheduler: Calling-window scheduler to dial leads through, None to dial them right away
+            redial_monitor: Schedules redials of busy, unanswered and voicemail calls; needs a scheduler
+        """
+        if redial_monitor is not None and scheduler is None:
+            raise ValueError("Redials need a scheduler")
+        if heartbeat_interval >= lease_ttl:
+            raise ValueError("heartbeat_interval must be shorter than lease_ttl")
+        self.store = store
+        self.state_store = state_store
+        self.id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_ttl = lease_ttl
+        self.heartbeat_interval = heartbeat_interval
+        self.poll_interval = poll_interval
+        self.limiter = SharedTokenBucket(store, CALLS_BUCKET, calls_per_second)
+        self.scheduler = PartitionScheduler(scheduler, store) if scheduler is not None else None
+        self.redial_monitor = redial_monitor
+        if redial_monitor is not None:
+            redial_monitor.scheduler = self.scheduler
+        # Leased partition -> event set when the lease is lost
+        self._leases: Dict[str, threading.Event] = {}
+        # Partition being dialed -> its progress, halted when the lease is lost
+        self._progress: Dict[str, FileProgress] = {}
+        self.placed = 0
+
+    @classmethod
+    def from_config(cls, settings: Dict[str, Any], store: ClusterStore, state_store: StateStore,
+                    worker_id: Optional[str] = None) -> 'Worker':
+        """
+        Build a worker from the `cluster` section of config.yaml, with the
+        calling windows of `scheduling` and the redials of `retries`.
+        """
+        if (call_handler.config.get('pacing') or {}).get('enabled'):
+            logger.warning("Predictive pacing is not supported in worker mode; "
+                           "workers dial at cluster.calls_per_second")
+        scheduler = make_scheduler(state_store)
+        redial_monitor = make_redial_monitor(state_store, scheduler)
+        if redial_monitor is not None:
+            # Without calling windows, the always-open scheduler of the redials
+            scheduler = redial_monitor.scheduler
+        return cls(
+            store, state_store, worker_id,
+            calls_per_second=settings.get('calls_per_second', call_handler.calls_per_second),
+            lease_ttl=settings.get('lease_ttl', 30),
+            heartbeat_interval=settings.get('heartbeat_interval', 10),
+            scheduler=scheduler,
+            redial_monitor=redial_monitor
+        )
+
+    def _heartbeat(self, stop_event: threading.Event) -> None:
+        while not stop_event.is_set():
+            try:
+                held = self.store.heartbeat(self.id, self.lease_ttl)
+                for path, lost in list(self._leases.items()):
+                    if path not in held and not lost.is_set():
+                        logger.warning(f"⚠️ {self.id} lost its lease on {os.path.basename(path)}")
+                        progress = self._progress.get(path)
+                        if progress is not None:
+                            # The new holder resumes from the saved row; don't write over its progress
+                            progress.halt()
+                        lost.set()
+            except Exception as e:
+                logger.error(f"Heartbeat of {self.id} failed: {str(e)}")
+            stop_event.wait(self.heartbeat_interval)
+        for lost in list(self._leases.values()):
+            lost.set()
+
+    def _iter_partition(self, path: str, skip_rows: int) -> Iterator[Dict[str, Any]]:
+        """Stream a partition's leads (already normalized by the coordinator) with their row index."""
+        count = 0
+        skip = range(1, skip_rows + 1) if skip_rows else None
+        for chunk in pd.read_csv(path, chunksize=CHUNK_SIZE, dtype={'phone': str}, skiprows=skip):
+            chunk[ROW_KEY] = range(skip_rows + count, skip_rows + count + len(chunk))
+            count += len(chunk)
+            for lead in chunk.to_dict(orient='records'):
+                yield lead
+
+    def _new_leads(self, leads: Iterator[Dict[str, Any]], path: str,
+                   progress: FileProgress) -> Iterator[Dict[str, Any]]:
+        for lead in leads:
+            if self.state_store.claim_lead(lead['phone'], lead.get('name'), path, self._lead_json(lead)):
+                yield lead
+            else:
+                progress.mark_done(lead[ROW_KEY])
+
+    def _lead_json(self, lead: Dict[str, Any]) -> str:
+        return json.dumps({k: v for k, v in lead.items() if k != ROW_KEY}, default=str)
+
+    def _take_over(self, lease: Dict[str, Any]) -> None:
+        if lease['previous_owner'] is not None:
+            # Its previous holder is gone, so leads it left mid-dial can be dialed again
+            reset = self.state_store.reset_inflight(lease['path'])
+            logger.info(f"{self.id} took over {os.path.basename(lease['path'])} from {lease['previous_owner']} "
+                        f"({reset} interrupted dials)")
+
+    def schedule_partition(self, lease: Dict[str, Any]) -> int:
+        """
+        Schedule the leads of a leased partition not dialed yet, resuming after its last processed row.
+
+        Returns:
+            int: Leads of the partition now waiting in this worker's scheduler
+        """
+        path = lease['path']
+        self._take_over(lease)
+        self._leases[path] = threading.Event()
+        loaded = self.scheduler.hold(path)
+        start_row = self.state_store.start_file(path)
+        progress = FileProgress(self.state_store, path, start_row)
+        batch: List[Dict[str, Any]] = []
+        scheduled = 0
+        for lead in self._iter_partition(path, start_row):
+            if self.state_store.is_known(lead['phone']):
+                progress.mark_done(lead[ROW_KEY])
+                continue
+            lead[SOURCE_KEY] = path
+            batch.append(lead)
+            if len(batch) >= CHUNK_SIZE:
+                scheduled += self.scheduler.scheduler.add_many(batch)
+                # Scheduled leads are durable, so their rows count as processed
+                for row in batch:
+                    progress.mark_done(row[ROW_KEY])
+                batch.clear()
+        scheduled += self.scheduler.scheduler.add_many(batch)
+        for row in batch:
+            progress.mark_done(row[ROW_KEY])
+        progress.finish()
+        logger.info(f"🗓️ {self.id} scheduled {scheduled} leads of {os.path.basename(path)} "
+                    f"({loaded} scheduled before)")
+        return scheduled + loaded
+
+    def _check_partitions(self) -> None:
+        """Complete held partitions without leads left, let go of lost ones and load their redials."""
+        for path in self.scheduler.held:
+            lost = self._leases.get(path)
+            if lost is None or lost.is_set():
+                self.scheduler.drop(path)
+                self._leases.pop(path, None)
+                continue
+            self.scheduler.refresh(path)
+            if self.state_store.count_scheduled(path) == 0:
+                self.scheduler.drop(path)
+                self._leases.pop(path, None)
+                if self.store.complete_partition(path, self.id):
+                    logger.info(f"✅ {self.id} finished {os.path.basename(path)}")
+
+    def _claim_scheduled(self, leads: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for lead in leads:
+            if self.state_store.claim_lead(lead['phone'], lead.get('name'), lead.get(SOURCE_KEY),
+                                           self._lead_json(lead)):
+                yield lead
+            else:
+                self.scheduler.scheduler.done(lead['phone'])
+
+    def dispatch_scheduled(self, stop_event: threading.Event) -> None:
+        """Dial the scheduled leads of held partitions as their windows open, until stop_event is set."""
+        scheduler = self.scheduler.scheduler
+
+        def on_result(result: CallResult) -> None:
+            self.state_store.record_result(result.lead['phone'], result.call_sid, result.error)
+            scheduler.done(result.lead['phone'])
+            if result.success:
+                self.placed += 1
+
+        dial_leads(self._claim_scheduled(scheduler.iter_ready(stop_event)), on_result=on_result,
+                   stop_event=stop_event, limiter=self.limiter, collect_results=False)
+
+    def dial_partition(self, lease: Dict[str, Any]) -> bool:
+        """
+        Dial the leads of a leased partition, resuming after its last processed row.
+
+        Returns:
+            bool: True if the partition was finished, False if dialing stopped early
+        """
+        path = lease['path']
+        name = os.path.basename(path)
+        self._take_over(lease)
+        lost = threading.Event()
+        self._leases[path] = lost
+        try:
+            start_row = self.state_store.start_file(path)
+            progress = self._progress[path] = FileProgress(self.state_store, path, start_row)
+
+            def on_result(result: CallResult) -> None:
+                self.state_store.record_result(result.lead['phone'], result.call_sid, result.error)
+                progress.mark_done(result.lead[ROW_KEY])
+
+            logger.info(f"▶️ {self.id} dialing {name} from row {start_row}")
+            results = dial_leads(self._new_leads(self._iter_partition(path, start_row), path, progress),
+                                 on_result=on_result, stop_event=lost, limiter=self.limiter)
+            self.placed += sum(1 for r in results if r.success)
+            if lost.is_set():
+                if not progress.halted:
+                    # Stopping while still holding the lease: save where dialing got to, then let go
+                    self.state_store.mark_file_progress(path, progress.rows_done)
+                    self.store.release_partition(path, self.id)
+                return False
+            progress.finish()
+            self.store.complete_partition(path, self.id)
+            logger.info(f"✅ {self.id} finished {name}")
+            return True
+        finally:
+            self._leases.pop(path, None)
+            self._progress.pop(path, None)
+
+    def run(self, stop_event: threading.Event, exit_when_idle: bool = False) -> None:
+        """
+        Lease and dial partitions until stop_event is set.
+
+        Args:
+            exit_when_idle: Return once every partition is done instead of waiting for more
+        """
+        heartbeat = threading.Thread(target=self._heartbeat, args=(stop_event,),
+                                     name=f"heartbeat-{self.id}", daemon=True)
+        heartbeat.start()
+        dispatcher = None
+        if self.scheduler is not None:
+            dispatcher = threading.Thread(target=self.dispatch_scheduled, args=(stop_event,),
+                                          name=f"dispatch-{self.id}", daemon=True)
+            dispatcher.start()
+        if self.redial_monitor is not None:
+            threading.Thread(target=self.redial_monitor.follow, args=(stop_event,),
+                             name=f"redial-monitor-{self.id}", daemon=True).start()
+        logger.info(f"🟢 Worker {self.id} started")
+        try:
+            while not stop_event.is_set():
+                lease = self.store.acquire_partition(self.id, self.lease_ttl)
+                if lease is not None and self.scheduler is not None:
+                    # Scheduled partitions are dialed in the background, so keep leasing
+                    self.schedule_partition(lease)
+                elif lease is not None:
+                    self.dial_partition(lease)
+                elif exit_when_idle and self.store.outstanding() == 0:
+                    break
+                else:
+                    if self.scheduler is not None:
+                        self._check_partitions()
+                    stop_event.wait(self.poll_interval)
+        finally:
+            stop_event.set()
+            if dispatcher is not None:
+                dispatcher.join()
+                # Their scheduled leads stay persisted for the next holder
+                for path in self.scheduler.held:
+                    self.scheduler.drop(path)
+                    self.store.release_partition(path, self.id)
+            heartbeat.join()
+            self.store.remove_worker(self.id)
+            logger.info(f"Worker {self.id} stopped after placing {self.placed} calls")
+
+
+def _settings() -> Dict[str, Any]:
+    return call_handler.config.get('cluster') or {}
+
+
+def run_coordinator() -> None:
+    """Run the coordinator over the watched leads directory."""
+    settings = _settings()
+    coordinator = Coordinator.from_config(settings, ClusterStore(settings.get('store', CLUSTER_DB)))
+    stop_event = threading.Event()
+    logger.info(f"🟢 Coordinating {WATCH_DIR} in {coordinator.partitions} partitions per file")
+    try:
+        coordinator.run(stop_event)
+    except KeyboardInterrupt:
+        logger.info("Received keyboard interrupt, stopping coordinator...")
+    finally:
+        stop_event.set()
+
+
+def run_worker(worker_id: Optional[str] = None, exit_when_idle: bool = False) -> None:
+    """Run a dialing worker."""
+    settings = _settings()
+    worker = Worker.from_config(settings, ClusterStore(settings.get('store', CLUSTER_DB)),
+                                StateStore(settings.get('state_db', STATE_DB)), worker_id)
+    stop_event = threading.Event()
+    try:
+        worker.run(stop_event, exit_when_idle=exit_when_idle)
+    except KeyboardInterrupt:
+        logger.info("Received keyboard interrupt, stopping worker...")
+    finally:
+        stop_event.set()
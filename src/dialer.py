@@ -0,0 +1,236 @@
+import threading
+import queue
+import time
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Sentinel telling a worker thread to exit
+_STOP = object()
+
+# Longest single sleep in TokenBucket.acquire(), so rate changes take effect promptly
+_MAX_WAIT = 1.0
+
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter expressed in calls per second."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate: Tokens added per second (calls per second)
+            capacity: Maximum burst size. Defaults to one second worth of tokens (min 1)
+        """
+        if rate <= 0:
+            raise ValueError(f"Rate must be positive, got {rate}")
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def set_rate(self, rate: float) -> None:
+        """Change the refill rate without losing accumulated tokens."""
+        if rate <= 0:
+            raise ValueError(f"Rate must be positive, got {rate}")
+        with self._lock:
+            self._refill()
+            self.rate = float(rate)
+
+    def available(self) -> float:
+        """Tokens in the bucket right now."""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """
+        Try to take tokens from the bucket.
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise seconds to wait before retrying
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0, stop_event: Optional[threading.Event] = None) -> bool:
+        """
+        Block until tokens are available.
+
+        Returns:
+            bool: True if tokens were acquired, False if stop_event was set while waiting
+        """
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0:
+                return True
+            wait = min(wait, _MAX_WAIT)
+            if stop_event is not None:
+                if stop_event.wait(wait):
+                    return False
+            else:
+                time.sleep(wait)
+
+
+class CallResult:
+    """Outcome of dialing a single lead."""
+
+    __slots__ = ('lead', 'call_sid', 'error', 'outcome', 'started_at', 'finished_at')
+
+    def __init__(self, lead: Dict[str, Any], call_sid: Optional[str] = None,
+                 error: Optional[str] = None, started_at: Optional[datetime] = None,
+                 finished_at: Optional[datetime] = None, outcome: Optional[str] = None):
+        self.lead = lead
+        self.call_sid = call_sid
+        self.error = error
+        # Outcome class of a failure (see retry_policy), if place_call reported one
+        self.outcome = outcome
+        self.started_at = started_at
+        self.finished_at = finished_at
+
+    @property
+    def success(self) -> bool:
+        return self.call_sid is not None
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return (self.finished_at - self.started_at).total_seconds()
+
+    def __repr__(self) -> str:
+        status = f"sid={self.call_sid}" if self.success else f"error={self.error!r}"
+        return f"CallResult(phone={self.lead.get('phone')!r}, {status})"
+
+
+class DialingEngine:
+    """
+    Fixed-size worker pool that places calls under a token-bucket rate limit.
+
+    The number of workers is the max-concurrent-calls cap: each worker holds at
+    most one call creation in flight. Leads are fed through a bounded queue, so
+    a generator of leads is consumed only as fast as calls can be placed.
+    """
+
+    def __init__(
+        self,
+        place_call: Callable[[Dict[str, Any], bool], Optional[str]],
+        calls_per_second: float = 1.0,
+        max_concurrent_calls: int = 10,
+        burst: Optional[float] = None,
+        on_result: Optional[Callable[[CallResult], None]] = None,
+        limiter: Optional[TokenBucket] = None
+    ):
+        """
+        Args:
+            place_call: Callable taking (lead, test_mode) and returning a call SID or None;
+                exceptions with an `outcome` attribute set CallResult.outcome
+            calls_per_second: Sustained outbound call rate
+            max_concurrent_calls: Worker pool size (trunk capacity)
+            burst: Token bucket capacity. Defaults to one second worth of calls
+            on_result: Optional callback invoked from the worker thread for every result
+            limiter: Rate limiter to use instead of a TokenBucket of its own (e.g. one
+                shared with other dialers); calls_per_second and burst are then ignored
+        """
+        if max_concurrent_calls < 1:
+            raise ValueError(f"max_concurrent_calls must be >= 1, got {max_concurrent_calls}")
+        self.place_call = place_call
+        self.max_concurrent_calls = int(max_concurrent_calls)
+        self.limiter = limiter if limiter is not None else TokenBucket(calls_per_second, burst)
+        self.on_result = on_result
+
+    def _worker(self, work: "queue.Queue", results: Optional[List[CallResult]],
+                results_lock: threading.Lock, test_mode: bool,
+                stop_event: threading.Event) -> None:
+        while True:
+            lead = work.get()
+            try:
+                if lead is _STOP:
+                    return
+                if stop_event.is_set():
+                    continue
+                if not self.limiter.acquire(stop_event=stop_event):
+                    continue
+                result = self._dial_one(lead, test_mode)
+                if results is not None:
+                    with results_lock:
+                        results.append(result)
+                if self.on_result is not None:
+                    try:
+                        self.on_result(result)
+                    except Exception as e:
+                        logger.error(f"Result callback failed for {result}: {str(e)}")
+            finally:
+                work.task_done()
+
+    def _dial_one(self, lead: Dict[str, Any], test_mode: bool) -> CallResult:
+        result = CallResult(lead, started_at=datetime.now())
+        try:
+            result.call_sid = self.place_call(lead, test_mode)
+            if result.call_sid is None:
+                result.error = "Call was not placed"
+        except Exception as e:
+            result.outcome = getattr(e, 'outcome', None)
+            if result.outcome is None:
+                logger.error(f"❌ Unexpected error dialing lead {lead}: {str(e)}")
+            else:
+                logger.warning(f"Call to {lead.get('phone')} failed ({result.outcome}): {str(e)}")
+            result.error = str(e)
+        result.finished_at = datetime.now()
+        return result
+
+    def dial(self, leads: Iterable[Dict[str, Any]], test_mode: bool = False,
+             stop_event: Optional[threading.Event] = None, collect_results: bool = True) -> List[CallResult]:
+        """
+        Dial every lead and block until all calls have been placed.
+
+        Args:
+            leads: Any iterable of lead dictionaries (lists or generators)
+            test_mode: If True, use test phone numbers
+            stop_event: Optional event that aborts dialing of remaining leads when set
+            collect_results: If False, results only go to on_result and are not kept,
+                so memory stays flat however long the stream of leads runs
+
+        Returns:
+            List[CallResult]: One result per dialed lead, in completion order (empty if not collected)
+        """
+        stop_event = stop_event or threading.Event()
+        work: "queue.Queue" = queue.Queue(maxsize=self.max_concurrent_calls * 2)
+        results: Optional[List[CallResult]] = [] if collect_results else None
+        results_lock = threading.Lock()
+
+        workers = [
+            threading.Thread(
+                target=self._worker,
+                args=(work, results, results_lock, test_mode, stop_event),
+                name=f"dialer-{i}",
+                daemon=True
+            )
+            for i in range(self.max_concurrent_calls)
+        ]
+        for t in workers:
+            t.start()
+
+        try:
+            for lead in leads:
+                if stop_event.is_set():
+                    break
+                work.put(lead)
+        finally:
+            for _ in workers:
+                work.put(_STOP)
+            for t in workers:
+                t.join()
+
+        return results if results is not None else []
@@ -1,68 +1,206 @@
 import os
+import re
 import time
+import threading
 import yaml
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from twilio.rest import Client
+from caller_pool import account_credentials
 
 # Load credentials from config.yaml
 config_path = os.path.join(os.path.dirname(__file__), '..', 'config.yaml')
 with open(config_path, 'r') as f:
     config = yaml.safe_load(f)
 
-account_sid = config['twilio']['account_sid']
-auth_token = config['twilio']['auth_token']
-client = Client(account_sid, auth_token)
+# Auth token per account calls are placed from; recordings live in the account of their call
+ACCOUNTS = account_credentials(config['twilio'])
+# Fallback for recordings whose account is not known
+PRIMARY_ACCOUNT_SID = next(iter(ACCOUNTS))
 
-def download_recordings(call_sid, save_dir=None, retries=5, delay=5, min_file_size=2000):
-    if save_dir is None:
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        save_dir = os.path.join(project_root, 'downloads')
+API_BASE_URL = config['twilio'].get('api_base_url', 'https://api.twilio.com').rstrip('/')
 
+download_settings = config.get('downloads', {}) or {}
+# Recording bodies downloading at once across all calls
+MAX_DOWNLOAD_WORKERS = download_settings.get('max_workers', 8)
+# Calls whose recordings are polled and downloaded at once by download_many
+MAX_CONCURRENT_CALLS = download_settings.get('max_concurrent_calls', 4)
+CHUNK_SIZE = 64 * 1024
+
+# Account SID in a recording URL or URI, e.g. /2010-04-01/Accounts/ACxxx/Recordings/RExxx
+_ACCOUNT_IN_URL = re.compile(r'/Accounts/(AC[^/]+)/')
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def client_for(sid=None):
+    """Twilio client of an account of the pool, the primary account's for an unknown SID."""
+    sid = sid if sid in ACCOUNTS else PRIMARY_ACCOUNT_SID
+    with _clients_lock:
+        if sid not in _clients:
+            _clients[sid] = Client(sid, ACCOUNTS[sid])
+        return _clients[sid]
+
+
+client = client_for(PRIMARY_ACCOUNT_SID)
+
+# One pooled keep-alive session shared by every download, authenticated per request as the recording's account
+session = requests.Session()
+session.auth = (PRIMARY_ACCOUNT_SID, ACCOUNTS[PRIMARY_ACCOUNT_SID])
+session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=MAX_DOWNLOAD_WORKERS))
+session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=MAX_DOWNLOAD_WORKERS))
+
+_download_pool = ThreadPoolExecutor(max_workers=MAX_DOWNLOAD_WORKERS, thread_name_prefix="recording-download")
+
+
+def _auth(sid=None, url=None):
+    """Credentials for a recording of the given account, or of the account named in its URL."""
+    if sid not in ACCOUNTS and url:
+        match = _ACCOUNT_IN_URL.search(url)
+        sid = match.group(1) if match else None
+    sid = sid if sid in ACCOUNTS else PRIMARY_ACCOUNT_SID
+    return (sid, ACCOUNTS[sid])
+
+
+def default_save_dir():
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(project_root, 'downloads')
+
+
+def download_file(url, filename, timeout=60, auth=None):
+    """Stream a URL to disk in chunks, renaming into place only once complete. Returns the file size."""
+    partial = f"{filename}.part"
+    try:
+        with session.get(url, stream=True, timeout=timeout, auth=auth or _auth(url=url)) as response:
+            response.raise_for_status()
+            with open(partial, "wb") as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    f.write(chunk)
+        os.replace(partial, filename)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return os.path.getsize(filename)
+
+
+def _media_url(recording):
+    return f"{API_BASE_URL}{recording.uri.replace('.json', '.mp3')}"
+
+
+def _download_recording(recording_sid, media_url, save_dir, min_file_size, auth=None):
+    filename = os.path.join(save_dir, f"recording_{recording_sid}.mp3")
+    if os.path.exists(filename) and os.path.getsize(filename) >= min_file_size:
+        print(f"✅ Already downloaded {filename}")
+        return filename
+
+    print(f"🔗 Downloading from: {media_url}")
+    try:
+        file_size = download_file(media_url, filename, auth=auth)
+    except requests.RequestException as e:
+        print(f"⚠️ Warning: Download of {media_url} failed: {e}")
+        return None
+
+    if file_size < min_file_size:
+        print(f"⚠️ Warning: File {filename} is too small ({file_size} bytes), recording may still be processing")
+        os.remove(filename)
+        return None
+    print(f"✅ Downloaded {filename} ({file_size} bytes)")
+    return filename
+
+
+def download_recording_url(recording_sid, recording_url, save_dir=None, min_file_size=2000, account_sid=None):
+    """
+    Download a recording whose URL is already known (e.g. from a recording status callback).
+
+    The download authenticates as `account_sid` (the callback's AccountSid),
+    else as the account in the URL.
+
+    Returns:
+        str: Path of the downloaded file
+
+    Raises:
+        RuntimeError: If the download failed or the file is implausibly small
+    """
+    save_dir = save_dir or default_save_dir()
+    os.makedirs(save_dir, exist_ok=True)
+    filename = _download_recording(recording_sid, f"{recording_url}.mp3", save_dir, min_file_size,
+                                   _auth(account_sid, recording_url))
+    if filename is None:
+        raise RuntimeError(f"Could not download recording {recording_sid} from {recording_url}")
+    return filename
+
+
+def _download_recording_async(recording, save_dir, min_file_size, sid):
+    return _download_pool.submit(_download_recording, recording.sid, _media_url(recording), save_dir, min_file_size,
+                                 _auth(sid))
+
+
+def _list_recordings(call_sid, sid=None):
+    """Recordings of a call and the account they are in, searching every account if the call's is unknown."""
+    for candidate in ([sid] if sid in ACCOUNTS else list(ACCOUNTS)):
+        recordings = client_for(candidate).recordings.list(call_sid=call_sid)
+        if recordings:
+            return recordings, candidate
+    return [], sid
+
+
+def download_recordings(call_sid, save_dir=None, retries=5, delay=1, max_delay=30, min_file_size=2000,
+                        account_sid=None):
+    """
+    Download every recording of a call, polling with exponential backoff until they are available.
+
+    Recordings of the call are downloaded concurrently on the shared download pool.
+    They are listed in `account_sid`, the account the call was placed from,
+    or in every configured account if it is not known.
+
+    Returns:
+        list: Paths of downloaded files, or None if nothing valid was found after all retries
+    """
+    save_dir = save_dir or default_save_dir()
     os.makedirs(save_dir, exist_ok=True)
 
     for attempt in range(retries):
         print(f"⏳ Checking for recordings (Attempt {attempt+1}/{retries})...")
-        recordings = client.recordings.list(call_sid=call_sid)
+        recordings, sid = _list_recordings(call_sid, account_sid)
 
         if recordings:
             print(f"✅ Found {len(recordings)} recording(s).")
-            downloaded_files = []
-            for recording in recordings:
-                media_url = f"https://api.twilio.com{recording.uri.replace('.json', '.mp3')}"
-                print(f"🔗 Downloading from: {media_url}")
-
-                response = requests.get(media_url, auth=(account_sid, auth_token))
-                filename = os.path.join(save_dir, f"recording_{recording.sid}.mp3")
-
-                with open(filename, "wb") as f:
-                    f.write(response.content)
-
-                file_size = os.path.getsize(filename)
-                if file_size < min_file_size:
-                    print(f"⚠️ Warning: File {filename} is too small ({file_size} bytes). Retrying in {delay} seconds...")
-                    time.sleep(delay)
-                    continue  # Try again in the next iteration
-                else:
-                    print(f"✅ Downloaded {filename} ({file_size} bytes)")
-                    downloaded_files.append(filename)
-
+            futures = [_download_recording_async(r, save_dir, min_file_size, sid) for r in recordings]
+            downloaded_files = [f for f in (fut.result() for fut in futures) if f]
             if downloaded_files:
                 return downloaded_files  # Return list of downloaded file paths
-            else:
-                print(f"⚠️ No valid recordings downloaded yet. Retrying in {delay} seconds...")
-
+            print("⚠️ No valid recordings downloaded yet.")
         else:
-            print(f"❌ No recordings found for CallSid: {call_sid}. Retrying in {delay} seconds...")
+            print(f"❌ No recordings found for CallSid: {call_sid}.")
 
-        time.sleep(delay)
+        if attempt < retries - 1:
+            wait = min(delay * (2 ** attempt), max_delay)
+            print(f"Retrying in {wait} seconds...")
+            time.sleep(wait)
 
     print(f"❌ No valid recordings found after {retries} attempts for CallSid: {call_sid}")
     return None
 
+
+def download_many(call_sids, save_dir=None, max_concurrent_calls=MAX_CONCURRENT_CALLS, **kwargs):
+    """
+    Download recordings for many calls, several calls at a time.
+
+    Returns:
+        dict: call_sid -> list of downloaded files (or None)
+    """
+    with ThreadPoolExecutor(max_workers=max_concurrent_calls, thread_name_prefix="recording-poll") as pool:
+        futures = {sid: pool.submit(download_recordings, sid, save_dir, **kwargs) for sid in call_sids}
+        return {sid: fut.result() for sid, fut in futures.items()}
+
+
 if __name__ == "__main__":
-    call_sid = input("Enter the CallSid: ").strip()
-    files = download_recordings(call_sid)
-    if files:
-        print(f"✅ All recordings downloaded: {files}")
-    else:
-        print("❌ No recordings available for this CallSid.")
+    call_sids = input("Enter the CallSid(s), comma separated: ").strip().split(',')
+    results = download_many([sid.strip() for sid in call_sids if sid.strip()])
+    for call_sid, files in results.items():
+        if files:
+            print(f"✅ All recordings downloaded for {call_sid}: {files}")
+        else:
+            print(f"❌ No recordings available for {call_sid}.")
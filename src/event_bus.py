@@ -0,0 +1,244 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+EVENTS_DB = os.path.join(os.path.dirname(__file__), '..', 'logs', 'events.db')
+
+# Event kinds published by the voice server
+CALL_STATUS = 'call_status'  # Twilio call status callback: initiated, ringing, answered, completed...
+RESPONSE = 'response'        # IVR answer logged
+TRANSFER = 'transfer'        # caller transferred to an agent
+RECORDING = 'recording'      # recording ready for processing
+SUMMARY = 'summary'          # call summary saved
+RESYNC = 'resync'            # sent to a subscriber that fell behind and lost events
+
+
+class Subscription:
+    """One subscriber's bounded buffer of pending events."""
+
+    def __init__(self, bus: 'EventBus', max_pending: int, kinds: Optional[Iterable[str]] = None):
+        self._bus = bus
+        self.kinds = set(kinds) if kinds else None
+        self._pending: Deque[Dict[str, Any]] = deque(maxlen=max_pending)
+        self._cond = threading.Condition()
+        self.dropped = 0
+        self.closed = False
+        # Highest event id offered, so replayed events are never delivered twice
+        self.last_id = 0
+
+    def _offer(self, event: Dict[str, Any]) -> None:
+        if event['id'] <= self.last_id:
+            return
+        self.last_id = event['id']
+        if self.kinds is not None and event['kind'] not in self.kinds:
+            return
+        with self._cond:
+            if len(self._pending) == self._pending.maxlen:
+                # A slow client loses its oldest events rather than growing without bound
+                self.dropped += 1
+            self._pending.append(event)
+            self._cond.notify()
+
+    def get(self, timeout: float) -> List[Dict[str, Any]]:
+        """
+        Wait up to `timeout` seconds for events and return all pending ones.
+
+        If events were dropped since the last call, a RESYNC event is returned
+        first so the client knows to refetch.
+        """
+        with self._cond:
+            if not self._pending and not self.closed:
+                self._cond.wait(timeout)
+            events = list(self._pending)
+            self._pending.clear()
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            events.insert(0, {'id': None, 'kind': RESYNC, 'data': {'dropped': dropped}, 'time': time.time()})
+        return events
+
+    def close(self) -> None:
+        self._bus.unsubscribe(self)
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class SharedEventLog:
+    """
+    SQLite table of recent events shared by the processes of one server.
+
+    Lets a subscriber connected to one worker process see events published by
+    another. Event ids come from the table, so they are the same in every process.
+    """
+
+    def __init__(self, path: str = EVENTS_DB, keep: int = 10000):
+        """
+        Args:
+            path: SQLite database file
+            keep: Number of most recent events kept
+        """
+        self.path = path
+        self.keep = keep
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, data TEXT NOT NULL, time REAL NOT NULL)"
+        )
+
+    def append(self, kind: str, data: Dict[str, Any]) -> int:
+        with self._lock:
+            event_id = self._conn.execute(
+                "INSERT INTO events (kind, data, time) VALUES (?, ?, ?)", (kind, json.dumps(data), time.time())
+            ).lastrowid
+            if event_id % 1000 == 0:
+                self._conn.execute("DELETE FROM events WHERE id <= ?", (event_id - self.keep,))
+        return event_id
+
+    def since(self, event_id: int, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Events after event_id, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, kind, data, time FROM events WHERE id > ? ORDER BY id LIMIT ?", (event_id, limit)
+            ).fetchall()
+        return [{'id': r[0], 'kind': r[1], 'data': json.loads(r[2]), 'time': r[3]} for r in rows]
+
+    def bounds(self) -> Tuple[int, int]:
+        """(oldest, newest) event id kept, (0, 0) if empty."""
+        with self._lock:
+            row = self._conn.execute("SELECT MIN(id), MAX(id) FROM events").fetchone()
+        return row[0] or 0, row[1] or 0
+
+
+class EventBus:
+    """
+    Publish/subscribe for call lifecycle events.
+
+    Publishing never blocks on subscribers: each one has a bounded buffer that
+    drops its oldest events when full. The last `history` events are kept so a
+    reconnecting client can resume from its Last-Event-ID.
+
+    By default events stay in this process. After use_shared_log(), events go
+    through a SharedEventLog and every process sharing it delivers them.
+    """
+
+    def __init__(self, max_pending: int = 256, history: int = 1000):
+        """
+        Args:
+            max_pending: Events buffered per subscriber before the oldest are dropped
+            history: Recent events kept for replay to reconnecting subscribers
+        """
+        self.max_pending = max_pending
+        self._history: Deque[Dict[str, Any]] = deque(maxlen=history)
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._log: Optional[SharedEventLog] = None
+        self._tail: Optional[threading.Thread] = None
+
+    def use_shared_log(self, path: str = EVENTS_DB, poll_interval: float = 0.2) -> None:
+        """
+        Deliver events published by any process sharing `path`.
+
+        Call in each process after forking. Delivery lags publishing by up to
+        `poll_interval` seconds.
+        """
+        with self._lock:
+            self._log = SharedEventLog(path)
+            self._next_id = self._log.bounds()[1] + 1
+        self._tail = threading.Thread(target=self._follow, args=(poll_interval,), name="event-bus-tail", daemon=True)
+        self._tail.start()
+
+    def _follow(self, poll_interval: float) -> None:
+        while True:
+            try:
+                events = self._log.since(self._next_id - 1)
+            except Exception as e:
+                logger.error(f"Failed to read shared events: {str(e)}")
+                events = []
+            for event in events:
+                self._deliver(event)
+            if len(events) < 1000:
+                time.sleep(poll_interval)
+
+    def _deliver(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            self._deliver_locked(event)
+
+    def _deliver_locked(self, event: Dict[str, Any]) -> None:
+        # Offered under the lock so every subscriber sees events in id order
+        self._next_id = max(self._next_id, event['id'] + 1)
+        self._history.append(event)
+        for subscription in self._subscribers:
+            subscription._offer(event)
+
+    def publish(self, kind: str, data: Dict[str, Any]) -> int:
+        """Publish an event to every subscriber. Returns the event id."""
+        if self._log is not None:
+            return self._log.append(kind, data)
+        with self._lock:
+            event = {'id': self._next_id, 'kind': kind, 'data': data, 'time': time.time()}
+            self._deliver_locked(event)
+        return event['id']
+
+    def subscribe(self, kinds: Optional[Iterable[str]] = None, last_event_id: Optional[int] = None) -> Subscription:
+        """
+        Subscribe to events, optionally only some kinds.
+
+        Args:
+            last_event_id: Replay buffered events after this id first
+        """
+        subscription = Subscription(self, self.max_pending, kinds)
+        with self._lock:
+            if last_event_id is not None:
+                if self._log is not None:
+                    replay = self._log.since(last_event_id, limit=self._history.maxlen)
+                    oldest, newest = self._log.bounds()
+                else:
+                    replay = [e for e in self._history if e['id'] > last_event_id]
+                    oldest = self._history[0]['id'] if self._history else 0
+                    newest = self._next_id - 1
+                if (oldest and oldest > last_event_id + 1) or last_event_id > newest:
+                    # Gap older than the history window, or ids from before a restart
+                    subscription.dropped += 1
+                for event in replay:
+                    subscription._offer(event)
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Serialize an event as a Server-Sent Events message. Events without an id leave Last-Event-ID alone."""
+    message = f"event: {event['kind']}\ndata: {json.dumps(event['data'])}\n\n"
+    return message if event['id'] is None else f"id: {event['id']}\n{message}"
+
+
+bus = EventBus()
+
+
+def publish(kind: str, data: Dict[str, Any]) -> None:
+    """Publish to the process-wide bus, logging instead of raising on failure."""
+    try:
+        bus.publish(kind, data)
+    except Exception as e:
+        logger.error(f"Failed to publish {kind} event: {str(e)}")
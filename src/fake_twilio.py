@@ -0,0 +1,152 @@
+"""
+Local stand-in for the subset of the Twilio REST API used by the dialer.
+
+Used to benchmark and exercise call placement offline:
+
+    python src/fake_twilio.py --port 8099 --latency 0.15
+"""
+import json
+import re
+import threading
+import time
+import uuid
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+_CALLS_PATH = re.compile(r"^/2010-04-01/Accounts/(?P<account>[^/]+)/Calls\.json$")
+
+
+def _new_sid(prefix: str) -> str:
+    return prefix + uuid.uuid4().hex
+
+
+class _FakeTwilioRequestHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so pooled clients reuse connections like they would against Twilio
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_form(self) -> Dict[str, str]:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length).decode() if length else ""
+        return {k: v[0] for k, v in parse_qs(raw).items()}
+
+    def do_POST(self):
+        server: "FakeTwilioServer" = self.server.fake  # type: ignore[attr-defined]
+        path = urlparse(self.path).path
+        match = _CALLS_PATH.match(path)
+        if not match:
+            self._send_json(404, {"code": 20404, "message": "Not found", "status": 404})
+            return
+
+        form = self._read_form()
+        if server.latency:
+            time.sleep(server.latency)
+
+        if not server._admit():
+            self._send_json(429, {"code": 20429, "message": "Too Many Requests", "status": 429})
+            return
+        if not form.get("To") or not form.get("To", "").startswith("+"):
+            self._send_json(400, {"code": 21211, "message": "Invalid 'To' Phone Number", "status": 400})
+            return
+
+        call = {
+            "sid": _new_sid("CA"),
+            "account_sid": match.group("account"),
+            "to": form.get("To"),
+            "from": form.get("From"),
+            "status": "queued",
+            "url": form.get("Url"),
+            "date_created": time.strftime("%a, %d %b %Y %H:%M:%S +0000", time.gmtime()),
+        }
+        server._record(call)
+        self._send_json(201, call)
+
+
+class FakeTwilioServer:
+    """
+    Threaded HTTP server emulating Twilio's Calls endpoint.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind, 0 picks a free port
+        latency: Seconds to sleep per request, to emulate API round-trip time
+        max_rps: If set, requests beyond this per-second budget get a 429
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.0, max_rps: Optional[float] = None):
+        self.latency = latency
+        self.max_rps = max_rps
+        self.calls: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._httpd = ThreadingHTTPServer((host, port), _FakeTwilioRequestHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self  # type: ignore[attr-defined]
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _admit(self) -> bool:
+        if not self.max_rps:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            return self._window_count <= self.max_rps
+
+    def _record(self, call: Dict[str, Any]) -> None:
+        with self._lock:
+            self.calls.append(call)
+
+    def start(self) -> "FakeTwilioServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-twilio", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeTwilioServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a fake Twilio REST server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--max-rps", type=float, default=None)
+    args = parser.parse_args()
+
+    server = FakeTwilioServer(args.host, args.port, args.latency, args.max_rps)
+    print(f"🧪 Fake Twilio listening on {server.base_url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
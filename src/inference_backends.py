@@ -0,0 +1,134 @@
+import os
+import difflib
+import logging
+from typing import Any, Dict, List, Optional
+import yaml
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', 'config.yaml')
+ONNX_DIR = os.path.join(os.path.dirname(__file__), '..', 'models', 'onnx')
+
+# Selectable with inference.backend in config.yaml or the INFERENCE_BACKEND env var
+TORCH = 'torch'            # plain PyTorch on the best available device
+TORCH_INT8 = 'torch-int8'  # PyTorch on CPU with dynamically int8-quantized Linear layers
+ONNX = 'onnx'              # exported model run by ONNX Runtime on CPU
+BACKENDS = (TORCH, TORCH_INT8, ONNX)
+
+
+def load_inference_config() -> Dict[str, Any]:
+    """The `inference` section of config.yaml, or {} if there is none."""
+    try:
+        with open(CONFIG_PATH, 'r') as f:
+            return (yaml.safe_load(f) or {}).get('inference', {}) or {}
+    except FileNotFoundError:
+        return {}
+
+
+def get_backend_name() -> str:
+    backend = os.getenv("INFERENCE_BACKEND") or load_inference_config().get('backend', TORCH)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {BACKENDS}")
+    return backend
+
+
+def select_device():
+    """CUDA if available, then Apple MPS, otherwise CPU."""
+    import torch
+    if torch.cuda.is_available():
+        return 0
+    mps = getattr(torch.backends, 'mps', None)
+    if mps is not None and mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+def _configure_threads() -> None:
+    threads = load_inference_config().get('threads')
+    if threads:
+        import torch
+        torch.set_num_threads(int(threads))
+
+
+def _build_torch(task: str, model_name: str, device) -> Any:
+    from transformers import pipeline
+    return pipeline(task, model=model_name, device=device)
+
+
+def _build_torch_int8(task: str, model_name: str) -> Any:
+    import torch
+    pipe = _build_torch(task, model_name, "cpu")
+    pipe.model = torch.quantization.quantize_dynamic(pipe.model, {torch.nn.Linear}, dtype=torch.qint8)
+    return pipe
+
+
+def _build_onnx(task: str, model_name: str) -> Any:
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM, ORTModelForSpeechSeq2Seq
+    except ImportError as e:
+        raise ImportError(
+            "The 'onnx' inference backend requires optimum with ONNX Runtime: "
+            "pip install 'optimum[onnxruntime]'"
+        ) from e
+    from transformers import AutoProcessor, AutoTokenizer, pipeline
+
+    onnx_dir = load_inference_config().get('onnx_dir', ONNX_DIR)
+    export_dir = os.path.join(onnx_dir, model_name.replace('/', '__'))
+    model_cls = ORTModelForSpeechSeq2Seq if task == "automatic-speech-recognition" else ORTModelForSeq2SeqLM
+
+    if os.path.isdir(export_dir):
+        model = model_cls.from_pretrained(export_dir)
+    else:
+        logger.info(f"Exporting {model_name} to ONNX in {export_dir}...")
+        model = model_cls.from_pretrained(model_name, export=True)
+        model.save_pretrained(export_dir)
+
+    if task == "automatic-speech-recognition":
+        processor = AutoProcessor.from_pretrained(model_name)
+        return pipeline(task, model=model, tokenizer=processor.tokenizer,
+                        feature_extractor=processor.feature_extractor)
+    return pipeline(task, model=model, tokenizer=AutoTokenizer.from_pretrained(model_name))
+
+
+def build_pipeline(task: str, model_name: str, backend: Optional[str] = None) -> Any:
+    """
+    Build a transformers pipeline on the selected inference backend.
+
+    Args:
+        task: Pipeline task, e.g. "automatic-speech-recognition" or "summarization"
+        model_name: Hugging Face model id
+        backend: One of BACKENDS, defaults to get_backend_name()
+    """
+    backend = backend or get_backend_name()
+    _configure_threads()
+    logger.info(f"Building {task} pipeline for {model_name} on backend '{backend}'")
+    if backend == TORCH:
+        return _build_torch(task, model_name, select_device())
+    if backend == TORCH_INT8:
+        return _build_torch_int8(task, model_name)
+    if backend == ONNX:
+        return _build_onnx(task, model_name)
+    raise ValueError(f"Unknown inference backend '{backend}', expected one of {BACKENDS}")
+
+
+def text_similarity(a: str, b: str) -> float:
+    """Word-level similarity ratio between two outputs (1.0 means identical)."""
+    return difflib.SequenceMatcher(None, a.lower().split(), b.lower().split()).ratio()
+
+
+def check_against_baseline(baseline_outputs: List[str], candidate_outputs: List[str],
+                           min_similarity: float = 0.9) -> Dict[str, Any]:
+    """
+    Compare a backend's outputs with the plain PyTorch outputs for the same inputs.
+
+    Returns:
+        dict: mean and minimum similarity, and whether every output met min_similarity
+    """
+    if len(baseline_outputs) != len(candidate_outputs):
+        raise ValueError("Baseline and candidate must have one output per input")
+    scores = [text_similarity(a, b) for a, b in zip(baseline_outputs, candidate_outputs)]
+    return {
+        'mean_similarity': sum(scores) / len(scores) if scores else 1.0,
+        'min_similarity': min(scores) if scores else 1.0,
+        'passed': all(s >= min_similarity for s in scores),
+    }
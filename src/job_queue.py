@@ -0,0 +1,289 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+JOBS_DB = os.path.join(os.path.dirname(__file__), '..', 'logs', 'jobs.db')
+
+# Job statuses
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    key TEXT,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    run_at REAL NOT NULL,
+    locked_until REAL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs(status, run_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_kind_key ON jobs(kind, key);
+"""
+
+
+def _format_ts(ts: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S') if ts else None
+
+
+class JobQueue:
+    """
+    Durable SQLite-backed job queue with an in-process worker pool.
+
+    Webhooks enqueue work and return immediately; worker threads run the
+    registered handler for each job kind. A running job holds a lease, so jobs
+    from a crashed process are picked up again once the lease expires. Several
+    processes may share the same database file.
+    """
+
+    def __init__(self, path: str = JOBS_DB, workers: int = 2, lease_seconds: float = 600,
+                 poll_interval: float = 1.0, retry_delay: float = 30):
+        """
+        Args:
+            path: SQLite database file
+            workers: Number of worker threads started by start()
+            lease_seconds: How long a claimed job is reserved before it may be retried elsewhere
+            poll_interval: Seconds between polls when no local enqueue wakes the workers
+            retry_delay: Base delay before a failed job is retried, doubled per attempt
+        """
+        self.path = path
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self._handlers: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Condition()
+        self._lock = threading.RLock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = self._connect()
+        self._conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def reopen(self) -> None:
+        """
+        Open a fresh database connection in a forked child process.
+
+        SQLite connections must not be used across fork(), so a queue created
+        before forking (e.g. in a preloading server master) calls this in each child.
+        The inherited connection is abandoned rather than closed, as closing it
+        could release locks the parent still holds.
+        """
+        with self._lock:
+            self._threads = []
+            self._conn = self._connect()
+
+    def register(self, kind: str, handler: Callable[[Dict[str, Any]], Any]) -> None:
+        """Register the function that runs jobs of the given kind. Its return value must be JSON-serializable."""
+        self._handlers[kind] = handler
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], key: Optional[str] = None,
+                delay: float = 0, max_attempts: int = 3) -> int:
+        """
+        Add a job to the queue.
+
+        Args:
+            kind: Registered job kind
+            payload: JSON-serializable job arguments
+            key: Optional lookup key (e.g. a CallSid), see find()
+            delay: Seconds to wait before the job becomes runnable
+            max_attempts: Attempts before the job is marked failed
+
+        Returns:
+            int: Job id
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO jobs (kind, key, payload, status, max_attempts, run_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (kind, key, json.dumps(payload), QUEUED, max_attempts, now + delay, now, now)
+            )
+            job_id = cursor.lastrowid
+        if not delay:
+            with self._wakeup:
+                self._wakeup.notify()
+        return job_id
+
+    def _to_dict(self, row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            'id': row['id'],
+            'kind': row['kind'],
+            'key': row['key'],
+            'status': row['status'],
+            'attempts': row['attempts'],
+            'payload': json.loads(row['payload']),
+            'result': json.loads(row['result']) if row['result'] is not None else None,
+            'error': row['error'],
+            'run_at': _format_ts(row['run_at']),
+            'created_at': _format_ts(row['created_at']),
+            'updated_at': _format_ts(row['updated_at']),
+        }
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def find(self, kind: str, key: str) -> List[Dict[str, Any]]:
+        """All jobs of a kind enqueued with the given key, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE kind = ? AND key = ? ORDER BY id", (kind, key)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row['status']: row['n'] for row in rows}
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        """Atomically lease the next runnable job, if any."""
+        now = time.time()
+        kinds = list(self._handlers)
+        if not kinds:
+            return None
+        placeholders = ', '.join('?' for _ in kinds)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    f"""
+                    SELECT * FROM jobs
+                    WHERE kind IN ({placeholders}) AND (
+                        (status = ? AND run_at <= ?) OR (status = ? AND locked_until < ?)
+                    )
+                    ORDER BY run_at, id LIMIT 1
+                    """,
+                    (*kinds, QUEUED, now, RUNNING, now)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1, locked_until = ?, updated_at = ? "
+                        "WHERE id = ?",
+                        (RUNNING, now + self.lease_seconds, now, row['id'])
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return row
+
+    def _finish(self, row: sqlite3.Row, result: Any = None, error: Optional[str] = None) -> bool:
+        """
+        Record the outcome of a claimed job.
+
+        Every claim counts an attempt, so the attempt number identifies this
+        lease: if the job outran its lease and was claimed again, nothing is updated.
+
+        Returns:
+            bool: False if the lease was lost to another worker
+        """
+        now = time.time()
+        attempts = row['attempts'] + 1
+        lease = (row['id'], RUNNING, attempts)
+        with self._lock:
+            if error is None:
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET status = ?, result = ?, error = NULL, locked_until = NULL, updated_at = ? "
+                    "WHERE id = ? AND status = ? AND attempts = ?",
+                    (DONE, json.dumps(result), now, *lease)
+                )
+            elif attempts < row['max_attempts']:
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, run_at = ?, locked_until = NULL, updated_at = ? "
+                    "WHERE id = ? AND status = ? AND attempts = ?",
+                    (QUEUED, error, now + self.retry_delay * (2 ** (attempts - 1)), now, *lease)
+                )
+            else:
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, locked_until = NULL, updated_at = ? "
+                    "WHERE id = ? AND status = ? AND attempts = ?",
+                    (FAILED, error, now, *lease)
+                )
+        if cursor.rowcount == 0:
+            logger.warning(f"⚠️ Job {row['id']} ({row['kind']}) ran past its lease and was claimed again, "
+                           f"result of attempt {attempts} dropped")
+            return False
+        return True
+
+    def run_once(self) -> bool:
+        """
+        Claim and run a single job on the calling thread.
+
+        Returns:
+            bool: True if a job was run, False if none was ready
+        """
+        row = self._claim()
+        if row is None:
+            return False
+        handler = self._handlers[row['kind']]
+        try:
+            result = handler(json.loads(row['payload']))
+        except Exception as e:
+            logger.error(f"❌ Job {row['id']} ({row['kind']}) failed: {str(e)}")
+            self._finish(row, error=str(e))
+        else:
+            logger.info(f"✅ Job {row['id']} ({row['kind']}) done")
+            self._finish(row, result=result)
+        return True
+
+    def _worker(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.run_once():
+                    continue
+            except Exception as e:
+                logger.error(f"Job worker error: {str(e)}")
+            with self._wakeup:
+                self._wakeup.wait(self.poll_interval)
+
+    def start(self) -> None:
+        """Start the worker threads. Safe to call more than once."""
+        with self._lock:
+            if self._threads:
+                return
+            self._stop.clear()
+            self._threads = [
+                threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for t in self._threads:
+                t.start()
+        logger.info(f"Started {self.workers} job workers on {self.path}")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Signal workers to exit after their current job and wait for them."""
+        self._stop.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
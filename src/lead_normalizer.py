@@ -0,0 +1,246 @@
+"""
+Phone number normalization and validation for lead files.
+
+Numbers are normalized to E.164 with North American Numbering Plan rules for
+numbers without a country code:
+
+    (585) 685-9955, 585.685.9955, 15856859955  ->  +15856859955
+    011 44 20 7946 0958                         ->  +442079460958
+
+NANP numbers must have a valid area code (2-9 first digit, not an N11 service
+code) and exchange (2-9 first digit); other countries are only checked for
+E.164 length. normalize_phones() applies the same rules to whole pandas columns
+with vectorized string operations, and LeadNormalizer uses it to split chunks
+of a lead file into the rows to dial and rejects carrying a reason.
+normalize_phone() is the per-number version used when placing single calls.
+"""
+import os
+import re
+import logging
+from typing import Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+REJECTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'logs', 'rejects')
+
+# Reject reasons
+MISSING = 'missing'
+TOO_SHORT = 'too_short'
+TOO_LONG = 'too_long'
+INVALID_AREA_CODE = 'invalid_area_code'
+INVALID_EXCHANGE = 'invalid_exchange'
+DUPLICATE = 'duplicate'
+
+REJECT_COLUMN = 'reject_reason'
+
+# Kept as pattern strings so pandas can run them on Arrow-backed strings without a per-row Python loop
+_NON_DIGITS = r"\D"
+_INTERNATIONAL_PREFIX = '011'
+# E.164 allows at most 15 digits including the country code
+_MIN_INTERNATIONAL_DIGITS = 8
+_MAX_DIGITS = 15
+# NANP: +1 NPA NXX XXXX, area code (NPA) and exchange (NXX) start with 2-9, N11 area codes are service codes
+_NANP_AREA_CODE = r"1[2-9](?:[02-9]\d|1[02-9])"
+_NANP_EXCHANGE = r"1\d{3}[2-9]"
+
+
+def normalize_phone(phone: object) -> Tuple[str, Optional[str]]:
+    """
+    Normalize one phone number.
+
+    Returns:
+        Tuple[str, Optional[str]]: The E.164 number ("" if it cannot be formed)
+        and the reject reason, None for a valid number
+    """
+    if phone is None or (isinstance(phone, float) and phone != phone):
+        return "", MISSING
+    text = str(phone).strip()
+    digits = re.sub(_NON_DIGITS, "", text)
+    has_plus = text.startswith('+')
+    if not has_plus and digits.startswith(_INTERNATIONAL_PREFIX):
+        digits, has_plus = digits[len(_INTERNATIONAL_PREFIX):], True
+    if not digits:
+        return "", MISSING
+    if not has_plus and len(digits) == 10:
+        digits = '1' + digits
+
+    if digits.startswith('1') and (has_plus or len(digits) == 11):
+        if len(digits) != 11:
+            return "", TOO_SHORT if len(digits) < 11 else TOO_LONG
+    elif not has_plus:
+        return "", TOO_SHORT if len(digits) < 10 else TOO_LONG
+    elif len(digits) < _MIN_INTERNATIONAL_DIGITS:
+        return "", TOO_SHORT
+    elif len(digits) > _MAX_DIGITS:
+        return "", TOO_LONG
+    else:
+        return f"+{digits}", None
+
+    e164 = f"+{digits}"
+    if not re.match(_NANP_AREA_CODE, digits):
+        return e164, INVALID_AREA_CODE
+    if not re.match(_NANP_EXCHANGE, digits):
+        return e164, INVALID_EXCHANGE
+    return e164, None
+
+
+def normalize_phones(phones: pd.Series) -> pd.DataFrame:
+    """
+    Vectorized normalize_phone() over a column.
+
+    Returns:
+        pd.DataFrame: `phone` (E.164, "" if it cannot be formed) and
+        REJECT_COLUMN (None for valid numbers), on the input's index
+    """
+    text = phones.where(phones.notna(), "").astype(str).str.strip()
+    digits = text.str.replace(_NON_DIGITS, "", regex=True)
+    has_plus = text.str.startswith('+')
+
+    international = ~has_plus & digits.str.startswith(_INTERNATIONAL_PREFIX)
+    digits = digits.where(~international, digits.str.slice(len(_INTERNATIONAL_PREFIX)))
+    has_plus |= international
+    length = digits.str.len()
+
+    local = ~has_plus & (length == 10)
+    digits = digits.where(~local, '1' + digits)
+    length = length.where(~local, 11)
+
+    nanp = digits.str.startswith('1') & (has_plus | (length == 11))
+    other = has_plus & ~nanp
+    missing = length == 0
+    nanp_ok = nanp & (length == 11)
+    formed = nanp_ok | (other & (length >= _MIN_INTERNATIONAL_DIGITS) & (length <= _MAX_DIGITS))
+
+    reason = np.select(
+        [
+            missing,
+            nanp & (length < 11),
+            nanp & (length > 11),
+            ~nanp & ~has_plus & (length < 10),
+            ~nanp & ~has_plus,
+            other & (length < _MIN_INTERNATIONAL_DIGITS),
+            other & (length > _MAX_DIGITS),
+            nanp_ok & ~digits.str.match(_NANP_AREA_CODE),
+            nanp_ok & ~digits.str.match(_NANP_EXCHANGE),
+        ],
+        [MISSING, TOO_SHORT, TOO_LONG, TOO_SHORT, TOO_LONG, TOO_SHORT, TOO_LONG,
+         INVALID_AREA_CODE, INVALID_EXCHANGE],
+        default=None
+    )
+    return pd.DataFrame({
+        'phone': ('+' + digits).where(formed, ""),
+        REJECT_COLUMN: pd.Series(reason, index=phones.index, dtype=object)
+    }, index=phones.index)
+
+
+class LeadNormalizer:
+    """
+    Normalizes the phone column of lead chunks and drops invalid and duplicate rows.
+
+    One instance is used per lead file, so duplicates are caught across chunks.
+    """
+
+    def __init__(self, phone_column: str = 'phone'):
+        self.phone_column = phone_column
+        self._seen: Set[str] = set()
+        self.accepted = 0
+        self.rejected = 0
+
+    def normalize(self, chunk: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Split a chunk of leads into rows to dial and rejects.
+
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame]: Accepted rows with the phone
+            column in E.164, and rejected rows as they were in the file plus REJECT_COLUMN
+        """
+        normalized = normalize_phones(chunk[self.phone_column])
+        reason = normalized[REJECT_COLUMN]
+        phones = normalized['phone']
+
+        valid = reason.isna()
+        seen = self._seen
+        earlier = np.fromiter((phone in seen for phone in phones.to_numpy(dtype=object)), bool, len(phones))
+        duplicate = valid & (phones.duplicated() | earlier)
+        reason = reason.mask(duplicate, DUPLICATE)
+        keep = valid & ~duplicate
+
+        accepted = chunk[keep].copy()
+        accepted[self.phone_column] = phones[keep]
+        seen.update(accepted[self.phone_column].to_numpy(dtype=object))
+
+        rejects = chunk[~keep].copy()
+        rejects[REJECT_COLUMN] = reason[~keep]
+
+        self.accepted += len(accepted)
+        self.rejected += len(rejects)
+        return accepted, rejects
+
+    def remember(self, phones: pd.Series) -> None:
+        """
+        Count the valid numbers of rows handled by an earlier run as seen.
+
+        Used when resuming a file part way, so later rows repeating them are
+        still rejected as duplicates.
+        """
+        normalized = normalize_phones(phones)
+        self._seen.update(normalized['phone'][normalized[REJECT_COLUMN].isna()].to_numpy(dtype=object))
+
+
+def rejects_path(lead_file: str, rejects_dir: str = REJECTS_DIR) -> str:
+    """Where the rejects of a lead file are written (outside the watched leads directory)."""
+    name, ext = os.path.splitext(os.path.basename(lead_file))
+    return os.path.join(rejects_dir, f"{name}.rejects{ext or '.csv'}")
+
+
+def last_rejected_row(path: str, row_column: str) -> int:
+    """Highest `row_column` value in a reject CSV, -1 if the file is missing or has no rows."""
+    if not os.path.exists(path):
+        return -1
+    rows = pd.read_csv(path, usecols=[row_column])[row_column]
+    return int(rows.max()) if not rows.empty else -1
+
+
+def write_rejects(rejects: pd.DataFrame, path: str) -> None:
+    """Append rejected rows to a CSV, writing the header for a new file."""
+    if rejects.empty:
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    rejects.to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+
+
+def normalize_file(path: str, output_path: str, rejects_output: Optional[str] = None,
+                   chunk_size: int = 100000) -> Tuple[int, int]:
+    """
+    Normalize a whole lead file into a file of dialable leads and a reject file.
+
+    Returns:
+        Tuple[int, int]: Rows accepted and rows rejected
+    """
+    rejects_output = rejects_output or rejects_path(path)
+    for existing in (output_path, rejects_output):
+        if os.path.exists(existing):
+            os.remove(existing)
+    normalizer = LeadNormalizer()
+    for chunk in pd.read_csv(path, chunksize=chunk_size, dtype={'phone': str}):
+        accepted, rejects = normalizer.normalize(chunk)
+        accepted.to_csv(output_path, mode='a', header=not os.path.exists(output_path), index=False)
+        write_rejects(rejects, rejects_output)
+    logger.info(f"Normalized {path}: {normalizer.accepted} leads, {normalizer.rejected} rejected")
+    return normalizer.accepted, normalizer.rejected
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Normalize the phone numbers of a lead file")
+    parser.add_argument("lead_file")
+    parser.add_argument("output", help="CSV for the dialable leads")
+    parser.add_argument("--rejects", help=f"CSV for rejected rows (default: under {REJECTS_DIR})")
+    args = parser.parse_args()
+
+    accepted, rejected = normalize_file(args.lead_file, args.output, args.rejects)
+    print(f"✅ {accepted} leads written to {args.output}, {rejected} rejected")
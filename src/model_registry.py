@@ -0,0 +1,138 @@
+import os
+import time
+import threading
+import logging
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _rss_bytes() -> int:
+    """Current resident set size of this process in bytes (0 if unknown)."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        # ru_maxrss is the peak, in KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == 'Darwin' else peak * 1024
+    except Exception:
+        return 0
+
+
+class _Entry:
+    __slots__ = ('factory', 'instance', 'lock', 'load_seconds', 'rss_delta', 'error')
+
+    def __init__(self, factory: Callable[[], Any]):
+        self.factory = factory
+        self.instance = None
+        self.lock = threading.Lock()
+        self.load_seconds: Optional[float] = None
+        self.rss_delta: Optional[int] = None
+        self.error: Optional[str] = None
+
+
+class ModelRegistry:
+    """
+    Process-wide registry of lazily loaded models.
+
+    Each model is built by its factory on first get(), exactly once per
+    process, and shared by every caller afterwards.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, _Entry] = {}
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        """Register a zero-argument factory that builds the model."""
+        self._entries[name] = _Entry(factory)
+
+    def is_loaded(self, name: str) -> bool:
+        return self._entries[name].instance is not None
+
+    def get(self, name: str) -> Any:
+        """Return the shared model instance, loading it on first use."""
+        entry = self._entries[name]
+        if entry.instance is not None:
+            return entry.instance
+        with entry.lock:
+            if entry.instance is None:
+                logger.info(f"⏳ Loading model '{name}'...")
+                rss_before = _rss_bytes()
+                start = time.perf_counter()
+                try:
+                    entry.instance = entry.factory()
+                except Exception as e:
+                    entry.error = str(e)
+                    logger.error(f"Failed to load model '{name}': {str(e)}")
+                    raise
+                entry.load_seconds = time.perf_counter() - start
+                entry.rss_delta = _rss_bytes() - rss_before
+                entry.error = None
+                logger.info(
+                    f"✅ Loaded model '{name}' in {entry.load_seconds:.1f}s "
+                    f"(+{entry.rss_delta / 2**20:.0f} MiB RSS)"
+                )
+        return entry.instance
+
+    def warm_up(self, names: Optional[Iterable[str]] = None, background: bool = True) -> Optional[threading.Thread]:
+        """
+        Load models ahead of first use.
+
+        Args:
+            names: Models to load, defaults to all registered models
+            background: Load on a daemon thread and return it instead of blocking
+        """
+        names = list(names) if names is not None else list(self._entries)
+
+        def load_all():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception:
+                    pass  # already logged; get() will retry on next use
+
+        if not background:
+            load_all()
+            return None
+        thread = threading.Thread(target=load_all, name="model-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Load state, load time and resident memory growth for each model."""
+        stats = {
+            name: {
+                'loaded': entry.instance is not None,
+                'load_seconds': round(entry.load_seconds, 3) if entry.load_seconds is not None else None,
+                'rss_delta_mb': round(entry.rss_delta / 2**20, 1) if entry.rss_delta is not None else None,
+                'error': entry.error,
+            }
+            for name, entry in self._entries.items()
+        }
+        stats['_process'] = {'rss_mb': round(_rss_bytes() / 2**20, 1)}
+        return stats
+
+
+WHISPER_MODEL = "openai/whisper-base"
+SUMMARIZER_MODEL = "facebook/bart-large-cnn"
+
+
+def _load_whisper():
+    from inference_backends import build_pipeline
+    return build_pipeline("automatic-speech-recognition", WHISPER_MODEL)
+
+
+def _load_summarizer():
+    from inference_backends import build_pipeline
+    return build_pipeline("summarization", SUMMARIZER_MODEL)
+
+
+registry = ModelRegistry()
+registry.register("whisper", _load_whisper)
+registry.register("summarizer", _load_summarizer)
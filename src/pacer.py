@@ -0,0 +1,505 @@
+"""
+Predictive pacing of outbound calls.
+
+The Pacer follows every call from dial to hangup through Twilio's status
+callbacks and keeps running (EWMA) estimates of the answer rate, how long
+answered calls ring and how long agents spend on them. An answered call first
+goes through the IVR script for `ivr_time` seconds and only then needs an agent.
+From those and the number of agents it computes how many calls per second to
+place so that an agent is free whenever a lead is transferred:
+
+    freeing = busy_agents * (ring_time + ivr_time) / handle_time
+    answers = sum over ringing calls of P(answer | still ringing)
+    free = min(aggressiveness, 1) * idle_agents
+           + aggressiveness * (freeing - margin * sqrt(freeing))
+           - calls_in_ivr
+           - (answers + margin * sd(answers))
+    rate = free / (ring_time * answer_rate)
+
+that is, it keeps enough calls ringing to cover the agents expected to be free
+by the time a call placed now would reach one. A call that has rung longer than
+answered calls usually do is counted as less likely to answer. Hangups and
+answers are counted `margin` standard deviations on the safe side of their
+expected numbers: a large pool is dialed close to its averages, while a pool of
+one or two agents is not bet on an average that one unlucky call overshoots. A
+call transferred while every agent is busy counts as abandoned. Whenever the
+abandon rate is above its target the pacer lowers `aggressiveness`, at most once
+per ring and IVR time since the calls already placed keep arriving, betting less
+on busy agents hanging up and then on every ringing call being needed; it creeps
+back up while the abandon rate stays below target, so the abandon rate settles
+near the target rather than far below it.
+
+DialerSimulator replays the same loop against synthetic answer and handle-time
+distributions, so the pacer can be tuned offline (see benchmarks/bench_pacer.py).
+"""
+import math
+import heapq
+import random
+import threading
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Twilio CallStatus values
+RINGING_STATUSES = frozenset(('queued', 'initiated', 'ringing'))
+ANSWERED = 'in-progress'
+COMPLETED = 'completed'
+UNANSWERED_STATUSES = frozenset(('busy', 'no-answer', 'failed', 'canceled'))
+
+
+class Ewma:
+    """Exponentially weighted moving average."""
+
+    __slots__ = ('alpha', 'value', 'samples')
+
+    def __init__(self, alpha: float, initial: float):
+        self.alpha = alpha
+        self.value = float(initial)
+        self.samples = 0
+
+    def update(self, sample: float) -> float:
+        self.value += self.alpha * (sample - self.value)
+        self.samples += 1
+        return self.value
+
+
+class Pacer:
+    """
+    Adaptive outbound call rate from live answer rates, handle times and agent availability.
+
+    Feed it with on_dialed() when a call is created and on_status() for every
+    status callback (or ingest() them from the StateStore), and read the
+    current rate with rate(). All methods take an optional `now` so the
+    simulator can drive the pacer on virtual time.
+    """
+
+    def __init__(
+        self,
+        agents: int = 1,
+        target_abandon_rate: float = 0.03,
+        min_rate: float = 0.001,
+        max_rate: float = 5.0,
+        initial_answer_rate: float = 0.3,
+        initial_ring_time: float = 20.0,
+        initial_unanswered_ring_time: float = 30.0,
+        initial_handle_time: float = 120.0,
+        alpha: float = 0.05,
+        ring_timeout: float = 120.0,
+        max_handle_time: float = 4 * 3600.0,
+        margin: float = 1.0,
+        ivr_time: float = 0.0
+    ):
+        """
+        Args:
+            agents: Agents (or agent lines) that answered calls are transferred to
+            target_abandon_rate: Highest acceptable share of answered calls that find no free agent
+            min_rate: Calls per second while every agent is busy (the dialer's rate limiter cannot stop)
+            max_rate: Highest calls per second (the trunk's CPS limit)
+            initial_answer_rate: Answer rate assumed before any call has finished
+            initial_ring_time: Seconds an answered call is assumed to ring before any has answered
+            initial_unanswered_ring_time: Seconds an unanswered call is assumed to ring before any has given up
+            initial_handle_time: Seconds an agent is assumed to spend on a call before any has ended
+            alpha: EWMA weight of each new sample
+            ring_timeout: Seconds after which a dial with no further callbacks counts as unanswered
+            max_handle_time: Seconds after which an answered call with no hangup callback is dropped
+            margin: Standard deviations by which expected hangups are discounted and expected
+                answers padded, which matters most for small agent pools (0 dials on averages)
+            ivr_time: Seconds from answer until a caller who completes the IVR script is transferred
+        """
+        if agents < 1:
+            raise ValueError(f"agents must be >= 1, got {agents}")
+        if not 0 < min_rate <= max_rate:
+            raise ValueError(f"Need 0 < min_rate <= max_rate, got {min_rate} and {max_rate}")
+        self.agents = int(agents)
+        self.target_abandon_rate = target_abandon_rate
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.ring_timeout = ring_timeout
+        self.max_handle_time = max_handle_time
+        self.margin = float(margin)
+        self.ivr_time = float(ivr_time)
+        self.answer_rate = Ewma(alpha, initial_answer_rate)
+        self.ring_time = Ewma(alpha, initial_ring_time)
+        self.unanswered_ring_time = Ewma(alpha, initial_unanswered_ring_time)
+        self.handle_time = Ewma(alpha, initial_handle_time)
+        self.abandon_rate = Ewma(alpha, 0.0)
+        # Weight of busy agents expected to free up, lowered whenever calls are abandoned
+        self.aggressiveness = 1.0
+        # No further decrease of aggressiveness before this time
+        self._hold_until = 0.0
+        self.dialed = 0
+        self.answered = 0
+        self.abandoned = 0
+        # call_sid -> time dialed, for calls not answered yet
+        self._ringing: Dict[str, float] = {}
+        # call_sid -> time answered, for answered calls still in the IVR
+        self._in_ivr: Dict[str, float] = {}
+        # call_sid -> (time transferred, abandoned), for transferred calls not hung up yet
+        self._live: Dict[str, tuple] = {}
+        self._last_event_id: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, settings: Dict[str, Any], max_rate: float) -> 'Pacer':
+        """Build a pacer from the `pacing` section of config.yaml."""
+        return cls(
+            agents=settings.get('agents', 1),
+            target_abandon_rate=settings.get('target_abandon_rate', 0.03),
+            min_rate=settings.get('min_calls_per_second', 0.001),
+            max_rate=settings.get('max_calls_per_second', max_rate),
+            initial_answer_rate=settings.get('initial_answer_rate', 0.3),
+            initial_handle_time=settings.get('initial_handle_time', 120.0),
+            margin=settings.get('margin', 1.0),
+            ivr_time=settings.get('ivr_time', 0.0)
+        )
+
+    def _busy_agents(self) -> int:
+        # Abandoned calls never reached an agent
+        return sum(1 for _, abandoned in self._live.values() if not abandoned)
+
+    def _known(self, call_sid: str) -> bool:
+        return call_sid in self._ringing or call_sid in self._in_ivr or call_sid in self._live
+
+    def on_dialed(self, call_sid: str, now: Optional[float] = None) -> None:
+        """Register a call that was just created."""
+        with self._lock:
+            if not self._known(call_sid):
+                self._ringing[call_sid] = time.time() if now is None else now
+                self.dialed += 1
+
+    def on_status(self, call_sid: str, status: str, duration: Optional[float] = None,
+                  now: Optional[float] = None) -> None:
+        """
+        Apply a Twilio status callback.
+
+        Args:
+            call_sid: The call's SID
+            status: Twilio CallStatus
+            duration: CallDuration of completed calls, in seconds
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            # Transfers due by now happened before this callback
+            self._transfer_due(now)
+            if status in RINGING_STATUSES:
+                # Calls placed by another process are only seen through their callbacks
+                if not self._known(call_sid):
+                    self._ringing[call_sid] = now
+                    self.dialed += 1
+            elif status == ANSWERED:
+                if call_sid in self._in_ivr or call_sid in self._live:
+                    return
+                self._answered(call_sid, now)
+            elif status == COMPLETED:
+                if call_sid in self._ringing:
+                    # Completed without an answered callback ('answered' not subscribed)
+                    if not duration:
+                        self._unanswered(call_sid, now)
+                        return
+                    self._answered(call_sid, now - duration)
+                    self._transfer_due(now)
+                if call_sid in self._in_ivr:
+                    # Hung up before reaching an agent
+                    del self._in_ivr[call_sid]
+                elif call_sid in self._live:
+                    transferred_at, abandoned = self._live.pop(call_sid)
+                    if not abandoned:
+                        # CallDuration counts from the answer, the IVR included
+                        agent_time = duration - self.ivr_time if duration else now - transferred_at
+                        self.handle_time.update(max(agent_time, 0.0))
+            elif status in UNANSWERED_STATUSES:
+                if call_sid in self._ringing:
+                    self._unanswered(call_sid, now)
+
+    def _answered(self, call_sid: str, now: float) -> None:
+        dialed_at = self._ringing.pop(call_sid, None)
+        if dialed_at is not None:
+            self.ring_time.update(max(now - dialed_at, 0.0))
+        self.answer_rate.update(1.0)
+        self.answered += 1
+        self._in_ivr[call_sid] = now
+        self._transfer_due(now)
+
+    def _transfer_due(self, now: float) -> None:
+        # Transfers are not reported by Twilio, so they are assumed to happen ivr_time after the answer
+        for call_sid, answered_at in list(self._in_ivr.items()):
+            transferred_at = answered_at + self.ivr_time
+            if transferred_at <= now:
+                del self._in_ivr[call_sid]
+                self._transferred(call_sid, transferred_at)
+
+    def _transferred(self, call_sid: str, now: float) -> None:
+        abandoned = self._busy_agents() >= self.agents
+        self._live[call_sid] = (now, abandoned)
+        self.abandoned += abandoned
+        self.abandon_rate.update(1.0 if abandoned else 0.0)
+        # Multiplicative decrease above the abandon target, additive increase below it. Calls dialed
+        # before a decrease keep arriving for a ring and IVR time, so one burst only decreases once
+        if abandoned and self.abandon_rate.value > self.target_abandon_rate:
+            if now >= self._hold_until:
+                self.aggressiveness = max(0.1, self.aggressiveness * 0.8)
+                self._hold_until = now + self.ring_time.value + self.ivr_time
+        elif not abandoned and self.abandon_rate.value <= self.target_abandon_rate:
+            self.aggressiveness = min(1.5, self.aggressiveness + 0.01)
+
+    def _unanswered(self, call_sid: str, now: float) -> None:
+        dialed_at = self._ringing.pop(call_sid)
+        self.unanswered_ring_time.update(max(now - dialed_at, 0.0))
+        self.answer_rate.update(0.0)
+
+    def _prune(self, now: float) -> None:
+        # Calls whose final callback never arrived must not hold capacity forever
+        for call_sid, dialed_at in list(self._ringing.items()):
+            if now - dialed_at > self.ring_timeout:
+                del self._ringing[call_sid]
+                self.answer_rate.update(0.0)
+        for call_sid, (transferred_at, _) in list(self._live.items()):
+            if now - transferred_at > self.max_handle_time:
+                del self._live[call_sid]
+
+    def _answer_chance(self, ringing_for: float, answer_rate: float, ring_time: float) -> float:
+        # Answered calls pick up sooner than unanswered ones give up, so the longer a call has
+        # rung the less likely it is to answer (ring times taken as exponential)
+        unanswered_ring_time = max(self.unanswered_ring_time.value, 1.0)
+        answering = answer_rate * math.exp(-ringing_for / ring_time)
+        giving_up = (1.0 - answer_rate) * math.exp(-ringing_for / unanswered_ring_time)
+        return answering / (answering + giving_up) if answering + giving_up > 0 else 0.0
+
+    def rate(self, now: Optional[float] = None) -> float:
+        """Calls per second to place right now."""
+        with self._lock:
+            now = time.time() if now is None else now
+            self._transfer_due(now)
+            self._prune(now)
+            answer_rate = max(self.answer_rate.value, 0.01)
+            ring_time = max(self.ring_time.value, 1.0)
+            busy = self._busy_agents()
+            # Idle agents plus the busy ones expected to hang up by the time a call dialed now
+            # reaches an agent, less a margin as hangups are random...
+            freeing = busy * min(1.0, (ring_time + self.ivr_time) / max(self.handle_time.value, 1.0))
+            freeing = max(freeing - self.margin * math.sqrt(freeing), 0.0)
+            free = min(self.aggressiveness, 1.0) * (self.agents - busy) + self.aggressiveness * freeing
+            # ...less the answered calls still in the IVR, which reach an agent first...
+            free -= len(self._in_ivr)
+            # ...and the answers still to come from calls already ringing, plus a margin
+            chances = [self._answer_chance(now - dialed_at, answer_rate, ring_time)
+                       for dialed_at in self._ringing.values()]
+            answers = sum(chances)
+            free -= answers + self.margin * math.sqrt(sum(p * (1.0 - p) for p in chances))
+            rate = max(free, 0.0) / (ring_time * answer_rate)
+            return min(max(rate, self.min_rate), self.max_rate)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'agents': self.agents,
+                'busy_agents': self._busy_agents(),
+                'ringing': len(self._ringing),
+                'in_ivr': len(self._in_ivr),
+                'dialed': self.dialed,
+                'answered': self.answered,
+                'abandoned': self.abandoned,
+                'answer_rate': round(self.answer_rate.value, 3),
+                'ring_time': round(self.ring_time.value, 1),
+                'unanswered_ring_time': round(self.unanswered_ring_time.value, 1),
+                'handle_time': round(self.handle_time.value, 1),
+                'abandon_rate': round(self.abandon_rate.value, 3),
+                'aggressiveness': round(self.aggressiveness, 2)
+            }
+
+    # Following a StateStore
+
+    def ingest(self, store: Any) -> int:
+        """
+        Apply status callbacks recorded in a StateStore since the last call.
+
+        Events recorded before the first call belong to earlier runs and are skipped.
+
+        Returns:
+            int: Number of events applied
+        """
+        if self._last_event_id is None:
+            self._last_event_id = store.last_call_event_id()
+            return 0
+        events = store.call_events_since(self._last_event_id)
+        for event in events:
+            self.on_status(event['call_sid'], event['status'], event['duration'], event['created_at'])
+        if events:
+            self._last_event_id = events[-1]['id']
+        return len(events)
+
+    def follow(self, store: Any, bucket: Any, stop_event: threading.Event, interval: float = 1.0) -> None:
+        """
+        Keep a TokenBucket's rate at the pacer's rate until stop_event is set.
+
+        Args:
+            store: StateStore that the voice server records status callbacks in
+            bucket: The dialer's rate limiter (anything with set_rate())
+            interval: Seconds between adjustments
+        """
+        ticks = 0
+        while not stop_event.is_set():
+            try:
+                self.ingest(store)
+            except Exception as e:
+                logger.error(f"Failed to read call events: {str(e)}")
+            rate = self.rate()
+            bucket.set_rate(rate)
+            ticks += 1
+            if ticks % 60 == 0:
+                logger.info(f"📈 Pacing at {rate:.2f} calls/s: {self.stats()}")
+            stop_event.wait(interval)
+
+    @contextmanager
+    def driving(self, bucket: Any, store: Any, interval: float = 1.0) -> Iterator['Pacer']:
+        """Run follow() on a background thread for the duration of a with block."""
+        self.ingest(store)
+        bucket.set_rate(self.rate())
+        stop_event = threading.Event()
+        thread = threading.Thread(target=self.follow, args=(store, bucket, stop_event, interval),
+                                  name="pacer", daemon=True)
+        thread.start()
+        try:
+            yield self
+        finally:
+            stop_event.set()
+            thread.join()
+
+
+def _lognormal(rng: random.Random, mean: float, sigma: float) -> float:
+    """Lognormal sample with the given mean."""
+    return rng.lognormvariate(math.log(mean) - sigma * sigma / 2, sigma)
+
+
+class DialerSimulator:
+    """
+    Discrete-event simulation of outbound dialing into a pool of agents.
+
+    Each dialed call answers with probability `answer_rate` after a lognormal
+    ring time; an answered call goes through the IVR for `ivr_time` seconds,
+    then takes a free agent for a lognormal handle time, or is abandoned if
+    none is free. The dialer places calls from a token
+    bucket at either a fixed rate or the rate of a Pacer, which receives the
+    same callbacks Twilio would send.
+    """
+
+    def __init__(
+        self,
+        agents: int = 1,
+        answer_rate: float = 0.3,
+        ring_time: float = 15.0,
+        unanswered_ring_time: float = 30.0,
+        handle_time: float = 120.0,
+        handle_time_sigma: float = 0.6,
+        ivr_time: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        """
+        Args:
+            agents: Agents taking answered calls
+            answer_rate: Probability that a dialed call is answered
+            ring_time: Mean seconds until an answered call picks up
+            unanswered_ring_time: Mean seconds until an unanswered call gives up
+            handle_time: Mean seconds an agent spends on an answered call
+            handle_time_sigma: Spread of the lognormal handle-time distribution
+            ivr_time: Seconds from answer to transfer to an agent
+            seed: Random seed, for repeatable runs
+        """
+        self.agents = agents
+        self.answer_rate = answer_rate
+        self.ring_time = ring_time
+        self.unanswered_ring_time = unanswered_ring_time
+        self.handle_time = handle_time
+        self.handle_time_sigma = handle_time_sigma
+        self.ivr_time = ivr_time
+        self.seed = seed
+
+    def run(self, duration: float, pacer: Optional[Pacer] = None, fixed_rate: Optional[float] = None,
+            tick: float = 1.0) -> Dict[str, float]:
+        """
+        Simulate `duration` seconds of dialing.
+
+        Args:
+            pacer: Pacer setting the rate; if None, dial at fixed_rate
+            fixed_rate: Calls per second when no pacer is given
+            tick: Seconds between rate updates
+
+        Returns:
+            Dict[str, float]: Calls dialed, answered and abandoned, the abandon
+            rate, agent utilization and connected calls per agent hour
+        """
+        if pacer is None and not fixed_rate:
+            raise ValueError("Give either a pacer or a fixed_rate")
+        rng = random.Random(self.seed)
+        events: list = []
+        seq = 0
+        tokens = 0.0
+        busy = 0
+        busy_seconds = 0.0
+        last_time = 0.0
+        dialed = answered = abandoned = 0
+
+        def advance(to: float) -> None:
+            nonlocal busy_seconds, last_time
+            busy_seconds += busy * (to - last_time)
+            last_time = to
+
+        now = 0.0
+        while now < duration:
+            while events and events[0][0] <= now:
+                at, _, kind, call_sid, handle = heapq.heappop(events)
+                advance(at)
+                if kind == 'answer':
+                    answered += 1
+                    if pacer is not None:
+                        pacer.on_status(call_sid, ANSWERED, now=at)
+                    seq += 1
+                    heapq.heappush(events, (at + self.ivr_time, seq, 'transfer', call_sid, handle))
+                elif kind == 'transfer':
+                    if busy < self.agents:
+                        busy += 1
+                        seq += 1
+                        heapq.heappush(events, (at + handle, seq, 'hangup', call_sid, handle))
+                    else:
+                        abandoned += 1
+                        if pacer is not None:
+                            pacer.on_status(call_sid, COMPLETED, duration=self.ivr_time, now=at)
+                elif kind == 'no-answer':
+                    if pacer is not None:
+                        pacer.on_status(call_sid, 'no-answer', now=at)
+                else:
+                    busy -= 1
+                    if pacer is not None:
+                        pacer.on_status(call_sid, COMPLETED, duration=self.ivr_time + handle, now=at)
+
+            rate = pacer.rate(now) if pacer is not None else fixed_rate
+            tokens = min(tokens + rate * tick, max(1.0, rate))
+            while tokens >= 1.0:
+                tokens -= 1.0
+                dialed += 1
+                call_sid = f"SIM{dialed:08d}"
+                if pacer is not None:
+                    pacer.on_dialed(call_sid, now=now)
+                seq += 1
+                if rng.random() < self.answer_rate:
+                    heapq.heappush(events, (now + _lognormal(rng, self.ring_time, 0.4), seq, 'answer', call_sid,
+                                            _lognormal(rng, self.handle_time, self.handle_time_sigma)))
+                else:
+                    heapq.heappush(events, (now + _lognormal(rng, self.unanswered_ring_time, 0.3), seq,
+                                            'no-answer', call_sid, 0.0))
+            now += tick
+        advance(duration)
+
+        connected = answered - abandoned
+        return {
+            'dialed': dialed,
+            'answered': answered,
+            'abandoned': abandoned,
+            'abandon_rate': abandoned / answered if answered else 0.0,
+            'utilization': busy_seconds / (self.agents * duration),
+            'connects_per_agent_hour': connected / self.agents / (duration / 3600.0),
+            'calls_per_second': dialed / duration
+        }
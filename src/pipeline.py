@@ -1,38 +1,24 @@
-import os
-from download_recording import download_recordings
+from download_recording import download_recordings, download_recording_url
 from transcribe import transcribe_audio
-from summarizer import summarize_text
+from summarizer import summarize_text, store_summary
 from datetime import datetime
-import csv
-
-SUMMARY_CSV = os.path.join(os.path.dirname(__file__), '..', 'logs', 'summaries.csv')
 
 def save_summary(phone_number, call_sid, transcript, summary, action_items):
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    fieldnames = ['phone_number', 'call_sid', 'transcript', 'summary', 'action_items', 'timestamp']
-    file_exists = os.path.isfile(SUMMARY_CSV)
-
-    with open(SUMMARY_CSV, 'a', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow({
-            'phone_number': phone_number,
-            'call_sid': call_sid,
-            'transcript': transcript,
-            'summary': summary,
-            'action_items': action_items,
-            'timestamp': timestamp
-        })
-
-def process_call_pipeline(call_sid, phone_number):
-    print(f"🚀 Processing call: {call_sid} / {phone_number}")
-
-    # Step 1: Download recording
-    mp3_file = download_recordings(call_sid)
-
+    row = {
+        'phone_number': phone_number,
+        'call_sid': call_sid,
+        'transcript': transcript,
+        'summary': summary,
+        'action_items': action_items,
+        'timestamp': timestamp
+    }
+    store_summary(row)
+
+def _process_recordings(call_sid, phone_number, mp3_files):
     # Step 2: Transcribe
-    transcript = transcribe_audio(mp3_file)
+    transcripts = transcribe_audio(mp3_files)
+    transcript = " ".join(transcripts)
 
     # Step 3: Summarize
     summary, action_items = summarize_text(transcript)
@@ -41,3 +27,23 @@ def process_call_pipeline(call_sid, phone_number):
     save_summary(phone_number, call_sid, transcript, summary, action_items)
 
     print(f"✅ Processed call {call_sid}")
+
+def process_call_pipeline(call_sid, phone_number, account_sid=None):
+    """Poll the recordings list for a call and process what it finds. Fallback for missed recording callbacks."""
+    print(f"🚀 Processing call: {call_sid} / {phone_number}")
+
+    # Step 1: Download recording
+    mp3_files = download_recordings(call_sid, account_sid=account_sid)
+    if not mp3_files:
+        raise RuntimeError(f"No recordings available for CallSid: {call_sid}")
+
+    _process_recordings(call_sid, phone_number, mp3_files)
+
+def process_recording(call_sid, phone_number, recording_sid, recording_url, account_sid=None):
+    """Process a recording announced by Twilio's recording status callback."""
+    print(f"🚀 Processing recording {recording_sid} of call: {call_sid} / {phone_number}")
+
+    # Step 1: Download the announced recording directly, no polling needed
+    mp3_file = download_recording_url(recording_sid, recording_url, account_sid=account_sid)
+
+    _process_recordings(call_sid, phone_number, [mp3_file])
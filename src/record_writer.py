@@ -0,0 +1,180 @@
+import os
+import csv
+import time
+import atexit
+import threading
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no inter-process lock, in-process lock still applies
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+LOGS_DIR = os.path.join(os.path.dirname(__file__), '..', 'logs')
+
+# The one schema per CSV log. Every writer of a log goes through these columns.
+SCHEMAS = {
+    'responses': ['phone_number', 'question', 'answer', 'timestamp', 'call_sid'],
+    'summaries': ['phone_number', 'call_sid', 'transcript', 'summary', 'action_items', 'timestamp'],
+}
+
+# fsync policies
+FSYNC_NEVER = 'never'    # leave flushing to the OS
+FSYNC_BATCH = 'batch'    # fsync once after every batch
+FSYNC_ALWAYS = 'always'  # write and fsync synchronously on every row
+FSYNC_POLICIES = (FSYNC_NEVER, FSYNC_BATCH, FSYNC_ALWAYS)
+
+
+class RecordWriter:
+    """
+    Buffered, lock-safe CSV appender.
+
+    Rows are queued in memory and appended in batches by a background thread,
+    one file open per batch instead of per row. Each batch is written under an
+    exclusive lock on `<path>.lock`, so rows from concurrent threads and
+    processes never interleave.
+    """
+
+    def __init__(self, path: str, fieldnames: List[str], flush_interval: float = 0.5,
+                 max_batch: int = 500, fsync: str = FSYNC_BATCH):
+        """
+        Args:
+            path: CSV file to append to
+            fieldnames: Column order; written as the header of a new file
+            flush_interval: Longest time in seconds a row stays buffered
+            max_batch: Buffered row count that triggers an immediate flush
+            fsync: One of FSYNC_POLICIES
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy '{fsync}', expected one of {FSYNC_POLICIES}")
+        self.path = path
+        self.fieldnames = fieldnames
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.fsync = fsync
+        self._buffer: List[Dict[str, Any]] = []
+        self._cond = threading.Condition()
+        # Held from taking rows off the buffer until they are on disk, so batches keep their order
+        self._write_lock = threading.RLock()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=f"record-writer-{os.path.basename(self.path)}",
+                                            daemon=True)
+            self._thread.start()
+
+    def write(self, row: Dict[str, Any]) -> None:
+        """Queue one row. Unknown keys are an error; missing keys are written empty."""
+        extra = set(row) - set(self.fieldnames)
+        if extra:
+            raise ValueError(f"Fields {sorted(extra)} are not in the schema of {self.path}")
+        if self.fsync == FSYNC_ALWAYS:
+            self._append([row])
+            return
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"RecordWriter for {self.path} is closed")
+            self._buffer.append(row)
+            self._ensure_thread()
+            if len(self._buffer) >= self.max_batch:
+                self._cond.notify()
+
+    def flush(self) -> None:
+        """Write every buffered row now, on the calling thread."""
+        with self._write_lock:
+            with self._cond:
+                rows, self._buffer = self._buffer, []
+            if rows:
+                self._append(rows)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._closed and len(self._buffer) < self.max_batch:
+                    self._cond.wait(self.flush_interval)
+                closed = self._closed
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Failed to write rows to {self.path}: {str(e)}")
+            if closed:
+                return
+
+    @contextmanager
+    def _locked(self):
+        with self._write_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(f"{self.path}.lock", 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _check_header(self) -> bool:
+        """Return True if a header must be written; moves aside files written with another schema."""
+        if not os.path.isfile(self.path) or os.path.getsize(self.path) == 0:
+            return True
+        with open(self.path, 'r', newline='') as f:
+            header = next(csv.reader(f), [])
+        if header == self.fieldnames:
+            return False
+        legacy = f"{os.path.splitext(self.path)[0]}.legacy-{time.strftime('%Y%m%d%H%M%S')}.csv"
+        os.replace(self.path, legacy)
+        logger.warning(f"{self.path} had columns {header}, expected {self.fieldnames}; moved it to {legacy}")
+        return True
+
+    def _append(self, rows: List[Dict[str, Any]]) -> None:
+        with self._locked():
+            write_header = self._check_header()
+            with open(self.path, 'a', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=self.fieldnames)
+                if write_header:
+                    writer.writeheader()
+                writer.writerows(rows)
+                if self.fsync != FSYNC_NEVER:
+                    f.flush()
+                    os.fsync(f.fileno())
+
+
+_writers: Dict[str, RecordWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(name: str) -> RecordWriter:
+    """Process-wide writer for one of the logs in SCHEMAS, stored as logs/<name>.csv."""
+    with _writers_lock:
+        if name not in _writers:
+            _writers[name] = RecordWriter(
+                os.path.join(LOGS_DIR, f"{name}.csv"),
+                SCHEMAS[name],
+                flush_interval=float(os.getenv("RECORD_FLUSH_INTERVAL", "0.5")),
+                fsync=os.getenv("RECORD_FSYNC", FSYNC_BATCH)
+            )
+        return _writers[name]
+
+
+@atexit.register
+def _flush_all() -> None:
+    for writer in list(_writers.values()):
+        try:
+            writer.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush {writer.path} at exit: {str(e)}")
@@ -0,0 +1,279 @@
+import os
+import csv
+import sqlite3
+import threading
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LOGS_DIR = os.path.join(os.path.dirname(__file__), '..', 'logs')
+RESPONSES_DB = os.path.join(LOGS_DIR, 'responses.db')
+RESPONSES_CSV = os.path.join(LOGS_DIR, 'responses.csv')
+SUMMARIES_CSV = os.path.join(LOGS_DIR, 'summaries.csv')
+
+RESPONSE_FIELDS = ['phone_number', 'question', 'answer', 'timestamp', 'call_sid']
+SUMMARY_FIELDS = ['phone_number', 'call_sid', 'transcript', 'summary', 'action_items', 'timestamp']
+
+# Queryable tables and their columns
+TABLES = {
+    'responses': RESPONSE_FIELDS,
+    'summaries': SUMMARY_FIELDS,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    phone_number TEXT NOT NULL,
+    question TEXT NOT NULL,
+    answer TEXT,
+    timestamp TEXT NOT NULL,
+    call_sid TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_responses_phone ON responses(phone_number);
+CREATE INDEX IF NOT EXISTS idx_responses_call_sid ON responses(call_sid);
+CREATE INDEX IF NOT EXISTS idx_responses_timestamp ON responses(timestamp);
+CREATE TABLE IF NOT EXISTS summaries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    phone_number TEXT NOT NULL,
+    call_sid TEXT NOT NULL DEFAULT '',
+    transcript TEXT,
+    summary TEXT,
+    action_items TEXT,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_summaries_phone ON summaries(phone_number);
+CREATE INDEX IF NOT EXISTS idx_summaries_call_sid ON summaries(call_sid);
+CREATE INDEX IF NOT EXISTS idx_summaries_timestamp ON summaries(timestamp);
+CREATE TABLE IF NOT EXISTS migrations (
+    name TEXT PRIMARY KEY,
+    applied_at TEXT NOT NULL
+);
+"""
+
+
+class ResponseStore:
+    """
+    SQLite store of IVR answers and call summaries, indexed by phone number,
+    CallSid and timestamp.
+
+    Replaces scanning the whole of responses.csv for every lookup.
+    """
+
+    def __init__(self, path: str = RESPONSES_DB, legacy_csv: Optional[str] = RESPONSES_CSV,
+                 legacy_summaries_csv: Optional[str] = SUMMARIES_CSV):
+        """
+        Args:
+            path: SQLite database file
+            legacy_csv: responses.csv to import once on first open, if it exists
+            legacy_summaries_csv: summaries.csv to import once on first open, if it exists
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(_SCHEMA)
+        if legacy_csv and os.path.isfile(legacy_csv):
+            self.import_csv(legacy_csv)
+        if legacy_summaries_csv and os.path.isfile(legacy_summaries_csv):
+            self.import_csv(legacy_summaries_csv, table='summaries')
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def add_response(self, phone_number: str, question: str, answer: str,
+                     call_sid: Optional[str] = None, timestamp: Optional[str] = None) -> None:
+        timestamp = timestamp or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO responses (phone_number, question, answer, timestamp, call_sid) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (phone_number, question, answer, timestamp, call_sid or "")
+            )
+
+    def add_summary(self, phone_number: str, call_sid: Optional[str], transcript: str, summary: str,
+                    action_items: str, timestamp: Optional[str] = None) -> None:
+        timestamp = timestamp or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO summaries (phone_number, call_sid, transcript, summary, action_items, timestamp) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (phone_number, call_sid or "", transcript, summary, action_items, timestamp)
+            )
+
+    def _select(self, where: str, value: str) -> List[Dict[str, str]]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(RESPONSE_FIELDS)} FROM responses WHERE {where} = ? ORDER BY id",
+                (value,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def by_phone(self, phone_number: str) -> List[Dict[str, str]]:
+        """All responses ever given from a number, oldest first."""
+        return self._select('phone_number', phone_number)
+
+    def by_call_sid(self, call_sid: str) -> List[Dict[str, str]]:
+        """Responses given during one call, oldest first."""
+        return self._select('call_sid', call_sid)
+
+    def import_csv(self, csv_path: str, force: bool = False, table: str = 'responses') -> int:
+        """
+        Import rows from a legacy responses.csv or summaries.csv.
+
+        The import is recorded, so it only runs once per file unless force is set.
+        Columns missing from older CSV layouts are imported empty.
+
+        Returns:
+            int: Number of rows imported
+        """
+        fields = TABLES[table]
+        name = f"import:{os.path.abspath(csv_path)}"
+        with self._lock:
+            done = self._conn.execute("SELECT 1 FROM migrations WHERE name = ?", (name,)).fetchone()
+            if done and not force:
+                return 0
+
+            with open(csv_path, 'r', newline='') as f:
+                reader = csv.DictReader(f)
+                rows = [tuple(row.get(field) or '' for field in fields) for row in reader]
+
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    f"INSERT INTO {table} ({', '.join(fields)}) VALUES ({', '.join('?' for _ in fields)})",
+                    rows
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO migrations (name, applied_at) VALUES (?, ?)",
+                    (name, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        logger.info(f"Imported {len(rows)} {table} from {csv_path}")
+        return len(rows)
+
+    def export_csv(self, csv_path: str, table: str = 'responses', batch_size: int = 10000) -> int:
+        """
+        Write a table to a CSV file in the layout of the legacy CSV logs, oldest row first.
+
+        Returns:
+            int: Number of rows written
+        """
+        fields = TABLES[table]
+        count = 0
+        tmp_path = f"{csv_path}.tmp"
+        with open(tmp_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(fields)
+            last_id = 0
+            while True:
+                with self._lock:
+                    rows = self._conn.execute(
+                        f"SELECT id, {', '.join(fields)} FROM {table} WHERE id > ? ORDER BY id LIMIT ?",
+                        (last_id, batch_size)
+                    ).fetchall()
+                if not rows:
+                    break
+                writer.writerows(tuple(row)[1:] for row in rows)
+                last_id = rows[-1]['id']
+                count += len(rows)
+        os.replace(tmp_path, csv_path)
+        logger.info(f"Exported {count} {table} to {csv_path}")
+        return count
+
+    def version(self, table: str) -> int:
+        """Highest row id of an append-only table; changes whenever a row is added."""
+        if table not in TABLES:
+            raise ValueError(f"Unknown table '{table}'")
+        with self._lock:
+            row = self._conn.execute(f"SELECT MAX(id) FROM {table}").fetchone()
+        return row[0] or 0
+
+    def query(self, table: str, phone_number: Optional[str] = None, call_sid: Optional[str] = None,
+              date_from: Optional[str] = None, date_to: Optional[str] = None, sort: str = 'timestamp',
+              descending: bool = True, limit: int = 50, offset: int = 0) -> Tuple[List[Dict[str, str]], int]:
+        """
+        Filtered, sorted page of a table.
+
+        Args:
+            date_from: Inclusive start date (YYYY-MM-DD)
+            date_to: Inclusive end date (YYYY-MM-DD)
+            sort: Column to sort by, one of the table's columns
+
+        Returns:
+            tuple: (rows of the page, total number of matching rows)
+        """
+        fields = TABLES.get(table)
+        if fields is None:
+            raise ValueError(f"Unknown table '{table}'")
+        if sort not in fields:
+            raise ValueError(f"Cannot sort {table} by '{sort}'")
+
+        clauses, params = [], []
+        if phone_number:
+            clauses.append("phone_number = ?")
+            params.append(phone_number)
+        if call_sid:
+            clauses.append("call_sid = ?")
+            params.append(call_sid)
+        if date_from:
+            clauses.append("timestamp >= ?")
+            params.append(date_from)
+        if date_to:
+            clauses.append("timestamp <= ?")
+            params.append(f"{date_to} 23:59:59")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        direction = "DESC" if descending else "ASC"
+
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM {table} {where}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT {', '.join(fields)} FROM {table} {where} "
+                f"ORDER BY {sort} {direction}, id {direction} LIMIT ? OFFSET ?",
+                (*params, limit, offset)
+            ).fetchall()
+        return [dict(row) for row in rows], total
+
+
+_store: Optional[ResponseStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> ResponseStore:
+    """Process-wide ResponseStore, opened (and migrated) on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ResponseStore()
+        return _store
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import responses.csv or summaries.csv history into the response "
+                                                 "store, or export the store to such a CSV")
+    parser.add_argument("csv_path", nargs="?", default=RESPONSES_CSV)
+    parser.add_argument("--table", choices=sorted(TABLES), default="responses")
+    parser.add_argument("--db", default=RESPONSES_DB)
+    parser.add_argument("--force", action="store_true", help="Import again even if already imported")
+    parser.add_argument("--export", action="store_true", help="Write the table to csv_path instead of importing it")
+    args = parser.parse_args()
+
+    store = ResponseStore(args.db, legacy_csv=None, legacy_summaries_csv=None)
+    if args.export:
+        count = store.export_csv(args.csv_path, table=args.table)
+        print(f"✅ Exported {count} {args.table} to {args.csv_path}")
+    else:
+        count = store.import_csv(args.csv_path, force=args.force, table=args.table)
+        print(f"✅ Imported {count} {args.table} into {args.db}")
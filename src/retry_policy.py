@@ -0,0 +1,304 @@
+"""
+Retry and redial rules for outbound calls.
+
+Every failed attempt is classified into an outcome class, and each class has
+its own rule: how many attempts a lead gets in total and how long to wait
+before the next one, growing exponentially with jitter so that leads throttled
+together do not all come back together.
+
+    api_error      Twilio API or network failure creating the call
+    rate_limited   Twilio answered 429 Too Many Requests
+    busy           the callee's line was busy
+    no_answer      nobody picked up
+    voicemail      answering machine detected (needs twilio.machine_detection)
+
+API failures are retried within the running batch: the lead goes back into a
+RedialQueue and the worker thread moves on. Busy, no-answer and voicemail
+outcomes only arrive later through status callbacks; RedialMonitor reads them
+from the StateStore and schedules the redial in the LeadScheduler.
+"""
+import json
+import heapq
+import random
+import threading
+import logging
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Outcome classes
+API_ERROR = 'api_error'
+RATE_LIMITED = 'rate_limited'
+BUSY = 'busy'
+NO_ANSWER = 'no_answer'
+VOICEMAIL = 'voicemail'
+INVALID = 'invalid'  # never retried
+
+# Twilio error codes that will never succeed on retry
+NON_RETRYABLE_CODES = {
+    21211: "Invalid phone number format",
+    21214: "Phone number not verified",
+}
+RATE_LIMIT_CODE = 20429
+# AnsweredBy values of Twilio answering machine detection that mean no human answered
+MACHINE_ANSWERS = frozenset(('machine_start', 'machine_end_beep', 'machine_end_silence', 'machine_end_other', 'fax'))
+
+# Key under which a lead carries the number of API attempts made in the current batch
+ATTEMPT_KEY = '_api_attempts'
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float, multiplier: float = 2.0,
+                  jitter: float = 0.0, rng: Any = random) -> float:
+    """
+    Exponential backoff for the given (1-based) retry with optional jitter.
+
+    Args:
+        attempt: Which retry this is, 1 for the first
+        jitter: Fraction of the delay that is randomized: 0 for none, 1 for
+            "full jitter" (anywhere between 0 and the delay)
+    """
+    delay = min(base_delay * multiplier ** (attempt - 1), max_delay)
+    if jitter:
+        delay *= 1.0 - jitter * rng.random()
+    return delay
+
+
+class RetryRule:
+    """Attempt limit and backoff of one outcome class."""
+
+    __slots__ = ('max_attempts', 'base_delay', 'max_delay', 'multiplier', 'jitter')
+
+    def __init__(self, max_attempts: int, base_delay: float, max_delay: float,
+                 multiplier: float = 2.0, jitter: float = 0.5):
+        """
+        Args:
+            max_attempts: Attempts in total, the first one included (1 disables retries)
+            base_delay: Seconds before the first retry
+            max_delay: Upper bound on the delay in seconds
+            multiplier: Growth of the delay with every retry
+            jitter: Randomized fraction of each delay (see backoff_delay)
+        """
+        self.max_attempts = int(max_attempts)
+        self.base_delay = float(base_delay)
+        self.max_delay = float(max_delay)
+        self.multiplier = float(multiplier)
+        self.jitter = float(jitter)
+
+    def delay(self, attempts: int, rng: Any = random) -> Optional[float]:
+        """Seconds until the next attempt after `attempts` failed ones, None if there is none."""
+        if attempts >= self.max_attempts:
+            return None
+        return backoff_delay(attempts, self.base_delay, self.max_delay, self.multiplier, self.jitter, rng)
+
+
+DEFAULT_RULES = {
+    API_ERROR: RetryRule(max_attempts=3, base_delay=2, max_delay=60, jitter=0.5),
+    # Full jitter spreads throttled leads over the whole backoff interval
+    RATE_LIMITED: RetryRule(max_attempts=6, base_delay=1, max_delay=30, jitter=1.0),
+    BUSY: RetryRule(max_attempts=3, base_delay=600, max_delay=3600, jitter=0.2),
+    NO_ANSWER: RetryRule(max_attempts=3, base_delay=3600, max_delay=4 * 3600, jitter=0.2),
+    VOICEMAIL: RetryRule(max_attempts=2, base_delay=4 * 3600, max_delay=24 * 3600, jitter=0.2),
+}
+
+
+class RetryPolicy:
+    """Retry rules per outcome class."""
+
+    def __init__(self, rules: Optional[Dict[str, RetryRule]] = None, rng: Any = random):
+        self.rules = dict(DEFAULT_RULES)
+        self.rules.update(rules or {})
+        self.rng = rng
+
+    @classmethod
+    def from_config(cls, settings: Optional[Dict[str, Any]]) -> 'RetryPolicy':
+        """
+        Build a policy from the `retries` section of config.yaml, which
+        overrides the defaults per class, e.g. `busy: {max_attempts: 5, base_delay: 300}`.
+        """
+        rules = {}
+        for outcome, overrides in (settings or {}).items():
+            if outcome not in DEFAULT_RULES:
+                raise ValueError(f"Unknown retry outcome '{outcome}', expected one of {sorted(DEFAULT_RULES)}")
+            default = DEFAULT_RULES[outcome]
+            params = {slot: getattr(default, slot) for slot in RetryRule.__slots__}
+            params.update(overrides or {})
+            rules[outcome] = RetryRule(**params)
+        return cls(rules)
+
+    def delay(self, outcome: Optional[str], attempts: int) -> Optional[float]:
+        """Seconds until the next attempt after `attempts` tries ended in `outcome`, None to give up."""
+        rule = self.rules.get(outcome) if outcome else None
+        if rule is None:
+            return None
+        return rule.delay(attempts, self.rng)
+
+    @property
+    def redials(self) -> bool:
+        """Whether any call outcome (as opposed to API failure) is redialed."""
+        return any(self.rules[o].max_attempts > 1 for o in (BUSY, NO_ANSWER, VOICEMAIL))
+
+
+def classify_api_error(status: Optional[int], code: Optional[int]) -> str:
+    """Outcome class of a failed call creation from its HTTP status and Twilio error code."""
+    if code in NON_RETRYABLE_CODES:
+        return INVALID
+    if status == 429 or code == RATE_LIMIT_CODE:
+        return RATE_LIMITED
+    if status is not None and 400 <= status < 500:
+        return INVALID
+    return API_ERROR
+
+
+def classify_call_status(status: Optional[str], answered_by: Optional[str] = None) -> Optional[str]:
+    """Outcome class of a final call status callback, None for calls that need no redial."""
+    if status == 'busy':
+        return BUSY
+    if status == 'no-answer':
+        return NO_ANSWER
+    if status == 'completed' and answered_by in MACHINE_ANSWERS:
+        return VOICEMAIL
+    return None
+
+
+class CallAttemptError(Exception):
+    """A single call creation failed; `outcome` says whether and how it may be retried."""
+
+    def __init__(self, outcome: str, message: str):
+        super().__init__(message)
+        self.outcome = outcome
+
+
+class RedialQueue:
+    """
+    Leads waiting for another attempt within a dialing batch.
+
+    merge() interleaves due redials with a stream of fresh leads, so a failed
+    lead is re-fed to the dialer's worker pool after its backoff instead of a
+    worker sleeping on it. The batch only ends once every lead it handed out
+    has finished for good.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._heap: list = []
+        self._seq = 0
+        # Leads handed out by merge() without a final result yet
+        self._outstanding = 0
+        self._cond = threading.Condition()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, lead: Dict[str, Any], delay: float) -> None:
+        """Queue a lead handed out by merge() for another attempt in `delay` seconds."""
+        with self._cond:
+            self._seq += 1
+            heapq.heappush(self._heap, (self.clock() + delay, self._seq, lead))
+            self._outstanding -= 1
+            self._cond.notify_all()
+
+    def finished(self, lead: Dict[str, Any]) -> None:
+        """A lead handed out by merge() got its final result."""
+        with self._cond:
+            self._outstanding -= 1
+            self._cond.notify_all()
+
+    def _pop_due(self) -> Optional[Dict[str, Any]]:
+        if self._heap and self._heap[0][0] <= self.clock():
+            self._outstanding += 1
+            return heapq.heappop(self._heap)[2]
+        return None
+
+    def merge(self, leads: Iterable[Dict[str, Any]],
+              stop_event: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+        """Yield the given leads with due redials in between, then the remaining redials as they come due."""
+        for lead in leads:
+            while True:
+                with self._cond:
+                    redial = self._pop_due()
+                if redial is None:
+                    break
+                yield redial
+            with self._cond:
+                self._outstanding += 1
+            yield lead
+
+        while stop_event is None or not stop_event.is_set():
+            with self._cond:
+                redial = self._pop_due()
+                if redial is None:
+                    if not self._heap and self._outstanding <= 0:
+                        return
+                    wait = self._heap[0][0] - self.clock() if self._heap else None
+                    self._cond.wait(min(wait, 1.0) if wait is not None else 1.0)
+                    continue
+            yield redial
+
+
+class RedialMonitor:
+    """
+    Schedules redials of busy, unanswered and voicemail calls from their status callbacks.
+
+    Reads the call events the voice server records in the StateStore, and for
+    each retryable outcome of a lead that has attempts left returns the lead to
+    pending and adds it to the LeadScheduler at its backoff time. Requeueing is
+    conditional on the lead still being in the status of the event, so events
+    read twice never schedule a lead twice.
+
+    Its position in the events is saved in the StateStore, so a restart picks
+    up where the last run stopped; a first run starts `replay_window` seconds back.
+    """
+
+    # Name of the saved position in the StateStore
+    CURSOR = 'redial_monitor'
+
+    def __init__(self, policy: RetryPolicy, store: Any, scheduler: Any, replay_window: float = 3600):
+        self.policy = policy
+        self.store = store
+        self.scheduler = scheduler
+        self.replay_window = replay_window
+        self._last_event_id: Optional[int] = None
+
+    def ingest(self) -> int:
+        """Process new call events. Returns the number of redials scheduled."""
+        if self._last_event_id is None:
+            self._last_event_id = self.store.get_cursor(self.CURSOR)
+            if self._last_event_id is None:
+                self._last_event_id = self.store.call_event_id_before(time.time() - self.replay_window)
+        scheduled = 0
+        while True:
+            events = self.store.call_events_since(self._last_event_id)
+            if not events:
+                return scheduled
+            for event in events:
+                scheduled += self._handle(event)
+            self._last_event_id = events[-1]['id']
+            self.store.set_cursor(self.CURSOR, self._last_event_id)
+
+    def _handle(self, event: Dict[str, Any]) -> int:
+        outcome = classify_call_status(event['status'], event.get('answered_by'))
+        if outcome is None:
+            return 0
+        row = self.store.lead_by_call_sid(event['call_sid'])
+        if row is None:
+            return 0
+        delay = self.policy.delay(outcome, row['attempts'])
+        if delay is None:
+            logger.info(f"No more redials for {row['phone']} after {row['attempts']} attempts ({outcome})")
+            return 0
+        if not self.store.requeue_lead(row['phone'], event['call_sid'], event['status']):
+            return 0
+        lead = json.loads(row['lead']) if row.get('lead') else {'name': row['name'], 'phone': row['phone']}
+        self.scheduler.add(lead, due_at=event['created_at'] + delay)
+        logger.info(f"🔁 Redialing {row['phone']} ({outcome}) in {delay / 60:.0f} min")
+        return 1
+
+    def follow(self, stop_event: threading.Event, interval: float = 5.0) -> None:
+        """Keep ingesting call events until stop_event is set."""
+        while not stop_event.is_set():
+            try:
+                self.ingest()
+            except Exception as e:
+                logger.error(f"Failed to schedule redials: {str(e)}")
+            stop_event.wait(interval)
@@ -0,0 +1,422 @@
+"""
+Calling-window scheduling of leads in the callee's local time.
+
+Each lead's timezone comes from the area code of its E.164 number, looked up
+in a table built once at import. Area codes that span several timezones map
+to all of them, and such a lead is only called while the window is open in
+every one. Leads wait in a heap keyed on the time their window next opens (or
+a later retry time); once released they are handed to the dialer by priority,
+then by how long they have been due. Every scheduled lead is also stored in the
+StateStore, so the heap is rebuilt after a restart.
+
+Calling windows are configured per weekday in the callee's local time:
+
+    scheduling:
+      windows:
+        default: ["09:00-20:00"]
+        saturday: ["10:00-17:00"]
+        sunday: []
+"""
+import json
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python < 3.9
+    from backports.zoneinfo import ZoneInfo
+
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+DEFAULT_WINDOWS = {'default': ["09:00-20:00"]}
+# Zones assumed for numbers whose area code is not in the table: the continental US span
+DEFAULT_ZONES = ('America/New_York', 'America/Los_Angeles')
+PRIORITY_COLUMN = 'priority'
+# Key under which a scheduled lead carries the file (or partition) it came from
+SOURCE_KEY = '_source_file'
+# Calling windows are looked up this many days ahead
+_LOOKAHEAD_DAYS = 8
+
+# NANP area codes by timezone; codes listed under several zones span all of them
+_AREA_CODES_BY_ZONE = {
+    'America/New_York': """
+        201 202 203 207 212 215 216 220 223 229 231 234 239 240 248 252 260 267 269 272 276 283 301 302
+        304 305 313 315 317 321 324 326 329 330 332 336 339 347 351 352 363 380 386 401 404 407 410 412
+        413 419 423 434 436 440 443 445 448 463 470 472 475 478 484 502 508 513 516 517 518 540 551 561
+        567 570 571 574 582 585 586 603 606 607 609 610 614 616 617 631 640 645 646 656 667 678 679 680
+        681 689 703 704 706 716 717 718 724 727 728 732 734 740 743 754 757 762 765 770 771 772 774 781 786
+        802 803 804 810 812 813 814 821 826 828 835 838 839 843 845 848 850 854 856 857 859 860 862 863
+        864 865 878 904 906 908 910 912 914 917 919 929 930 934 937 941 943 947 948 954 959 973 978 980
+        984 989
+    """,
+    'America/Chicago': """
+        205 210 214 217 218 219 224 225 228 251 254 256 262 270 274 281 308 309 312 314 316 318 319 320
+        325 327 331 334 337 346 353 361 364 402 405 409 414 417 430 432 447 448 464 469 479 483 501 504
+        507 512 515 531 534 539 557 563 572 573 580 601 605 608 612 615 618 620 629 630 636 641 651 659
+        660 662 682 701 708 712 713 715 726 730 731 737 763 769 773 779 785 806 812 815 816 817 830 832
+        847 850 861 870 872 901 903 906 913 918 920 931 936 938 940 945 952 956 972 975 979 985
+    """,
+    'America/Denver': """
+        208 303 307 308 385 406 435 505 541 575 605 701 719 720 801 915 970 983 986
+    """,
+    'America/Phoenix': "480 520 602 623 928",
+    'America/Los_Angeles': """
+        206 208 209 213 253 279 310 323 341 350 360 369 408 415 424 425 442 458 503 509 510 530 541 559
+        562 564 619 626 628 650 657 661 669 702 707 714 725 747 760 775 805 818 820 831 840 858 909 916
+        925 949 951 971 986
+    """,
+    'America/Anchorage': "907",
+    'Pacific/Honolulu': "808",
+    'America/Puerto_Rico': "787 939",
+    'America/St_Thomas': "340",
+    'Pacific/Guam': "671",
+    'Pacific/Saipan': "670",
+    'Pacific/Pago_Pago': "684",
+    # Canada
+    'America/Toronto': """
+        226 249 263 289 343 354 365 367 382 416 418 437 438 450 468 514 519 548 579 581 613 647 683 705
+        742 753 807 819 873 905
+    """,
+    'America/Winnipeg': "204 431 584 807",
+    'America/Regina': "306 474 639",
+    'America/Edmonton': "368 403 587 780 825 867",
+    'America/Vancouver': "236 250 257 604 672 778",
+    'America/Halifax': "782 902",
+    'America/Moncton': "428 506",
+    'America/St_Johns': "709 879",
+    'America/Whitehorse': "867",
+    'America/Iqaluit': "867",
+}
+
+
+def _build_area_code_table() -> Dict[str, Tuple[str, ...]]:
+    table: Dict[str, List[str]] = {}
+    for zone, codes in _AREA_CODES_BY_ZONE.items():
+        for code in codes.split():
+            table.setdefault(code, []).append(zone)
+    return {code: tuple(zones) for code, zones in table.items()}
+
+
+# Area code -> IANA timezones it spans
+AREA_CODE_TIMEZONES = _build_area_code_table()
+
+
+def timezones_for(phone: str, default: Tuple[str, ...] = DEFAULT_ZONES) -> Tuple[str, ...]:
+    """Timezones of an E.164 number, from its NANP area code; `default` for unknown or non-NANP numbers."""
+    if phone.startswith('+1') and len(phone) == 12:
+        return AREA_CODE_TIMEZONES.get(phone[2:5], default)
+    return default
+
+
+def _parse_window(spec: str) -> Tuple[int, int]:
+    """'09:00-20:00' -> (540, 1200) minutes after midnight."""
+    try:
+        start, end = (part.strip() for part in spec.split('-'))
+        minutes = []
+        for clock in (start, end):
+            hours, mins = clock.split(':')
+            minutes.append(int(hours) * 60 + int(mins))
+    except ValueError:
+        raise ValueError(f"Invalid calling window '{spec}', expected HH:MM-HH:MM")
+    if not 0 <= minutes[0] < minutes[1] <= 24 * 60:
+        raise ValueError(f"Invalid calling window '{spec}', the start must be before the end")
+    return minutes[0], minutes[1]
+
+
+class CallingWindows:
+    """
+    Weekly calling windows in the callee's local time.
+
+    The first window ending after a given time is cached per set of timezones,
+    so leads sharing a timezone reuse one lookup until that window ends.
+    """
+
+    def __init__(self, windows: Optional[Dict[str, List[str]]] = None):
+        """
+        Args:
+            windows: Weekday name (or 'default') -> list of 'HH:MM-HH:MM' windows
+        """
+        windows = windows or DEFAULT_WINDOWS
+        unknown = set(windows) - set(WEEKDAYS) - {'default'}
+        if unknown:
+            raise ValueError(f"Unknown calling window days: {sorted(unknown)}")
+        default = [_parse_window(w) for w in windows.get('default', [])]
+        # Index = datetime.weekday()
+        self.by_weekday: List[List[Tuple[int, int]]] = [
+            sorted(_parse_window(w) for w in windows[day]) if day in windows else default
+            for day in WEEKDAYS
+        ]
+        self._zones: Dict[str, Any] = {}
+        self._cache: Dict[Tuple[str, ...], Tuple[float, float, float]] = {}
+        self._lock = threading.Lock()
+
+    def _zone(self, name: str) -> Any:
+        zone = self._zones.get(name)
+        if zone is None:
+            zone = self._zones[name] = ZoneInfo(name)
+        return zone
+
+    def _intervals(self, zone_name: str, when: float) -> List[Tuple[float, float]]:
+        """Windows of one zone over the next days as (start, end) epoch seconds."""
+        zone = self._zone(zone_name)
+        today = datetime.fromtimestamp(when, zone).date()
+        intervals = []
+        for offset in range(-1, _LOOKAHEAD_DAYS):
+            day = today + timedelta(days=offset)
+            midnight = datetime(day.year, day.month, day.day, tzinfo=zone)
+            for start, end in self.by_weekday[day.weekday()]:
+                # Build wall-clock times so DST days keep their local hours
+                start_at = (midnight + timedelta(minutes=start)).timestamp()
+                end_at = (midnight + timedelta(minutes=end)).timestamp()
+                if end_at > when:
+                    intervals.append((start_at, end_at))
+        return intervals
+
+    def window(self, zones: Tuple[str, ...], when: float) -> Optional[Tuple[float, float]]:
+        """
+        The first window open in every zone that ends after `when`.
+
+        Returns:
+            Optional[Tuple[float, float]]: (start, end) epoch seconds, None if
+            there is no common window in the coming week
+        """
+        with self._lock:
+            cached = self._cache.get(zones)
+            if cached is not None and cached[0] <= when < cached[2]:
+                return cached[1], cached[2]
+
+        common = self._intervals(zones[0], when)
+        for zone_name in zones[1:]:
+            other = self._intervals(zone_name, when)
+            common = [(max(s1, s2), min(e1, e2)) for s1, e1 in common for s2, e2 in other
+                      if max(s1, s2) < min(e1, e2)]
+        if not common:
+            return None
+        start, end = min(common)
+        with self._lock:
+            self._cache[zones] = (when, start, end)
+        return start, end
+
+    def next_open(self, zones: Tuple[str, ...], when: float) -> Optional[float]:
+        """`when` if a call is allowed then, otherwise when the next window opens (None if never)."""
+        window = self.window(zones, when)
+        if window is None:
+            return None
+        return max(window[0], when)
+
+
+class LeadScheduler:
+    """
+    Holds leads until their calling window opens and releases them by priority.
+
+    Leads wait in a heap of (release time, ...) entries. Entries that come due
+    move to a heap of (-priority, due time, ...) entries from which pop_ready()
+    takes the next lead, re-checking its window first. Rescheduling a lead
+    supersedes its older heap entries, which are skipped when popped. Adding and
+    popping a lead are O(log n); only phone numbers and sort keys are kept in
+    memory, the leads themselves are read back from the StateStore on release.
+    """
+
+    def __init__(self, store: Any, windows: Optional[CallingWindows] = None,
+                 default_zones: Tuple[str, ...] = DEFAULT_ZONES, priority_column: str = PRIORITY_COLUMN,
+                 clock=time.time):
+        """
+        Args:
+            store: StateStore persisting the scheduled leads
+            windows: Calling windows, DEFAULT_WINDOWS if not given
+            default_zones: Timezones assumed for numbers with an unknown area code
+            priority_column: Lead column holding its priority (higher is dialed first)
+            clock: Returns the current epoch time, replaceable for simulations
+        """
+        self.store = store
+        self.windows = windows or CallingWindows()
+        self.default_zones = tuple(default_zones)
+        self.priority_column = priority_column
+        self.clock = clock
+        self._waiting: List[Tuple[float, float, float, int, str]] = []
+        self._ready: List[Tuple[float, float, int, str]] = []
+        # phone -> sequence number of its live heap entry
+        self._entries: Dict[str, int] = {}
+        # Released leads whose calls have not been placed (or given up) yet
+        self._released: Set[str] = set()
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._added = threading.Event()
+
+    @classmethod
+    def from_config(cls, settings: Dict[str, Any], store: Any) -> 'LeadScheduler':
+        """Build a scheduler from the `scheduling` section of config.yaml."""
+        return cls(
+            store,
+            windows=CallingWindows(settings.get('windows')),
+            default_zones=tuple(settings.get('default_timezones') or DEFAULT_ZONES),
+            priority_column=settings.get('priority_column', PRIORITY_COLUMN)
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _priority(self, lead: Dict[str, Any]) -> float:
+        try:
+            priority = float(lead.get(self.priority_column) or 0)
+        except (TypeError, ValueError):
+            return 0.0
+        return 0.0 if priority != priority else priority
+
+    def _release_at(self, phone: str, due_at: float) -> float:
+        opens = self.windows.next_open(timezones_for(phone, self.default_zones), due_at)
+        if opens is None:
+            # No window in the coming week: look again in a day
+            return due_at + 86400
+        return opens
+
+    def _push(self, phone: str, priority: float, due_at: float) -> None:
+        self._seq += 1
+        self._entries[phone] = self._seq
+        heapq.heappush(self._waiting, (self._release_at(phone, due_at), -priority, due_at, self._seq, phone))
+
+    def _persist(self, leads: Iterable[Dict[str, Any]],
+                 due_at: Optional[float]) -> List[Tuple[str, str, float, float, Optional[str]]]:
+        due_at = self.clock() if due_at is None else due_at
+        rows = [(lead['phone'], json.dumps(lead, default=str), self._priority(lead), due_at, lead.get(SOURCE_KEY))
+                for lead in leads]
+        if rows:
+            self.store.schedule_leads(rows)
+        return rows
+
+    def add_many(self, leads: Iterable[Dict[str, Any]], due_at: Optional[float] = None) -> int:
+        """
+        Schedule leads (with E.164 `phone`s) and persist them in one transaction.
+
+        Args:
+            due_at: Earliest dial time for all of them, now if not given
+
+        Returns:
+            int: Number of leads scheduled
+        """
+        rows = self._persist(leads, due_at)
+        if not rows:
+            return 0
+        with self._lock:
+            for phone, _, priority, lead_due_at, _ in rows:
+                self._released.discard(phone)
+                self._push(phone, priority, lead_due_at)
+        self._added.set()
+        return len(rows)
+
+    def add(self, lead: Dict[str, Any], due_at: Optional[float] = None) -> None:
+        """Schedule one lead, e.g. a redial at `due_at`."""
+        self.add_many([lead], due_at)
+
+    def defer(self, lead: Dict[str, Any], due_at: Optional[float] = None) -> None:
+        """Persist a lead for the scheduler that loads its source file (see load()), without holding it here."""
+        self._persist([lead], due_at)
+
+    def load(self, source_file: str, since: Optional[float] = None) -> int:
+        """
+        Add the persisted leads of one source file that this scheduler does not hold yet.
+
+        Args:
+            since: Only leads scheduled at or after this time
+
+        Returns:
+            int: Number of leads added
+        """
+        count = 0
+        with self._lock:
+            for phone, priority, due_at in self.store.iter_schedule(source_file=source_file, since=since):
+                if phone in self._entries or phone in self._released:
+                    continue
+                self._push(phone, priority, due_at)
+                count += 1
+        if count:
+            self._added.set()
+        return count
+
+    def forget(self, source_file: str) -> int:
+        """Drop the leads of one source file from the heaps, leaving them persisted. Returns how many."""
+        count = 0
+        with self._lock:
+            for phone, _, _ in self.store.iter_schedule(source_file=source_file):
+                if self._entries.pop(phone, None) is not None:
+                    count += 1
+        return count
+
+    def restore(self) -> int:
+        """Rebuild the heaps from the StateStore after a restart. Returns the number of leads."""
+        with self._lock:
+            self._waiting, self._ready, self._entries, self._released = [], [], {}, set()
+            for phone, priority, due_at in self.store.iter_schedule():
+                self._seq += 1
+                self._entries[phone] = self._seq
+                self._waiting.append((self._release_at(phone, due_at), -priority, due_at, self._seq, phone))
+            heapq.heapify(self._waiting)
+            count = len(self._entries)
+        if count:
+            logger.info(f"🗓️ Restored {count} scheduled leads")
+            self._added.set()
+        return count
+
+    def pop_ready(self, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """The highest-priority lead whose calling window is open now, None if there is none."""
+        now = self.clock() if now is None else now
+        while True:
+            with self._lock:
+                while self._waiting and self._waiting[0][0] <= now:
+                    _, neg_priority, due_at, seq, phone = heapq.heappop(self._waiting)
+                    if self._entries.get(phone) == seq:
+                        heapq.heappush(self._ready, (neg_priority, due_at, seq, phone))
+                while self._ready:
+                    neg_priority, due_at, seq, phone = heapq.heappop(self._ready)
+                    if self._entries.get(phone) != seq:
+                        continue
+                    release_at = self._release_at(phone, now)
+                    if release_at > now:
+                        # Its window closed while it waited behind higher priorities
+                        heapq.heappush(self._waiting, (release_at, neg_priority, due_at, seq, phone))
+                        continue
+                    del self._entries[phone]
+                    self._released.add(phone)
+                    break
+                else:
+                    return None
+            row = self.store.get_scheduled(phone)
+            if row is not None:
+                return json.loads(row['lead'])
+            # Unscheduled elsewhere (e.g. by the worker that owns its file): try the next lead
+            with self._lock:
+                self._released.discard(phone)
+
+    def next_release(self) -> Optional[float]:
+        """When the earliest waiting lead is due, now if one is ready, None if nothing is scheduled."""
+        with self._lock:
+            if self._ready:
+                return self.clock()
+            return self._waiting[0][0] if self._waiting else None
+
+    def done(self, phone: str) -> None:
+        """Forget a released lead once its call has been placed (or given up)."""
+        self.store.unschedule(phone)
+        with self._lock:
+            self._released.discard(phone)
+
+    def iter_ready(self, stop_event: threading.Event, max_wait: float = 5.0) -> Iterator[Dict[str, Any]]:
+        """
+        Yield leads as their windows open, until stop_event is set.
+
+        Sleeps until the next release or until new leads are added, at most max_wait seconds at a time.
+        """
+        while not stop_event.is_set():
+            lead = self.pop_ready()
+            if lead is not None:
+                yield lead
+                continue
+            self._added.clear()
+            next_release = self.next_release()
+            wait = max_wait if next_release is None else min(max(next_release - self.clock(), 0.01), max_wait)
+            self._added.wait(wait)
@@ -1,8 +1,279 @@
-def get_script():
-    return [
-        "Hi, my name is Rexy, your AI dental assistant.",
-        "I'm just going to ask you a few quick questions.",
-        "Have you had a dental checkup in the last 6 months?",
-        "Do you currently have dental insurance?",
-        "Would you like to schedule an appointment with a live agent?"
-    ]
+"""
+Declarative IVR scripts.
+
+A script is a YAML file in scripts/ describing a small state machine:
+
+    name: dental
+    greeting: Hi, my name is Rexy, your AI dental assistant.
+    start: checkup
+    nodes:
+      checkup:
+        type: question
+        prompt: Have you had a dental checkup in the last 6 months?
+        next: insurance              # after any answer...
+        branches: {"9": goodbye}     # ...unless a branch matches the digits
+      insurance: ...
+      transfer:
+        type: transfer
+        say: Please hold while I transfer you to a live agent.
+        agent: "+15551234567"
+      goodbye:
+        type: hangup
+        say: Thank you, goodbye.
+
+Scripts are validated and compiled at startup into Script objects whose nodes
+are indexed by id, so finding the next node for a keypress is a dict lookup.
+Edited, added or removed script files are picked up by get_scripts() without a
+restart.
+"""
+import os
+import glob
+import json
+import hashlib
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode, urlsplit, urlunsplit, parse_qsl
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'scripts')
+DEFAULT_SCRIPT = 'dental'
+# Seconds between checks of the script files for changes
+RELOAD_INTERVAL = 2.0
+
+# Node types
+QUESTION = 'question'  # say a prompt and gather one keypress
+TRANSFER = 'transfer'  # connect the caller to an agent
+HANGUP = 'hangup'      # say goodbye and end the call
+NODE_TYPES = (QUESTION, TRANSFER, HANGUP)
+
+_VALID_DIGITS = set("0123456789*#")
+
+
+class ScriptError(ValueError):
+    """An IVR script failed validation."""
+
+
+class Node:
+    """One compiled step of a script."""
+
+    __slots__ = ('id', 'type', 'prompt', 'say', 'agent', 'branches', 'default', 'num_digits', 'timeout')
+
+    def __init__(self, node_id: str, spec: Dict[str, Any]):
+        self.id = node_id
+        self.type = spec.get('type', QUESTION)
+        self.prompt = spec.get('prompt')
+        self.say = spec.get('say')
+        self.agent = spec.get('agent')
+        self.branches: Dict[str, str] = {str(k): v for k, v in (spec.get('branches') or {}).items()}
+        self.default: Optional[str] = spec.get('next')
+        self.num_digits = int(spec.get('num_digits', 1))
+        self.timeout = int(spec.get('timeout', 10))
+
+    @property
+    def terminal(self) -> bool:
+        return self.type != QUESTION
+
+
+class Script:
+    """A validated IVR script with nodes indexed by id."""
+
+    def __init__(self, spec: Dict[str, Any], source: str = '<memory>'):
+        """
+        Args:
+            spec: Parsed YAML definition
+            source: Where the definition came from, for error messages
+
+        Raises:
+            ScriptError: If the definition is invalid
+        """
+        if not isinstance(spec, dict):
+            raise ScriptError(f"{source}: script must be a mapping")
+        self.source = source
+        self.name: str = spec.get('name') or os.path.splitext(os.path.basename(source))[0]
+        self.greeting: Optional[str] = spec.get('greeting')
+        self.start: str = spec.get('start')
+        node_specs = spec.get('nodes') or {}
+        if not isinstance(node_specs, dict) or not node_specs:
+            raise ScriptError(f"{source}: 'nodes' must be a non-empty mapping")
+        self.nodes: Dict[str, Node] = {str(node_id): Node(str(node_id), node_spec or {})
+                                       for node_id, node_spec in node_specs.items()}
+        # Question nodes in file order, for URLs that still use the old numeric ?step=
+        self.steps: List[str] = [n.id for n in self.nodes.values() if n.type == QUESTION]
+        self.fingerprint = hashlib.sha1(json.dumps(spec, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        self._validate()
+
+    def _validate(self) -> None:
+        errors = []
+        if self.start not in self.nodes:
+            errors.append(f"start node '{self.start}' is not defined")
+        for node in self.nodes.values():
+            where = f"node '{node.id}'"
+            if node.type not in NODE_TYPES:
+                errors.append(f"{where}: unknown type '{node.type}', expected one of {NODE_TYPES}")
+                continue
+            if node.type == QUESTION:
+                if not node.prompt:
+                    errors.append(f"{where}: questions need a prompt")
+                if node.default is None and not node.branches:
+                    errors.append(f"{where}: questions need 'next' or 'branches'")
+                for target in list(node.branches.values()) + ([node.default] if node.default is not None else []):
+                    if target not in self.nodes:
+                        errors.append(f"{where}: goes to undefined node '{target}'")
+                for digits in node.branches:
+                    if not digits or not set(digits) <= _VALID_DIGITS:
+                        errors.append(f"{where}: branch key '{digits}' is not keypad digits")
+            elif node.type == TRANSFER and not node.agent:
+                errors.append(f"{where}: transfers need an agent number")
+        if errors:
+            raise ScriptError(f"{self.source}: " + "; ".join(errors))
+
+        unreachable = set(self.nodes) - self._reachable()
+        if unreachable:
+            logger.warning(f"{self.source}: nodes {sorted(unreachable)} are unreachable from '{self.start}'")
+
+    def _reachable(self) -> set:
+        seen, stack = set(), [self.start]
+        while stack:
+            node = self.nodes[stack.pop()]
+            if node.id in seen:
+                continue
+            seen.add(node.id)
+            stack.extend(t for t in list(node.branches.values()) + [node.default] if t is not None)
+        return seen
+
+    def node(self, node_id: Optional[str]) -> Node:
+        """A node by id, the start node if node_id is empty. Raises KeyError for unknown ids."""
+        return self.nodes[node_id or self.start]
+
+    def next_node(self, node_id: str, digits: Optional[str]) -> Node:
+        """The node that follows `node_id` when the caller pressed `digits`."""
+        node = self.nodes[node_id]
+        target = node.branches.get(digits or "", node.default)
+        if target is None:
+            # No branch for these digits and no default: ask again
+            return node
+        return self.nodes[target]
+
+
+def load_script(path: str) -> Script:
+    """Load and validate one YAML script."""
+    with open(path, 'r') as f:
+        try:
+            spec = yaml.safe_load(f)
+        except yaml.YAMLError as e:
+            raise ScriptError(f"{path}: invalid YAML: {e}") from e
+    return Script(spec, source=path)
+
+
+def load_scripts(scripts_dir: str = SCRIPTS_DIR) -> Dict[str, Script]:
+    """
+    Load every *.yaml script in a directory.
+
+    Raises:
+        ScriptError: If any script is invalid or two scripts share a name
+    """
+    scripts: Dict[str, Script] = {}
+    for path in sorted(glob.glob(os.path.join(scripts_dir, '*.yaml'))):
+        script = load_script(path)
+        if script.name in scripts:
+            raise ScriptError(f"{path}: script name '{script.name}' is already used by {scripts[script.name].source}")
+        scripts[script.name] = script
+    logger.info(f"Loaded IVR scripts: {', '.join(scripts) or 'none'}")
+    return scripts
+
+
+def _files_signature(scripts_dir: str) -> tuple:
+    """Path, modification time and size of every script file, to notice edits."""
+    signature = []
+    for path in sorted(glob.glob(os.path.join(scripts_dir, '*.yaml'))):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        signature.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+_scripts: Optional[Dict[str, Script]] = None
+_signature: Optional[tuple] = None
+_checked_at = 0.0
+_reload_lock = threading.Lock()
+
+
+def get_scripts() -> Dict[str, Script]:
+    """
+    Every script in SCRIPTS_DIR, reloaded when a script file changes.
+
+    The files are checked at most every RELOAD_INTERVAL seconds. A reload that
+    fails validation is logged and the previously loaded scripts are kept.
+
+    Raises:
+        ScriptError: If the first load finds an invalid script
+    """
+    global _scripts, _signature, _checked_at
+    if _scripts is not None and time.monotonic() - _checked_at < RELOAD_INTERVAL:
+        return _scripts
+    with _reload_lock:
+        if _scripts is not None and time.monotonic() - _checked_at < RELOAD_INTERVAL:
+            return _scripts
+        signature = _files_signature(SCRIPTS_DIR)
+        if _scripts is None:
+            _scripts = load_scripts(SCRIPTS_DIR)
+        elif signature != _signature:
+            try:
+                _scripts = load_scripts(SCRIPTS_DIR)
+            except (ScriptError, OSError) as e:
+                logger.error(f"❌ Keeping the loaded IVR scripts, reload failed: {e}")
+        _signature = signature
+        _checked_at = time.monotonic()
+    return _scripts
+
+
+def get_script(name: Optional[str] = None) -> Script:
+    """
+    A compiled script by name, DEFAULT_SCRIPT if no name is given.
+
+    Raises:
+        KeyError: If there is no such script
+    """
+    return get_scripts()[name or DEFAULT_SCRIPT]
+
+
+def script_url(base_url: str, script: Optional[str] = None, campaign: Optional[str] = None) -> str:
+    """Add the script and campaign query parameters to a TwiML webhook URL."""
+    if not script and not campaign:
+        return base_url
+    parts = urlsplit(base_url)
+    query = parse_qsl(parts.query)
+    query += [(k, v) for k, v in (('script', script), ('campaign', campaign)) if v]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def lead_url(base_url: str, lead: Dict[str, Any], default_script: Optional[str] = None) -> str:
+    """
+    TwiML webhook URL for a lead, selecting its `script` and `campaign` columns.
+
+    Blank or missing columns (NaN from pandas included) fall back to default_script and no campaign.
+    """
+    script, campaign = lead.get('script'), lead.get('campaign')
+    return script_url(
+        base_url,
+        script if isinstance(script, str) and script else default_script,
+        campaign if isinstance(campaign, str) and campaign else None
+    )
+
+
+if __name__ == "__main__":
+    import sys
+
+    try:
+        for script in load_scripts(sys.argv[1] if len(sys.argv) > 1 else SCRIPTS_DIR).values():
+            print(f"✅ {script.name}: {len(script.nodes)} nodes, starts at '{script.start}'")
+    except ScriptError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
@@ -0,0 +1,141 @@
+"""
+Production server for the voice webhooks.
+
+Runs voice_api under gunicorn with a pool of pre-forked worker processes,
+each serving requests on a pool of threads:
+
+    python src/serve.py
+
+The web workers only enqueue background jobs. The job consumers, and the
+Whisper and BART models they load, run in one separate process, so there is a
+single copy of each model however many workers serve requests:
+
+    python src/serve.py --jobs
+
+`python run.py web` (or `all`) starts and supervises both.
+
+Settings come from the `server` section of config.yaml, overridden by
+environment variables:
+
+    server:
+      host: 0.0.0.0       # HOST
+      port: 5001          # PORT
+      workers: 2          # WEB_WORKERS
+      threads: 8          # WEB_THREADS
+      max_event_streams: 2  # MAX_EVENT_STREAMS, default a quarter of the threads
+      timeout: 60         # WEB_TIMEOUT
+      preload_models: false  # PRELOAD_MODELS=1: the jobs process loads every model at startup
+
+The app is imported once in the master and forked into the workers. Send
+SIGHUP to the master to gracefully replace the workers (after a config change),
+and SIGUSR2 followed by SIGQUIT to the old master to upgrade the code itself.
+"""
+import os
+import signal
+import logging
+import argparse
+import threading
+from typing import Any, Dict
+
+import yaml
+from gunicorn.app.base import BaseApplication
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', 'config.yaml')
+
+
+def load_server_config() -> Dict[str, Any]:
+    """The `server` section of config.yaml, or {} if there is none."""
+    try:
+        with open(CONFIG_PATH, 'r') as f:
+            return (yaml.safe_load(f) or {}).get('server', {}) or {}
+    except FileNotFoundError:
+        return {}
+
+
+def server_options() -> Dict[str, Any]:
+    """gunicorn settings from config.yaml and the environment."""
+    config = load_server_config()
+    host = os.getenv("HOST", config.get('host', '0.0.0.0'))
+    port = int(os.getenv("PORT", config.get('port', 5001)))
+    threads = int(os.getenv("WEB_THREADS", config.get('threads', 8)))
+    return {
+        'bind': f"{host}:{port}",
+        'workers': int(os.getenv("WEB_WORKERS", config.get('workers', 2))),
+        # Threaded workers: webhooks wait on SQLite and the network, and /events holds a thread per client
+        'worker_class': 'gthread',
+        'threads': threads,
+        # Not a gunicorn setting: caps the threads /events streams may hold, see VoiceServer.load
+        'max_event_streams': int(os.getenv("MAX_EVENT_STREAMS",
+                                           config.get('max_event_streams', max(1, threads // 4)))),
+        'timeout': int(os.getenv("WEB_TIMEOUT", config.get('timeout', 60))),
+        'graceful_timeout': int(config.get('graceful_timeout', 30)),
+        'keepalive': int(config.get('keepalive', 5)),
+        'max_requests': int(config.get('max_requests', 0)),
+        'max_requests_jitter': int(config.get('max_requests_jitter', 0)),
+        'preload_app': True,
+        'accesslog': config.get('accesslog'),
+        'post_fork': _post_fork,
+    }
+
+
+def _post_fork(server, worker) -> None:
+    from voice_api import after_fork
+    after_fork()
+    server.log.info(f"Worker {worker.pid} ready")
+
+
+class VoiceServer(BaseApplication):
+    """gunicorn application serving voice_api.app."""
+
+    def __init__(self, options: Dict[str, Any] = None):
+        self.options = options or server_options()
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            if value is not None and key in self.cfg.settings:
+                self.cfg.set(key, value)
+
+    def load(self):
+        os.environ["MAX_EVENT_STREAMS"] = str(self.options['max_event_streams'])
+        # Jobs are consumed by the jobs process (serve_jobs), not by every worker
+        os.environ["RUN_JOBS"] = "0"
+        from voice_api import app
+        return app
+
+
+def serve_jobs() -> None:
+    """Run the background job consumers until SIGTERM or SIGINT."""
+    from voice_api import jobs, start_jobs
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda signum, frame: stop.set())
+
+    preload = os.getenv("PRELOAD_MODELS", str(load_server_config().get('preload_models', False))).lower()
+    start_jobs(preload_models=preload in ("1", "true"))
+    logger.info(f"🧵 Running {jobs.workers} job workers")
+    while not stop.wait(1.0):
+        pass
+    # Let running jobs finish; unfinished ones are retried once their lease expires
+    jobs.stop(timeout=int(load_server_config().get('graceful_timeout', 30)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the voice webhooks")
+    parser.add_argument("--jobs", action="store_true",
+                        help="run the background job consumers instead of the web server")
+    args = parser.parse_args()
+    if args.jobs:
+        serve_jobs()
+        return
+
+    options = server_options()
+    logger.info(f"🚀 Serving voice API on {options['bind']} with {options['workers']} workers "
+                f"x {options['threads']} threads, background jobs run by serve.py --jobs")
+    VoiceServer(options).run()
+
+
+if __name__ == "__main__":
+    main()
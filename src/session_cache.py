@@ -0,0 +1,208 @@
+import os
+import json
+import time
+import threading
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SESSIONS_DIR = os.path.join(os.path.dirname(__file__), '..', 'logs', 'sessions')
+
+
+class CallSession:
+    """IVR state of one call: where it is in its script and the answers given so far."""
+
+    __slots__ = ('call_sid', 'phone_number', 'script', 'campaign', 'node', 'answers', 'updated_at')
+
+    def __init__(self, call_sid: str, phone_number: str = "", script: Optional[str] = None,
+                 campaign: str = "", node: Optional[str] = None):
+        self.call_sid = call_sid
+        self.phone_number = phone_number
+        self.script = script
+        self.campaign = campaign
+        # Node whose answer is expected next
+        self.node = node
+        # question -> response row, in the order answered
+        self.answers: Dict[str, Dict[str, str]] = {}
+        self.updated_at = time.time()
+
+    def add_answer(self, question: str, answer: str, timestamp: Optional[str] = None) -> bool:
+        """
+        Record an answer. Returns False if this exact answer was already recorded,
+        e.g. because Twilio retried the webhook.
+        """
+        existing = self.answers.get(question)
+        if existing is not None and existing['answer'] == answer:
+            return False
+        self.answers[question] = {
+            'phone_number': self.phone_number,
+            'question': question,
+            'answer': answer,
+            'timestamp': timestamp or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'call_sid': self.call_sid,
+        }
+        self.updated_at = time.time()
+        return True
+
+    def responses(self) -> List[Dict[str, str]]:
+        """Answers as response rows (the shape of ResponseStore.by_call_sid), oldest first."""
+        return list(self.answers.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CallSession':
+        session = cls(data['call_sid'])
+        for slot in cls.__slots__:
+            if slot in data:
+                setattr(session, slot, data[slot])
+        return session
+
+
+class SessionCache:
+    """
+    Bounded in-memory cache of CallSessions keyed by CallSid.
+
+    Sessions idle for longer than `ttl` expire. When the cache is full the least
+    recently used session is evicted, and written to `spill_dir` if one is set so
+    it can be picked up again. On a miss, `loader` rebuilds a session's answers
+    (e.g. from the response store).
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl: float = 3600, spill_dir: Optional[str] = None,
+                 loader: Optional[Callable[[str], List[Dict[str, str]]]] = None):
+        """
+        Args:
+            max_sessions: Sessions kept in memory
+            ttl: Seconds after its last use that a session expires
+            spill_dir: Directory for evicted sessions, None to drop them
+            loader: Returns the stored response rows of a CallSid
+        """
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.spill_dir = spill_dir
+        self.loader = loader
+        self._sessions: 'OrderedDict[str, CallSession]' = OrderedDict()
+        self._lock = threading.RLock()
+        self._puts = 0
+        self.hits = 0
+        self.misses = 0
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _expired(self, session: CallSession) -> bool:
+        return time.time() - session.updated_at > self.ttl
+
+    def _spill_path(self, call_sid: str) -> Optional[str]:
+        # CallSids come from request data; anything but a plain SID is never used as a file name
+        if not call_sid.isalnum():
+            return None
+        return os.path.join(self.spill_dir, f"{call_sid}.json")
+
+    def _spill(self, session: CallSession) -> None:
+        path = self._spill_path(session.call_sid)
+        if path is None:
+            return
+        tmp = f"{path}.tmp"
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(session.to_dict(), f)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.error(f"Failed to spill session {session.call_sid}: {str(e)}")
+
+    def _unspill(self, call_sid: str) -> Optional[CallSession]:
+        path = self._spill_path(call_sid)
+        if path is None:
+            return None
+        try:
+            with open(path, 'r') as f:
+                session = CallSession.from_dict(json.load(f))
+            os.remove(path)
+        except (OSError, ValueError):
+            return None
+        return None if self._expired(session) else session
+
+    def get(self, call_sid: str) -> Optional[CallSession]:
+        """The cached session of a call, from memory or the spill directory."""
+        with self._lock:
+            session = self._sessions.get(call_sid)
+            if session is not None and self._expired(session):
+                del self._sessions[call_sid]
+                session = None
+            if session is None and self.spill_dir:
+                session = self._unspill(call_sid)
+                if session is not None:
+                    self.put(session)
+            if session is None:
+                self.misses += 1
+                return None
+            self._sessions.move_to_end(call_sid)
+            session.updated_at = time.time()
+            self.hits += 1
+            return session
+
+    def put(self, session: CallSession) -> None:
+        with self._lock:
+            self._sessions[session.call_sid] = session
+            self._sessions.move_to_end(session.call_sid)
+            while len(self._sessions) > self.max_sessions:
+                _, evicted = self._sessions.popitem(last=False)
+                if self.spill_dir and not self._expired(evicted):
+                    self._spill(evicted)
+            self._puts += 1
+            if self._puts % 256 == 0:
+                self.sweep()
+
+    def start(self, call_sid: str, **attrs: Any) -> CallSession:
+        """A fresh session for a call that is just starting."""
+        session = CallSession(call_sid, **attrs)
+        self.put(session)
+        return session
+
+    def load(self, call_sid: str, **attrs: Any) -> CallSession:
+        """Rebuild a call's session from the loader, replacing any cached one."""
+        session = CallSession(call_sid, **attrs)
+        for row in (self.loader(call_sid) if self.loader else []):
+            session.add_answer(row['question'], row['answer'], row.get('timestamp'))
+        self.put(session)
+        return session
+
+    def session_at(self, call_sid: str, node: Optional[str], **attrs: Any) -> CallSession:
+        """
+        The session of a call that is answering `node`.
+
+        A cached session expecting a different node is stale (another process
+        handled the call in between) and is rebuilt from the loader.
+        """
+        session = self.get(call_sid)
+        if session is None or session.node != node:
+            session = self.load(call_sid, node=node, **attrs)
+        return session
+
+    def discard(self, call_sid: str) -> None:
+        with self._lock:
+            self._sessions.pop(call_sid, None)
+
+    def sweep(self) -> int:
+        """Drop expired sessions. Returns how many were dropped."""
+        dropped = 0
+        with self._lock:
+            # Least recently used first, so expired sessions are at the front
+            while self._sessions:
+                call_sid, session = next(iter(self._sessions.items()))
+                if not self._expired(session):
+                    break
+                del self._sessions[call_sid]
+                dropped += 1
+        return dropped
+
+    def stats(self) -> Dict[str, int]:
+        return {'sessions': len(self._sessions), 'hits': self.hits, 'misses': self.misses}
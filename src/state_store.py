@@ -0,0 +1,511 @@
+import os
+import time
+import sqlite3
+import threading
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+STATE_DB = os.path.join(os.path.dirname(__file__), '..', 'logs', 'dialer_state.db')
+
+# Lead statuses
+PENDING = 'pending'        # known but not dialed yet (or dial interrupted by a crash)
+DIALING = 'dialing'        # claimed by a dialer, call creation in flight
+INITIATED = 'initiated'    # Twilio accepted the call
+FAILED = 'failed'          # call could not be placed
+
+# File statuses
+FILE_IN_PROGRESS = 'in_progress'
+FILE_DONE = 'done'
+
+# Call events older than this are deleted, whether or not anything reads them
+CALL_EVENT_RETENTION = 86400
+# Seconds between prunes of old call events by a process recording them
+_PRUNE_INTERVAL = 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leads (
+    phone TEXT PRIMARY KEY,
+    name TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_call_sid TEXT,
+    last_error TEXT,
+    source_file TEXT,
+    lead TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_leads_call_sid ON leads(last_call_sid);
+CREATE TABLE IF NOT EXISTS lead_files (
+    path TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    rows_done INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS schedule (
+    phone TEXT PRIMARY KEY,
+    lead TEXT NOT NULL,
+    priority REAL NOT NULL DEFAULT 0,
+    due_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    source_file TEXT
+);
+CREATE TABLE IF NOT EXISTS call_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    call_sid TEXT NOT NULL,
+    status TEXT NOT NULL,
+    duration REAL,
+    answered_by TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_call_events_created ON call_events(created_at);
+CREATE TABLE IF NOT EXISTS cursors (
+    name TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+# Columns added after the first release of a table, for databases created before them
+_ADDED_COLUMNS = [
+    ('leads', 'lead', 'TEXT'),
+    ('call_events', 'answered_by', 'TEXT'),
+    ('schedule', 'source_file', 'TEXT'),
+]
+# Indexes on added columns, created once the columns exist
+_ADDED_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_schedule_source ON schedule(source_file, created_at);
+"""
+
+
+def _now() -> str:
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _statements(script: str) -> List[str]:
+    """Split a schema script into statements, run one by one as executescript() would commit first."""
+    return [statement for statement in script.split(';') if statement.strip()]
+
+
+def enable_wal(conn: sqlite3.Connection, attempts: int = 50) -> None:
+    """
+    Switch a database to WAL mode.
+
+    On a fresh file the switch needs a lock that SQLite does not wait for while
+    another process opens the same file, so it is retried for a few seconds.
+    """
+    for attempt in range(attempts):
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            return
+        except sqlite3.OperationalError as e:
+            if 'locked' not in str(e) or attempt == attempts - 1:
+                raise
+            time.sleep(0.1)
+
+
+def file_fingerprint(path: str) -> str:
+    """Identify a file's contents cheaply by size and modification time."""
+    stat = os.stat(path)
+    return f"{stat.st_size}:{int(stat.st_mtime)}"
+
+
+class StateStore:
+    """
+    Embedded SQLite (WAL) store of dialed leads and lead-file progress.
+
+    Leads are keyed on their normalized E.164 number, so the dedup check
+    before placing a call is a single primary-key lookup. Lead files record
+    how many leading rows are fully processed, so a restart can skip them.
+    """
+
+    def __init__(self, path: str = STATE_DB, call_event_retention: float = CALL_EVENT_RETENTION):
+        """
+        Args:
+            path: SQLite database file
+            call_event_retention: Seconds call events are kept for the pacer and redial monitor
+        """
+        self.path = path
+        self.call_event_retention = call_event_retention
+        self._pruned_at = time.monotonic()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        # Before anything that takes a lock: processes often open a fresh database together
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        enable_wal(self._conn)
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate()
+
+    def _migrate(self) -> None:
+        """Create the tables and add missing columns in one write transaction."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            for statement in _statements(_SCHEMA):
+                self._conn.execute(statement)
+            for table, column, decl in _ADDED_COLUMNS:
+                columns = {row['name'] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+                if column in columns:
+                    continue
+                try:
+                    self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+                except sqlite3.OperationalError as e:
+                    # Added by another process in between, e.g. one that does not lock the migration
+                    if 'duplicate column name' not in str(e):
+                        raise
+            for statement in _statements(_ADDED_INDEXES):
+                self._conn.execute(statement)
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # Leads
+
+    def claim_lead(self, phone: str, name: Optional[str] = None, source_file: Optional[str] = None,
+                   lead: Optional[str] = None) -> bool:
+        """
+        Atomically mark a number as being dialed.
+
+        Args:
+            lead: The lead as JSON, kept so it can be redialed later
+
+        Returns:
+            bool: True if the caller should dial it, False if it was already claimed or dialed
+        """
+        now = _now()
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                INSERT INTO leads (phone, name, status, attempts, source_file, lead, created_at, updated_at)
+                VALUES (?, ?, ?, 1, ?, ?, ?, ?)
+                ON CONFLICT(phone) DO UPDATE SET
+                    status = excluded.status,
+                    attempts = leads.attempts + 1,
+                    source_file = COALESCE(excluded.source_file, leads.source_file),
+                    lead = COALESCE(excluded.lead, leads.lead),
+                    updated_at = excluded.updated_at
+                WHERE leads.status = ?
+                """,
+                (phone, name, DIALING, source_file, lead, now, now, PENDING)
+            )
+            return cursor.rowcount > 0
+
+    def record_result(self, phone: str, call_sid: Optional[str], error: Optional[str] = None) -> None:
+        """Store the outcome of a call creation for a claimed number."""
+        status = INITIATED if call_sid else FAILED
+        with self._lock:
+            self._conn.execute(
+                "UPDATE leads SET status = ?, last_call_sid = COALESCE(?, last_call_sid), "
+                "last_error = ?, updated_at = ? WHERE phone = ?",
+                (status, call_sid, error, _now(), phone)
+            )
+
+    def update_call_status(self, call_sid: str, status: str) -> bool:
+        """Set the status of the lead whose last call has the given SID."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE leads SET status = ?, updated_at = ? WHERE last_call_sid = ?",
+                (status, _now(), call_sid)
+            )
+            return cursor.rowcount > 0
+
+    def requeue_lead(self, phone: str, call_sid: str, status: str) -> bool:
+        """
+        Return a lead to pending for a redial, if its last call is still the given one in the given status.
+
+        Returns:
+            bool: False if the lead was already requeued or has moved on since
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE leads SET status = ?, updated_at = ? WHERE phone = ? AND last_call_sid = ? AND status = ?",
+                (PENDING, _now(), phone, call_sid, status)
+            )
+            return cursor.rowcount > 0
+
+    # Scheduled leads
+
+    def schedule_leads(self, rows: Iterable[Tuple[str, str, float, float, Optional[str]]]) -> None:
+        """
+        Add or reschedule leads waiting for their calling window, in one transaction.
+
+        Args:
+            rows: (phone, lead JSON, priority, due_at, source_file) tuples; due_at
+                is the earliest time (epoch seconds) the lead may be dialed
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    """
+                    INSERT INTO schedule (phone, lead, priority, due_at, source_file, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(phone) DO UPDATE SET
+                        lead = excluded.lead, priority = excluded.priority, due_at = excluded.due_at,
+                        source_file = excluded.source_file, created_at = excluded.created_at
+                    """,
+                    ((phone, lead, priority, due_at, source_file, now)
+                     for phone, lead, priority, due_at, source_file in rows)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def get_scheduled(self, phone: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM schedule WHERE phone = ?", (phone,)).fetchone()
+        return dict(row) if row else None
+
+    def unschedule(self, phone: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM schedule WHERE phone = ?", (phone,))
+
+    def iter_schedule(self, batch_size: int = 10000, source_file: Optional[str] = None,
+                      since: Optional[float] = None) -> Iterator[Tuple[str, float, float]]:
+        """
+        Every scheduled lead as (phone, priority, due_at), read in primary-key pages.
+
+        Args:
+            source_file: Only leads scheduled from this file
+            since: Only leads scheduled (or rescheduled) at or after this time
+        """
+        query = "SELECT phone, priority, due_at FROM schedule WHERE phone > ?"
+        filters: Tuple[Any, ...] = ()
+        if source_file is not None:
+            query += " AND source_file = ?"
+            filters += (source_file,)
+        if since is not None:
+            query += " AND created_at >= ?"
+            filters += (since,)
+        query += " ORDER BY phone LIMIT ?"
+        last = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(query, (last,) + filters + (batch_size,)).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield row['phone'], row['priority'], row['due_at']
+            last = rows[-1]['phone']
+
+    def count_scheduled(self, source_file: str) -> int:
+        """Leads from a file still waiting to be dialed (or being dialed)."""
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*) FROM schedule WHERE source_file = ?", (source_file,)).fetchone()
+        return row[0]
+
+    # Call status callbacks
+
+    def record_call_event(self, call_sid: str, status: str, duration: Optional[float] = None,
+                          created_at: Optional[float] = None, answered_by: Optional[str] = None) -> int:
+        """
+        Append a Twilio status callback and set the status of the lead that call belongs to.
+
+        The event log is read by the dialing pacer and the redial monitor, which
+        may run in another process. Events older than call_event_retention are
+        pruned here every hour, so the log stays bounded whoever reads it.
+
+        Returns:
+            int: Id of the event
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO call_events (call_sid, status, duration, answered_by, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (call_sid, status, duration, answered_by, created_at or time.time())
+            )
+            self.update_call_status(call_sid, status)
+            if time.monotonic() - self._pruned_at >= _PRUNE_INTERVAL:
+                self._pruned_at = time.monotonic()
+                pruned = self.prune_call_events(self.call_event_retention)
+                if pruned:
+                    logger.info(f"Pruned {pruned} call events older than {self.call_event_retention:.0f}s")
+            return cursor.lastrowid
+
+    def call_events_since(self, last_id: int = 0, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Call events after the given id, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM call_events WHERE id > ? ORDER BY id LIMIT ?", (last_id, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def last_call_event_id(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(id) FROM call_events").fetchone()
+        return row[0] or 0
+
+    def call_event_id_before(self, created_at: float) -> int:
+        """Id of the last call event recorded before the given time, 0 if there is none."""
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(id) FROM call_events WHERE created_at < ?", (created_at,)).fetchone()
+        return row[0] or 0
+
+    def prune_call_events(self, max_age: float = CALL_EVENT_RETENTION) -> int:
+        """Delete call events older than max_age seconds. Returns how many were deleted."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM call_events WHERE created_at < ?", (time.time() - max_age,))
+        return cursor.rowcount
+
+    def get_cursor(self, name: str) -> Optional[int]:
+        """Saved position of a reader of the call events (see set_cursor), None if it never saved one."""
+        with self._lock:
+            row = self._conn.execute("SELECT position FROM cursors WHERE name = ?", (name,)).fetchone()
+        return row['position'] if row else None
+
+    def set_cursor(self, name: str, position: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO cursors (name, position, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET position = excluded.position, updated_at = excluded.updated_at",
+                (name, position, time.time())
+            )
+
+    def get_lead(self, phone: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM leads WHERE phone = ?", (phone,)).fetchone()
+        return dict(row) if row else None
+
+    def lead_by_call_sid(self, call_sid: str) -> Optional[Dict[str, Any]]:
+        """The lead whose last call has the given SID."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM leads WHERE last_call_sid = ?", (call_sid,)).fetchone()
+        return dict(row) if row else None
+
+    def is_known(self, phone: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM leads WHERE phone = ?", (phone,)).fetchone()
+        return row is not None
+
+    def reset_inflight(self, source_file: Optional[str] = None) -> int:
+        """
+        Return leads left in 'dialing' by a crashed process to 'pending'.
+
+        Call once at startup, before any dialer is running, or with a
+        `source_file` once that file's previous dialer is known to be gone.
+        """
+        query = "UPDATE leads SET status = ?, updated_at = ? WHERE status = ?"
+        params: Tuple[Any, ...] = (PENDING, _now(), DIALING)
+        if source_file is not None:
+            query += " AND source_file = ?"
+            params += (source_file,)
+        with self._lock:
+            cursor = self._conn.execute(query, params)
+        if cursor.rowcount:
+            logger.info(f"Reset {cursor.rowcount} interrupted dials to pending")
+        return cursor.rowcount
+
+    # Lead files
+
+    def start_file(self, path: str) -> int:
+        """
+        Register a lead file for processing.
+
+        Returns:
+            int: Number of leading rows already processed (0 for a new or changed file)
+        """
+        path = os.path.abspath(path)
+        fingerprint = file_fingerprint(path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint, rows_done, status FROM lead_files WHERE path = ?", (path,)
+            ).fetchone()
+            if row and row['fingerprint'] == fingerprint:
+                if row['status'] != FILE_IN_PROGRESS:
+                    self._conn.execute(
+                        "UPDATE lead_files SET status = ?, updated_at = ? WHERE path = ?",
+                        (FILE_IN_PROGRESS, _now(), path)
+                    )
+                return row['rows_done'] if row['status'] == FILE_IN_PROGRESS else 0
+            self._conn.execute(
+                "INSERT OR REPLACE INTO lead_files (path, fingerprint, rows_done, status, updated_at) "
+                "VALUES (?, ?, 0, ?, ?)",
+                (path, fingerprint, FILE_IN_PROGRESS, _now())
+            )
+            return 0
+
+    def mark_file_progress(self, path: str, rows_done: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE lead_files SET rows_done = ?, updated_at = ? WHERE path = ?",
+                (rows_done, _now(), os.path.abspath(path))
+            )
+
+    def finish_file(self, path: str, rows_done: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE lead_files SET rows_done = ?, status = ?, updated_at = ? WHERE path = ?",
+                (rows_done, FILE_DONE, _now(), os.path.abspath(path))
+            )
+
+    def unfinished_files(self) -> List[str]:
+        """Lead files that were being processed when the last run stopped."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path FROM lead_files WHERE status = ? ORDER BY updated_at", (FILE_IN_PROGRESS,)
+            ).fetchall()
+        return [row['path'] for row in rows]
+
+
+_store: Optional[StateStore] = None
+_store_lock = threading.Lock()
+
+
+def get_state_store() -> StateStore:
+    """Process-wide StateStore, opened on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = StateStore()
+        return _store
+
+
+class FileProgress:
+    """
+    Tracks the contiguous prefix of fully processed rows of one lead file.
+
+    Rows finish out of order on the dialer pool; the watermark only advances
+    past a row once every earlier row is done, and is persisted every
+    `save_every` rows, so a resume never skips an unfinished lead.
+    """
+
+    def __init__(self, store: StateStore, path: str, start_row: int = 0, save_every: int = 100):
+        self.store = store
+        self.path = path
+        self.rows_done = start_row
+        self.save_every = save_every
+        self._saved = start_row
+        self.halted = False
+        self._finished = set()
+        self._lock = threading.Lock()
+
+    def mark_done(self, row: int) -> None:
+        with self._lock:
+            self._finished.add(row)
+            while self.rows_done in self._finished:
+                self._finished.remove(self.rows_done)
+                self.rows_done += 1
+            if not self.halted and self.rows_done - self._saved >= self.save_every:
+                self._saved = self.rows_done
+                self.store.mark_file_progress(self.path, self.rows_done)
+
+    def halt(self) -> None:
+        """Stop saving the watermark, e.g. once another process may be resuming the file."""
+        with self._lock:
+            self.halted = True
+
+    def finish(self) -> None:
+        with self._lock:
+            self.store.finish_file(self.path, self.rows_done)
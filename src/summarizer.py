@@ -1,9 +1,11 @@
-from transformers import pipeline
-import os
-import csv
+from record_writer import get_writer
+from analytics_store import record_event
 
 import logging
 from datetime import datetime
+from response_store import get_store
+from model_registry import registry
+import event_bus
 
 logging.basicConfig(
     level=logging.INFO,
@@ -14,9 +16,9 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
-
-RESPONSES_FILE = os.path.join(os.path.dirname(__file__), '..', 'logs', 'responses.csv')
+# BART is loaded on first use and shared through the model registry
+def summarizer(*args, **kwargs):
+    return registry.get("summarizer")(*args, **kwargs)
 
 def map_answer(answer):
     answer = answer.strip()
@@ -27,32 +29,31 @@ def map_answer(answer):
     else:
         return answer
 
-def read_responses(phone_number):
-    responses = []
-    with open(RESPONSES_FILE, 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if row['phone_number'] == phone_number:
-                responses.append(row)
-    return responses
-
-SUMMARIES_FILE = os.path.join(os.path.dirname(__file__), '..', 'logs', 'summaries.csv')
-
-
-def save_summary(phone_number, summary_text, action_items_list):
+def read_responses(phone_number, call_sid=None):
+    """Responses for one call when its CallSid is known, otherwise every response from the number."""
+    store = get_store()
+    if call_sid:
+        return store.by_call_sid(call_sid)
+    return store.by_phone(phone_number)
+
+def store_summary(row):
+    """Append a summary row to summaries.csv, the analytics store and the queryable response store."""
+    get_writer('summaries').write(row)
+    record_event('summaries', row)
+    get_store().add_summary(**row)
+    event_bus.publish(event_bus.SUMMARY, row)
+
+def save_summary(phone_number, summary_text, action_items_list, call_sid=None):
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    
-    file_exists = os.path.isfile(SUMMARIES_FILE)
-    with open(SUMMARIES_FILE, 'a', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=['phone_number', 'summary', 'action_items', 'timestamp'])
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow({
-            'phone_number': phone_number,
-            'summary': summary_text,
-            'action_items': "; ".join(action_items_list),
-            'timestamp': timestamp
-        })
+    row = {
+        'phone_number': phone_number,
+        'call_sid': call_sid or "",
+        'transcript': "",
+        'summary': summary_text,
+        'action_items': "; ".join(action_items_list),
+        'timestamp': timestamp
+    }
+    store_summary(row)
 
 def summarize_text(transcript_text):
     # Your existing pipeline call:
@@ -61,8 +62,10 @@ def summarize_text(transcript_text):
     return summary, action_items
 
 
-def summarize_responses(phone_number):
-    responses = read_responses(phone_number)
+def summarize_responses(phone_number, call_sid=None, responses=None):
+    """Summarize a call's answers; `responses` are taken from the call's session when given, else read from the store."""
+    if responses is None:
+        responses = read_responses(phone_number, call_sid)
     if not responses:
         return None
 
@@ -93,7 +96,7 @@ def summarize_responses(phone_number):
         "- Send a summary email."
     ]
 
-    save_summary(phone_number, summary, action_items)
+    save_summary(phone_number, summary, action_items, call_sid)
     result = f"Summary: {summary}\nAction Items:\n" + "\n".join(action_items)
     return result
 
@@ -0,0 +1,114 @@
+import time
+import signal
+import logging
+import subprocess
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Supervisor:
+    """
+    Run several long-lived child processes as one unit.
+
+    Children that exit are restarted with exponential backoff. SIGTERM and
+    SIGINT stop every child (SIGKILL after `stop_timeout`), and SIGHUP reloads
+    them: children with a reload signal receive it, the rest are restarted.
+    """
+
+    def __init__(self, commands: Dict[str, List[str]], reload_signals: Optional[Dict[str, int]] = None,
+                 restart_delay: float = 1.0, max_restart_delay: float = 30.0, stop_timeout: float = 30.0):
+        """
+        Args:
+            commands: Child name -> command line
+            reload_signals: Child name -> signal that makes it reload in place (e.g. SIGHUP for gunicorn)
+            restart_delay: Delay before the first restart of a crashed child, doubled per consecutive crash
+            max_restart_delay: Longest delay between restarts
+            stop_timeout: Seconds children get to exit on shutdown
+        """
+        self.commands = commands
+        self.reload_signals = reload_signals or {}
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.stop_timeout = stop_timeout
+        self._procs: Dict[str, subprocess.Popen] = {}
+        self._started_at: Dict[str, float] = {}
+        self._crashes: Dict[str, int] = {}
+        self._restart_at: Dict[str, float] = {}
+        self._stopping = False
+        self._reload = False
+
+    def _start(self, name: str) -> None:
+        # Own session, so terminal signals reach children only through the supervisor
+        self._procs[name] = subprocess.Popen(self.commands[name], start_new_session=True)
+        self._started_at[name] = time.monotonic()
+        logger.info(f"▶️ Started {name} (pid {self._procs[name].pid})")
+
+    def _on_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _on_hup(self, signum, frame) -> None:
+        self._reload = True
+
+    def _reload_children(self) -> None:
+        self._reload = False
+        for name, proc in self._procs.items():
+            if proc.poll() is not None:
+                continue
+            sig = self.reload_signals.get(name)
+            logger.info(f"🔄 Reloading {name}")
+            if sig is not None:
+                proc.send_signal(sig)
+            else:
+                # Restarted without backoff by the main loop
+                self._crashes[name] = 0
+                proc.terminate()
+
+    def _check_children(self) -> None:
+        now = time.monotonic()
+        for name, proc in list(self._procs.items()):
+            code = proc.poll()
+            if code is None:
+                continue
+            if name not in self._restart_at:
+                # A child that ran for a while before exiting starts a fresh backoff sequence
+                if now - self._started_at[name] > 60:
+                    self._crashes[name] = 0
+                delay = min(self.restart_delay * (2 ** self._crashes.get(name, 0)), self.max_restart_delay)
+                self._crashes[name] = self._crashes.get(name, 0) + 1
+                self._restart_at[name] = now + delay
+                logger.warning(f"⚠️ {name} exited with code {code}, restarting in {delay:.0f}s")
+            elif now >= self._restart_at[name]:
+                del self._restart_at[name]
+                self._start(name)
+
+    def _stop_children(self) -> None:
+        for name, proc in self._procs.items():
+            if proc.poll() is None:
+                logger.info(f"⏹️ Stopping {name}")
+                proc.terminate()
+        deadline = time.monotonic() + self.stop_timeout
+        for name, proc in self._procs.items():
+            try:
+                proc.wait(max(deadline - time.monotonic(), 0))
+            except subprocess.TimeoutExpired:
+                logger.warning(f"{name} did not stop in {self.stop_timeout}s, killing it")
+                proc.kill()
+                proc.wait()
+
+    def run(self) -> None:
+        """Start every child and supervise them until SIGTERM or SIGINT."""
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_hup)
+        for name in self.commands:
+            self._start(name)
+        try:
+            while not self._stopping:
+                if self._reload:
+                    self._reload_children()
+                self._check_children()
+                time.sleep(0.5)
+        finally:
+            self._stop_children()
+        logger.info("Supervisor stopped.")
@@ -1,25 +1,28 @@
 import os
-import torch
-from transformers import pipeline
 from datetime import datetime
+from model_registry import registry
+from transcription_service import TranscriptionService
 
-# Load model
-print("⏳ Loading Whisper model (openai/whisper-base)...")
-transcriber = pipeline("automatic-speech-recognition", model="openai/whisper-base", device=0 if torch.cuda.is_available() else "mps")
+# Whisper is loaded on first use and shared through the model registry
+def transcriber(*args, **kwargs):
+    return registry.get("whisper")(*args, **kwargs)
+
+# One batching service per process, shared by every caller of transcribe_audio
+transcription_service = TranscriptionService(
+    transcriber,
+    max_batch_size=int(os.getenv("TRANSCRIBE_MAX_BATCH", "8")),
+    max_wait=float(os.getenv("TRANSCRIBE_MAX_WAIT", "0.5"))
+)
 
 # Transcribe
 def transcribe_audio(audio_file):
     if isinstance(audio_file, list):
-        transcripts = []
-        for file in audio_file:
-            result = transcriber(file, return_timestamps=True)
-            text = result['text']  # Extract text
-            transcripts.append(text)
+        transcripts = transcription_service.transcribe_many(audio_file)
+        for file, text in zip(audio_file, transcripts):
             print(f"✅ Transcription for {file}: {text}")
         return transcripts
     else:
-        result = transcriber(audio_file, return_timestamps=True)
-        text = result['text']
+        text = transcription_service.transcribe(audio_file)
         print(f"✅ Transcription for {audio_file}: {text}")
         return text
 
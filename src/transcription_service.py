@@ -0,0 +1,114 @@
+import queue
+import time
+import threading
+import logging
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptionService:
+    """
+    Shared ASR front-end that batches recordings across calls.
+
+    Callers submit audio files and get a Future back. A single batcher thread
+    collects pending files until either max_batch_size is reached or the oldest
+    one has waited max_wait seconds, then runs them through the model in one
+    batched call.
+    """
+
+    def __init__(self, transcriber: Callable[..., Any], max_batch_size: int = 8, max_wait: float = 0.5):
+        """
+        Args:
+            transcriber: A transformers ASR pipeline (or any callable with the same interface)
+            max_batch_size: Largest number of recordings run through the model at once
+            max_wait: Longest time in seconds a recording waits for its batch to fill
+        """
+        self.transcriber = transcriber
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._pending: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="transcription-batcher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, audio_file: str) -> Future:
+        """Queue a recording for transcription; the Future resolves to its text."""
+        self.start()
+        future: Future = Future()
+        self._pending.put((audio_file, future))
+        return future
+
+    def transcribe(self, audio_file: str) -> str:
+        return self.submit(audio_file).result()
+
+    def transcribe_many(self, audio_files: List[str]) -> List[str]:
+        futures = [self.submit(f) for f in audio_files]
+        return [f.result() for f in futures]
+
+    def _next_batch(self) -> List[Tuple[str, Future]]:
+        try:
+            first = self._pending.get(timeout=0.5)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._pending.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if batch:
+                self._run_batch(batch)
+
+    def _run_batch(self, batch: List[Tuple[str, Future]]) -> None:
+        batch = [(f, fut) for f, fut in batch if fut.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        files = [f for f, _ in batch]
+        start = time.perf_counter()
+        try:
+            results = self.transcriber(files, batch_size=len(files), return_timestamps=True)
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            # Isolate the failing recording instead of failing the whole batch
+            logger.warning(f"Batch of {len(batch)} failed ({str(e)}), retrying one by one")
+            for item in batch:
+                self._run_single(*item)
+            return
+
+        elapsed = time.perf_counter() - start
+        logger.info(f"Transcribed batch of {len(files)} recordings in {elapsed:.2f}s")
+        for (_, future), result in zip(batch, results):
+            future.set_result(result['text'])
+
+    def _run_single(self, audio_file: str, future: Future) -> None:
+        try:
+            future.set_result(self.transcriber(audio_file, return_timestamps=True)['text'])
+        except Exception as e:
+            future.set_exception(e)
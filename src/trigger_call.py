@@ -1,45 +1,152 @@
-import threading
-import time
 import logging
-from typing import List, Dict, Any
+import threading
+from contextlib import nullcontext
+from typing import Callable, Iterable, List, Dict, Any, Iterator, Optional
 from .call_handler import call_handler
+from .dialer import DialingEngine, CallResult, TokenBucket
+from .pacer import Pacer
+from .retry_policy import RetryPolicy, RedialQueue, RedialMonitor, ATTEMPT_KEY
+from .scheduler import LeadScheduler, CallingWindows
+from .state_store import StateStore, get_state_store
 
 logger = logging.getLogger(__name__)
 
-def trigger_call_batch(leads: List[Dict[str, Any]], test_mode: bool = False) -> List[str]:
+def _leads_with_phone(leads: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Drop leads without a phone number before they reach the dialer."""
+    for lead in leads:
+        if not lead.get('phone', ''):
+            logger.error(f"❌ No phone number found for lead: {lead}")
+            continue
+        yield lead
+
+def make_pacer() -> Optional[Pacer]:
     """
-    Trigger calls for a batch of leads with rate limiting.
+    Predictive pacer from the `pacing` section of config.yaml, or None to dial at the fixed rate.
+
+    Pacing needs Twilio status callbacks (twilio.status_callback_url) to see calls answer and end.
+    """
+    settings = call_handler.config.get('pacing') or {}
+    if not settings.get('enabled'):
+        return None
+    if not call_handler.config['twilio'].get('status_callback_url'):
+        logger.warning("Pacing needs twilio.status_callback_url; dialing at the fixed calls_per_second")
+        return None
+    return Pacer.from_config(settings, max_rate=call_handler.calls_per_second)
+
+def make_scheduler(state_store: StateStore) -> Optional[LeadScheduler]:
+    """Calling-window scheduler from the `scheduling` section of config.yaml, or None to dial leads right away."""
+    settings = call_handler.config.get('scheduling')
+    if not settings or not settings.get('enabled', True):
+        return None
+    return LeadScheduler.from_config(settings, state_store)
+
+def make_redial_monitor(state_store: StateStore,
+                        scheduler: Optional[LeadScheduler] = None) -> Optional[RedialMonitor]:
+    """
+    Monitor scheduling redials of busy, unanswered and voicemail calls per the `retries` config,
+    or None if no call outcome is redialed.
+
+    Redials go into the calling-window scheduler if there is one, otherwise
+    into a scheduler whose window is always open. Call outcomes come from
+    Twilio status callbacks (twilio.status_callback_url).
+    """
+    policy = call_handler.retry_policy
+    if not policy.redials:
+        return None
+    if not call_handler.config['twilio'].get('status_callback_url'):
+        logger.warning("Redialing busy and unanswered calls needs twilio.status_callback_url")
+        return None
+    if scheduler is None:
+        scheduler = LeadScheduler(state_store, windows=CallingWindows({'default': ['00:00-24:00']}))
+    return RedialMonitor(policy, state_store, scheduler)
+
+def dial_leads(
+    leads: Iterable[Dict[str, Any]],
+    test_mode: bool = False,
+    on_result: Optional[Callable[[CallResult], None]] = None,
+    pacer: Optional[Pacer] = None,
+    state_store: Optional[StateStore] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    stop_event: Optional[threading.Event] = None,
+    limiter: Optional[TokenBucket] = None,
+    collect_results: bool = True
+) -> List[CallResult]:
+    """
+    Dial a batch of leads through a bounded, rate-limited worker pool.
+
+    A call creation that fails with a retryable error (API error, rate limit)
+    is not retried by the worker: the lead goes back into the batch after its
+    jittered backoff, and the worker moves on to the next lead.
     
     Args:
-        leads: List of lead dictionaries
+        leads: Iterable of lead dictionaries (may be a generator)
         test_mode: If True, use test phone numbers
+        on_result: Optional callback invoked for every CallResult as it completes
+        pacer: Optional predictive pacer that sets the call rate while dialing
+        state_store: Store the voice server records status callbacks in, for the pacer
+        retry_policy: Attempt limits and backoff per outcome, call_handler.retry_policy by default
+        stop_event: Optional event that stops dialing (and retrying) when set
+        limiter: Rate limiter shared with other dialers, instead of one at call_settings.calls_per_second
+        collect_results: If False, results only go to on_result, for endless streams of
+            leads (e.g. a scheduler's) that would otherwise keep every result in memory
         
     Returns:
-        List[str]: List of successful call SIDs
+        List[CallResult]: Final per-lead results (empty if not collected); on_result is only called with these too
     """
-    successful_calls = []
-    threads = []
-    
-    for lead in leads:
-        # Extract and validate phone number
-        phone = lead.get('phone', '')
-        if not phone:
-            logger.error(f"❌ No phone number found for lead: {lead}")
-            continue
-            
-        # Create and start thread for the call
-        t = threading.Thread(
-            target=lambda l: successful_calls.append(call_handler.place_call(l, test_mode)),
-            args=(lead,)
-        )
-        t.start()
-        threads.append(t)
-        
-        # Rate limiting - wait between calls
-        time.sleep(call_handler.rate_limit_delay)
+    retry_policy = retry_policy or call_handler.retry_policy
+    redials = RedialQueue()
+    results: List[CallResult] = []
+    results_lock = threading.Lock()
+    counts = {'dialed': 0, 'placed': 0}
+
+    def handle_result(result: CallResult) -> None:
+        if not result.success:
+            attempts = result.lead.get(ATTEMPT_KEY, 1)
+            delay = retry_policy.delay(result.outcome, attempts)
+            if delay is not None:
+                result.lead[ATTEMPT_KEY] = attempts + 1
+                logger.warning(f"Retrying {result.lead.get('phone')} ({result.outcome}) in {delay:.1f}s")
+                redials.push(result.lead, delay)
+                return
+        result.lead.pop(ATTEMPT_KEY, None)
+        redials.finished(result.lead)
+        with results_lock:
+            counts['dialed'] += 1
+            counts['placed'] += result.success
+            if collect_results:
+                results.append(result)
+        if pacer is not None and result.success:
+            pacer.on_dialed(result.call_sid)
+        if on_result is not None:
+            on_result(result)
+
+    engine = DialingEngine(
+        call_handler.create_call,
+        calls_per_second=pacer.max_rate if pacer is not None else call_handler.calls_per_second,
+        max_concurrent_calls=call_handler.max_concurrent_calls,
+        # A paced dialer starts slow instead of with a full second of calls
+        burst=1 if pacer is not None else None,
+        on_result=handle_result,
+        limiter=limiter
+    )
+    pacing = pacer.driving(engine.limiter, state_store or get_state_store()) if pacer is not None else nullcontext()
+    with pacing:
+        # Final results are collected above, after retries
+        engine.dial(redials.merge(_leads_with_phone(leads), stop_event), test_mode=test_mode,
+                    stop_event=stop_event, collect_results=False)
+    logger.info(f"Dialed {counts['dialed']} leads: {counts['placed']} placed, "
+                f"{counts['dialed'] - counts['placed']} failed")
+    return results
+
+def trigger_call_batch(leads: Iterable[Dict[str, Any]], test_mode: bool = False) -> List[str]:
+    """
+    Trigger calls for a batch of leads with rate limiting.
     
-    # Wait for all calls to complete
-    for t in threads:
-        t.join()
+    Args:
+        leads: Iterable of lead dictionaries
+        test_mode: If True, use test phone numbers
         
-    return [sid for sid in successful_calls if sid is not None]
+    Returns:
+        List[str]: List of successful call SIDs
+    """
+    return [r.call_sid for r in dial_leads(leads, test_mode) if r.success]
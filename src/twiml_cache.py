@@ -0,0 +1,81 @@
+import re
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+_SLOT_PATTERN = re.compile(r"__SLOT_(\w+?)__")
+_ATTR_ENTITIES = {'"': "&quot;", "'": "&apos;"}
+
+
+def slot(name: str) -> str:
+    """Placeholder to embed in TwiML text or attributes, filled in by CompiledTwiml.render()."""
+    return f"__SLOT_{name}__"
+
+
+class CompiledTwiml:
+    """
+    A serialized TwiML document split into static bytes and named slots.
+
+    Rendering only concatenates the static parts with the escaped slot values,
+    so no XML is built per request.
+    """
+
+    __slots__ = ('parts', 'slots')
+
+    def __init__(self, xml: str):
+        pieces = _SLOT_PATTERN.split(xml)
+        # Even indexes are literal XML, odd indexes are slot names
+        self.parts: List[Any] = [p.encode('utf-8') if i % 2 == 0 else p for i, p in enumerate(pieces)]
+        self.slots = frozenset(pieces[1::2])
+
+    def render(self, **values: str) -> bytes:
+        """Fill the slots with XML-escaped values; missing slots render empty."""
+        if not self.slots:
+            return self.parts[0]
+        out = []
+        for i, part in enumerate(self.parts):
+            if i % 2 == 0:
+                out.append(part)
+            else:
+                out.append(escape(values.get(part, ""), _ATTR_ENTITIES).encode('utf-8'))
+        return b"".join(out)
+
+
+def compile_twiml(response: Any) -> CompiledTwiml:
+    """Compile a twilio VoiceResponse (or any object whose str() is TwiML) built with slot() placeholders."""
+    return CompiledTwiml(str(response))
+
+
+class TwimlCache:
+    """
+    TwiML documents compiled once from a script and reused for every request.
+
+    The documents are rebuilt whenever the version passed to get() changes, such
+    as the fingerprint of a script reloaded after an edit.
+    """
+
+    def __init__(self, compile_script: Callable[[Any], Dict[Hashable, CompiledTwiml]]):
+        """
+        Args:
+            compile_script: Builds every document of a script, keyed by step or node
+        """
+        self._compile_script = compile_script
+        # (version, documents), replaced as one so readers never mix versions
+        self._current: Tuple[Optional[Hashable], Dict[Hashable, CompiledTwiml]] = (None, {})
+        self._lock = threading.Lock()
+
+    def get(self, script: Any, key: Hashable, version: Hashable) -> CompiledTwiml:
+        """
+        Compiled document `key` of `script`, recompiling the script if its version changed.
+
+        Args:
+            version: Identifies the contents of the script, e.g. Script.fingerprint
+        """
+        current_version, compiled = self._current
+        if version != current_version:
+            with self._lock:
+                current_version, compiled = self._current
+                if version != current_version:
+                    compiled = self._compile_script(script)
+                    self._current = (version, compiled)
+        return compiled[key]
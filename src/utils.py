@@ -4,6 +4,8 @@ import functools
 from typing import Any, Callable, TypeVar, Optional
 import logging
 from .logger import setup_logger
+from .lead_normalizer import normalize_phone
+from .retry_policy import backoff_delay
 
 logger = setup_logger(__name__)
 
@@ -23,7 +25,8 @@ def retry_with_backoff(
     backoff_in_seconds: int = 1,
     max_backoff_in_seconds: int = 60,
     exponential_base: int = 2,
-    logger: Optional[logging.Logger] = None
+    logger: Optional[logging.Logger] = None,
+    jitter: float = 0.0
 ) -> Callable:
     """
     Retry decorator with exponential backoff.
@@ -34,6 +37,8 @@ def retry_with_backoff(
         max_backoff_in_seconds: Maximum backoff time in seconds
         exponential_base: Base for exponential backoff
         logger: Optional logger instance
+        jitter: Randomized fraction of each backoff, 0 for none and 1 for full
+            jitter, so callers failing together do not retry in lockstep
     """
     def decorator(func: Callable[..., T]) -> Callable[..., T]:
         @functools.wraps(func)
@@ -48,15 +53,14 @@ def retry_with_backoff(
                             logger.error(f"Max retries ({retries}) reached. Error: {str(e)}")
                         raise
                     
-                    sleep_time = min(
-                        backoff_in_seconds * (exponential_base ** x),
-                        max_backoff_in_seconds
+                    sleep_time = backoff_delay(
+                        x + 1, backoff_in_seconds, max_backoff_in_seconds, exponential_base, jitter
                     )
                     
                     if logger:
                         logger.warning(
                             f"Attempt {x + 1}/{retries} failed. "
-                            f"Retrying in {sleep_time} seconds. Error: {str(e)}"
+                            f"Retrying in {sleep_time:.1f} seconds. Error: {str(e)}"
                         )
                     
                     time.sleep(sleep_time)
@@ -74,37 +78,18 @@ def validate_phone_number(phone: str) -> bool:
     Returns:
         bool: True if valid, False otherwise
     """
-    # Remove any non-digit characters
-    digits = ''.join(filter(str.isdigit, phone))
-    
-    # Check if it's a valid length (10 digits for US numbers)
-    if len(digits) != 10:
-        return False
-    
-    # Check if it starts with a valid US area code
-    area_code = int(digits[:3])
-    if area_code < 200 or area_code > 999:
-        return False
-    
-    return True
+    return normalize_phone(phone)[1] is None
 
 def format_phone_number(phone: str) -> str:
     """
     Format phone number to E.164 format.
     
+    Numbers without a country code are taken as North American (see lead_normalizer).
+    
     Args:
         phone: Phone number to format
         
     Returns:
-        str: Formatted phone number
+        str: Formatted phone number, "" if no E.164 number can be formed from it
     """
-    # Remove any non-digit characters
-    digits = ''.join(filter(str.isdigit, phone))
-    
-    # Add country code if not present
-    if len(digits) == 10:
-        return f"+1{digits}"
-    elif len(digits) == 11 and digits.startswith('1'):
-        return f"+{digits}"
-    
-    return f"+{digits}"
+    return normalize_phone(phone)[0]
@@ -1,12 +1,25 @@
-from flask import Flask, request, Response
+from flask import Flask, request, Response, jsonify, stream_with_context
 from twilio.twiml.voice_response import VoiceResponse, Gather
 import logging
 import os
-import csv
+import gzip
+import json
+import hashlib
+import threading
 from summarizer import summarize_responses
+from response_store import get_store, TABLES
+import analytics_store
+from urllib.parse import quote, urlencode
 from datetime import datetime
-from pipeline import process_call_pipeline
+from pipeline import process_call_pipeline, process_recording
 from flask import send_from_directory
+from job_queue import JobQueue
+from model_registry import registry
+import event_bus
+from twiml_cache import TwimlCache, compile_twiml, slot
+import script_engine
+from session_cache import SessionCache, CallSession, SESSIONS_DIR
+from state_store import get_state_store
 
 # Configure logging
 logging.basicConfig(
@@ -16,89 +29,221 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-LOG_FILE = os.path.join(os.path.dirname(__file__), '..', 'logs', 'responses.csv')
-
-def log_response(phone_number, question, answer, call_sid=None):
+def log_response(phone_number, question, answer, call_sid=None, campaign=""):
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    
-    fieldnames = ['phone_number', 'question', 'answer', 'timestamp', 'call_sid']
-    file_exists = os.path.isfile(LOG_FILE)
-    with open(LOG_FILE, 'a', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow({
+    get_store().add_response(phone_number, question, answer, call_sid, timestamp)
+    event_bus.publish(event_bus.RESPONSE, {
         'phone_number': phone_number,
         'question': question,
         'answer': answer,
         'timestamp': timestamp,
         'call_sid': call_sid or ""
     })
+    analytics_store.record_event('responses', {
+        'phone_number': phone_number,
+        'question': question,
+        'answer': answer,
+        'call_sid': call_sid,
+        'campaign': campaign,
+        'timestamp': timestamp
+    })
+
+def _compile_script(script):
+    """
+    Build the TwiML of every node of an IVR script once.
+
+    Question nodes are keyed (node_id, with_greeting); only the campaign in the
+    Gather action URL varies per call.
+    """
+    compiled = {}
+    for node in script.nodes.values():
+        if node.type == script_engine.QUESTION:
+            for with_greeting in ((False, True) if node.id == script.start and script.greeting else (False,)):
+                response = VoiceResponse()
+                gather = Gather(
+                    num_digits=node.num_digits,
+                    action=f"/voice?{urlencode({'script': script.name, 'node': node.id})}{slot('campaign')}",
+                    method="POST",
+                    timeout=node.timeout
+                )
+                if with_greeting:
+                    gather.say(script.greeting)
+                gather.say(node.prompt)
+                response.append(gather)
+                compiled[(node.id, with_greeting)] = compile_twiml(response)
+        elif node.type == script_engine.TRANSFER:
+            response = VoiceResponse()
+            if node.say:
+                response.say(node.say)
+            response.dial(
+                node.agent,
+                record="record-from-answer-dual",
+                action="/call-complete",
+                method="POST",
+                recording_status_callback="/recording-status",
+                recording_status_callback_event="completed",
+                recording_status_callback_method="POST"
+            )
+            compiled[node.id] = compile_twiml(response)
+        else:
+            response = VoiceResponse()
+            if node.say:
+                response.say(node.say)
+            response.hangup()
+            compiled[node.id] = compile_twiml(response)
+    return compiled
+
+
+# Validated at import so a broken script stops the server from starting
+scripts = script_engine.get_scripts()
+_twiml_caches = {name: TwimlCache(_compile_script) for name in scripts}
 
-# Map steps to questions
-QUESTIONS = {
-    1: "Have you visited a dentist in the last 6 months?",
-    2: "Do you currently have dental insurance?",
-    3: "Would you like to be connected with a dental care specialist now?"
-}
 
-AGENT_NUMBER = "+15856859955"  # Replace with your agent number
+def _twiml(script, key):
+    cache = _twiml_caches.get(script.name)
+    if cache is None:
+        # A script added since startup
+        cache = _twiml_caches.setdefault(script.name, TwimlCache(_compile_script))
+    return cache.get(script, key, version=script.fingerprint)
+
+
+def _legacy_node(script, step, answered):
+    """Node for the numeric ?step= URLs used before scripts: step N asks question N and receives the answer to N-1."""
+    index = step - 2 if answered else step - 1
+    return script.steps[index] if 0 <= index < len(script.steps) else None
+
+_error_response = VoiceResponse()
+_error_response.say("We're sorry, but we encountered an error. Please try your call again later.")
+ERROR_TWIML = str(_error_response).encode('utf-8')
 
 app = Flask(__name__)
 
+# Model inference and recording processing run on background workers so
+# webhooks can return TwiML immediately.
+jobs = JobQueue(workers=int(os.getenv("JOB_WORKERS", "2")))
+jobs.register("summarize_responses", lambda p: summarize_responses(
+    p["phone_number"], p.get("call_sid"), p.get("responses")))
+
+# Answers of calls in progress, so the IVR never re-reads them from disk
+sessions = SessionCache(
+    max_sessions=int(os.getenv("SESSION_MAX_CALLS", "10000")),
+    ttl=int(os.getenv("SESSION_TTL", "3600")),
+    spill_dir=SESSIONS_DIR if os.getenv("SESSION_SPILL", "0") == "1" else None,
+    loader=lambda call_sid: get_store().by_call_sid(call_sid)
+)
+jobs.register("process_recording", lambda p: process_recording(
+    p["call_sid"], p["phone_number"], p["recording_sid"], p["recording_url"], p.get("account_sid")))
+
+# Seconds after /call-complete before polling for a recording whose status callback never arrived
+RECORDING_SWEEP_DELAY = int(os.getenv("RECORDING_SWEEP_DELAY", "300"))
+
+def recording_sweep(payload):
+    """Fallback for calls whose recording-status callback never arrived."""
+    call_sid = payload["call_sid"]
+    if jobs.find("process_recording", call_sid):
+        return "handled by recording callback"
+    logger.warning(f"No recording callback for CallSid {call_sid}, polling recordings list")
+    process_call_pipeline(call_sid, payload["phone_number"], payload.get("account_sid"))
+    return "processed by sweep"
+
+jobs.register("recording_sweep", recording_sweep)
+
+_background_started = False
+# serve.py runs the job consumers in one separate process (RUN_JOBS=0 in its web workers),
+# so the models they load exist once instead of once per worker
+RUN_JOBS = os.getenv("RUN_JOBS", "1") == "1"
+
+def after_fork():
+    """Re-create per-process state in a server worker forked from a preloading master (see serve.py)."""
+    jobs.reopen()
+    # Workers share events through SQLite so /events clients see webhooks handled by any worker
+    event_bus.bus.use_shared_log()
+
+@app.before_request
+def start_background_workers():
+    # Started lazily so only processes that serve requests run workers
+    global _background_started
+    if RUN_JOBS:
+        jobs.start()
+    if not _background_started:
+        _background_started = True
+        analytics_store.get_store().start_compactor(int(os.getenv("ANALYTICS_COMPACT_INTERVAL", "300")))
+        if RUN_JOBS and os.getenv("MODEL_WARMUP", "1") == "1":
+            registry.warm_up(["summarizer"])
+
+def start_jobs(preload_models=False):
+    """Start the job consumers of a dedicated jobs process (see serve.py --jobs)."""
+    jobs.start()
+    if preload_models:
+        # Every model the jobs use, before the first job arrives
+        registry.warm_up(background=False)
+    elif os.getenv("MODEL_WARMUP", "1") == "1":
+        registry.warm_up(["summarizer"])
+
 @app.route("/voice", methods=["POST"])
 def voice():
     try:
-        step_raw = request.args.get("step", "1")
-        try:
-            step = int(step_raw)
-        except ValueError:
-            step = 1
-
         digits = request.form.get("Digits")
         from_number = request.form.get("From", "Unknown")
         call_sid = request.form.get("CallSid")
+        # Optional campaign tag from the call's TwiML URL, carried through every step
+        campaign = request.args.get("campaign", "")
 
-        # Log any user input
-        if digits and (step - 1) in QUESTIONS:
-            log_response(from_number, QUESTIONS[step - 1], digits, call_sid)
-            logger.info(f"📞 Logged response from {from_number}: {QUESTIONS[step - 1]} -> {digits}")
+        script = script_engine.get_script(request.args.get("script") or None)
+        node_id = request.args.get("node")
+        if node_id is None and request.args.get("step", "").isdigit():
+            node_id = _legacy_node(script, int(request.args["step"]), bool(digits))
+        # The first request of a call has no node and starts the script
+        node = script.node(node_id)
+        with_greeting = node_id is None and bool(script.greeting)
 
-        response = VoiceResponse()
+        if call_sid and node_id is None:
+            session = sessions.start(call_sid, phone_number=from_number, script=script.name, campaign=campaign)
+        elif call_sid:
+            session = sessions.session_at(call_sid, node_id, phone_number=from_number,
+                                          script=script.name, campaign=campaign)
+        else:
+            session = CallSession("", from_number, script.name, campaign, node_id)
 
-        if step in QUESTIONS:
-            gather = Gather(
-                num_digits=1,
-                action=f"/voice?step={step + 1}",
-                method="POST",
-                timeout=10
+        # Record the answer to the node's question and move on
+        if digits and node_id is not None and node.type == script_engine.QUESTION:
+            if session.add_answer(node.prompt, digits):
+                log_response(from_number, node.prompt, digits, call_sid, campaign)
+                logger.info(f"📞 Logged response from {from_number}: {node.prompt} -> {digits}")
+            node = script.next_node(node.id, digits)
+
+        if node.type == script_engine.QUESTION:
+            session.node = node.id
+            twiml = _twiml(script, (node.id, with_greeting)).render(
+                campaign=f"&campaign={quote(campaign)}" if campaign else ""
             )
-            gather.say(QUESTIONS[step])
-            response.append(gather)
         else:
-            summary_result = summarize_responses(from_number)
-            if summary_result:
-                logger.info(f"Generated summary for {from_number}:\n{summary_result}")
+            # The summary is built from the answers in the session, with no store reads
+            job_id = jobs.enqueue("summarize_responses", {
+                "phone_number": from_number,
+                "call_sid": call_sid,
+                "responses": session.responses()
+            }, key=call_sid)
+            logger.info(f"Queued summary job {job_id} for {from_number}")
+            sessions.discard(call_sid)
 
-            response.say("Thank you. Please hold while I transfer you to a live agent.")
-            response.dial(
-                AGENT_NUMBER,
-                record="record-from-answer-dual",
-                action="/call-complete",
-                method="POST"
-            )
+            twiml = _twiml(script, node.id).render()
 
-            logger.info(f"📞 Final CallSid for agent transfer (to fetch recording later): {call_sid}")
+            if node.type == script_engine.TRANSFER:
+                logger.info(f"📞 Final CallSid for agent transfer (to fetch recording later): {call_sid}")
+                event_bus.publish(event_bus.TRANSFER, {
+                    'phone_number': from_number,
+                    'call_sid': call_sid,
+                    'agent': node.agent,
+                    'answers': len(session.answers)
+                })
 
-        twiml_response = str(response)
-        logger.info("Generated TwiML: %s", twiml_response)
-        return Response(twiml_response, mimetype="text/xml")
+        logger.debug("Generated TwiML: %s", twiml)
+        return Response(twiml, mimetype="text/xml")
 
     except Exception as e:
         logger.error("Error in voice endpoint: %s", str(e))
-        response = VoiceResponse()
-        response.say("We're sorry, but we encountered an error. Please try your call again later.")
-        return Response(str(response), mimetype="text/xml")
+        return Response(ERROR_TWIML, mimetype="text/xml")
 
 @app.route("/call-complete", methods=["POST"])
 def call_complete():
@@ -106,12 +251,212 @@ def call_complete():
     from_number = request.form.get("From")
     logger.info(f"📞 Call complete! CallSid: {call_sid}, From: {from_number}")
 
-    # Kick off the pipeline
-    process_call_pipeline(call_sid, from_number)
+    # Recordings are processed from /recording-status; only sweep later in case that callback is lost
+    # The account the call was placed from, whose recordings list to poll
+    job_id = jobs.enqueue("recording_sweep", {"call_sid": call_sid, "phone_number": from_number,
+                                              "account_sid": request.form.get("AccountSid")},
+                          key=call_sid, delay=RECORDING_SWEEP_DELAY)
+    logger.info(f"Queued fallback recording sweep {job_id} for CallSid: {call_sid}")
+
+    return "OK", 200
+
+
+@app.route("/call-status", methods=["POST"])
+def call_status():
+    """Twilio status callback for outbound calls (twilio.status_callback_url in config.yaml)."""
+    call_sid = request.form.get("CallSid")
+    status = request.form.get("CallStatus")
+    logger.info(f"📶 CallSid {call_sid}: {status}")
+    if call_sid and status:
+        # The dialer's pacer reads answer rates and handle times from these, its redial monitor outcomes
+        try:
+            duration = request.form.get("CallDuration")
+            get_state_store().record_call_event(call_sid, status, float(duration) if duration else None,
+                                                answered_by=request.form.get("AnsweredBy"))
+        except Exception as e:
+            logger.error(f"Failed to record status of {call_sid}: {str(e)}")
+    event_bus.publish(event_bus.CALL_STATUS, {
+        'call_sid': call_sid,
+        'status': status,
+        'phone_number': request.form.get("To"),
+        'duration': request.form.get("CallDuration"),
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    })
+    return "OK", 200
+
+
+# Seconds between keep-alive comments on idle event streams
+EVENTS_KEEPALIVE = 15
+# Open /events streams per process; each holds a server thread, so the rest stay free for Twilio webhooks
+MAX_EVENT_STREAMS = int(os.getenv("MAX_EVENT_STREAMS", "2"))
+_event_streams = threading.BoundedSemaphore(MAX_EVENT_STREAMS)
+
+
+@app.route("/events", methods=["GET"])
+def events():
+    """
+    Server-Sent Events stream of call lifecycle events.
+
+    `?kinds=response,summary` limits the stream to some kinds. Reconnecting
+    clients resume from their Last-Event-ID; a `resync` event means events
+    were missed and the client should refetch. Beyond MAX_EVENT_STREAMS
+    open streams the request gets a 503.
+    """
+    if not _event_streams.acquire(blocking=False):
+        logger.warning(f"Refused /events stream: {MAX_EVENT_STREAMS} already open in this process")
+        return Response("Too many event streams\n", status=503, headers={"Retry-After": "30"})
+    kinds = [k for k in request.args.get("kinds", "").split(",") if k] or None
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    subscription = event_bus.bus.subscribe(kinds, last_event_id)
+
+    def stream():
+        try:
+            yield "retry: 3000\n\n"
+            while not subscription.closed:
+                batch = subscription.get(timeout=EVENTS_KEEPALIVE)
+                if not batch:
+                    yield ": keep-alive\n\n"
+                for event in batch:
+                    yield event_bus.format_sse(event)
+        finally:
+            subscription.close()
+
+    response = Response(stream_with_context(stream()), mimetype="text/event-stream")
+    # Runs even if the client goes away before the stream starts
+    response.call_on_close(_event_streams.release)
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"  # keep reverse proxies from buffering the stream
+    return response
+
+
+@app.route("/recording-status", methods=["POST"])
+def recording_status():
+    call_sid = request.form.get("CallSid")
+    recording_sid = request.form.get("RecordingSid")
+    recording_url = request.form.get("RecordingUrl")
+    status = request.form.get("RecordingStatus")
+    logger.info(f"🎙️ Recording {recording_sid} for CallSid {call_sid}: {status}")
+
+    if status != "completed" or not recording_url:
+        return "OK", 200
+
+    responses = get_store().by_call_sid(call_sid) if call_sid else []
+    phone_number = responses[0]["phone_number"] if responses else "Unknown"
+    event_bus.publish(event_bus.RECORDING, {
+        'phone_number': phone_number,
+        'call_sid': call_sid,
+        'recording_sid': recording_sid,
+        'duration': request.form.get("RecordingDuration")
+    })
+    job_id = jobs.enqueue("process_recording", {
+        "call_sid": call_sid,
+        "phone_number": phone_number,
+        "recording_sid": recording_sid,
+        "recording_url": recording_url,
+        "account_sid": request.form.get("AccountSid")
+    }, key=call_sid)
+    logger.info(f"Queued processing job {job_id} for recording {recording_sid}")
 
     return "OK", 200
 
 
+@app.route("/jobs/<int:job_id>", methods=["GET"])
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+
+@app.route("/models", methods=["GET"])
+def model_stats():
+    return jsonify(registry.stats())
+
+
+@app.route("/sessions", methods=["GET"])
+def session_stats():
+    return jsonify(sessions.stats())
+
+
+@app.route("/jobs", methods=["GET"])
+def job_counts():
+    return jsonify(jobs.counts())
+
+
+LOGS_PAGE_SIZE = 50
+LOGS_MAX_PAGE_SIZE = 500
+GZIP_MIN_BYTES = 1024
+
+
+def _int_arg(name, default, minimum=1, maximum=None):
+    try:
+        value = int(request.args.get(name, default))
+    except ValueError:
+        value = default
+    value = max(value, minimum)
+    return min(value, maximum) if maximum else value
+
+
+@app.route("/api/logs/<log>", methods=["GET"])
+def query_logs(log):
+    """
+    One page of a log as JSON.
+
+    Query parameters: page, page_size, phone, call_sid, date_from, date_to
+    (YYYY-MM-DD, inclusive), sort (any column) and order (asc|desc).
+    Responses carry an ETag that changes whenever a row is added, so polling
+    clients get a 304 while nothing is new.
+    """
+    if log not in TABLES:
+        return jsonify({"error": f"Unknown log '{log}'"}), 404
+    sort = request.args.get("sort", "timestamp")
+    if sort not in TABLES[log]:
+        return jsonify({"error": f"Cannot sort {log} by '{sort}'"}), 400
+
+    store = get_store()
+    etag = hashlib.sha1(
+        f"{log}:{store.version(log)}:{request.query_string.decode()}".encode()
+    ).hexdigest()
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag, weak=True)
+        return response
+
+    page = _int_arg("page", 1)
+    page_size = _int_arg("page_size", LOGS_PAGE_SIZE, maximum=LOGS_MAX_PAGE_SIZE)
+    items, total = store.query(
+        log,
+        phone_number=request.args.get("phone"),
+        call_sid=request.args.get("call_sid"),
+        date_from=request.args.get("date_from"),
+        date_to=request.args.get("date_to"),
+        sort=sort,
+        descending=request.args.get("order", "desc").lower() != "asc",
+        limit=page_size,
+        offset=(page - 1) * page_size
+    )
+
+    body = json.dumps({
+        "items": items,
+        "page": page,
+        "page_size": page_size,
+        "total": total,
+        "pages": (total + page_size - 1) // page_size
+    }).encode()
+    response = Response(body, mimetype="application/json")
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = "no-cache"
+    response.vary.add("Accept-Encoding")
+    if len(body) >= GZIP_MIN_BYTES and "gzip" in request.headers.get("Accept-Encoding", ""):
+        response.set_data(gzip.compress(body, compresslevel=5))
+        response.headers["Content-Encoding"] = "gzip"
+    return response
+
+
 @app.route("/logs/<path:filename>")
 def serve_logs(filename):
     logs_dir = os.path.join(os.path.dirname(__file__), '..', 'logs')
@@ -124,4 +469,5 @@ def home():
     return "Flask Twilio Voice Server is running. POST to /voice for TwiML."
 
 if __name__ == "__main__":
-    app.run(host='0.0.0.0', port=5001, debug=True)
+    # Development server; use serve.py in production
+    app.run(host='0.0.0.0', port=5001, debug=os.getenv("FLASK_DEBUG", "1") == "1")
@@ -3,9 +3,15 @@ from watchdog.events import FileSystemEventHandler
 import pandas as pd
 import time
 import os
+import json
 import logging
-from typing import List, Dict, Any
-from .trigger_call import trigger_call_batch
+import threading
+from typing import Dict, Any, Iterator, Optional
+from .trigger_call import dial_leads, make_pacer, make_scheduler, make_redial_monitor
+from .dialer import CallResult
+from .state_store import StateStore, FileProgress
+from .scheduler import LeadScheduler, SOURCE_KEY
+from .lead_normalizer import LeadNormalizer, last_rejected_row, rejects_path, write_rejects
 
 # Configure logging
 logging.basicConfig(
@@ -15,66 +21,246 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 WATCH_DIR = "leads"
+REQUIRED_COLUMNS = ['name', 'phone']
+# Rows parsed per pandas chunk when streaming a lead file
+CHUNK_SIZE = 1000
+
+# Key under which a lead carries its row index in the source file
+ROW_KEY = '_source_row'
 
 class LeadHandler(FileSystemEventHandler):
-    def __init__(self):
+    def __init__(self, state_store: Optional[StateStore] = None):
         """Initialize the lead handler."""
+        self.state_store = state_store or StateStore()
+        # Shared by every lead file so answer-rate and handle-time estimates carry over
+        self.pacer = make_pacer()
+        # With calling windows configured, leads are queued and dialed as their windows open
+        self.scheduler = make_scheduler(self.state_store)
+        # Schedules redials of busy, unanswered and voicemail calls from their status callbacks
+        self.redial_monitor = make_redial_monitor(self.state_store, self.scheduler)
         # Ensure the watch directory exists
         if not os.path.exists(WATCH_DIR):
             os.makedirs(WATCH_DIR)
             logger.info(f"Created watch directory: {WATCH_DIR}")
 
     def _validate_csv(self, file_path: str) -> bool:
-        """Validate that the CSV file has the required columns."""
+        """Validate that the CSV file has the required columns (reads the header only)."""
         try:
-            df = pd.read_csv(file_path)
-            required_columns = ['name', 'phone']
-            if not all(col in df.columns for col in required_columns):
-                logger.error(f"CSV file {file_path} missing required columns: {required_columns}")
+            columns = pd.read_csv(file_path, nrows=0).columns
+            if not all(col in columns for col in REQUIRED_COLUMNS):
+                logger.error(f"CSV file {file_path} missing required columns: {REQUIRED_COLUMNS}")
                 return False
             return True
         except Exception as e:
             logger.error(f"Error validating CSV file {file_path}: {str(e)}")
             return False
 
-    def _process_leads(self, file_path: str) -> List[Dict[str, Any]]:
-        """Process leads from a CSV file."""
-        try:
-            if not self._validate_csv(file_path):
-                return []
+    def _iter_leads(self, file_path: str, chunk_size: int = CHUNK_SIZE, skip_rows: int = 0,
+                    progress: Optional[FileProgress] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream normalized leads from a CSV file in bounded chunks.
+
+        The header is validated once; rows are then parsed CHUNK_SIZE at a time,
+        their phone numbers normalized to E.164 a whole chunk at once, and the
+        dialable ones yielded one by one, so memory stays flat regardless of file
+        size and the dialer can start on the first chunk while the rest is still
+        unread. Invalid and duplicate numbers go to the file's reject CSV and are
+        marked done in `progress`. Each lead carries its 0-based data row index under ROW_KEY.
+
+        When resuming after `skip_rows`, the numbers of the skipped rows still
+        count for duplicate detection, and rejects an earlier run already wrote
+        are not written again.
+        """
+        if not self._validate_csv(file_path):
+            return
 
-            df = pd.read_csv(file_path)
-            leads = df.to_dict(orient='records')
-            logger.info(f"Successfully loaded {len(leads)} leads from {file_path}")
-            return leads
+        count = 0
+        normalizer = LeadNormalizer()
+        reject_file = rejects_path(file_path)
+        skip = range(1, skip_rows + 1) if skip_rows else None
+        # Rejects are written in row order, so rows up to the last one in the file are already there
+        rejected_through = -1
+        try:
+            if skip_rows:
+                rejected_through = last_rejected_row(reject_file, ROW_KEY)
+                for chunk in pd.read_csv(file_path, chunksize=chunk_size, dtype={'phone': str},
+                                         usecols=['phone'], nrows=skip_rows):
+                    normalizer.remember(chunk['phone'])
+            elif os.path.exists(reject_file):
+                # A new or changed file starts its rejects over
+                os.remove(reject_file)
+            for chunk in pd.read_csv(file_path, chunksize=chunk_size, dtype={'phone': str}, skiprows=skip):
+                chunk[ROW_KEY] = range(skip_rows + count, skip_rows + count + len(chunk))
+                count += len(chunk)
+                leads, rejects = normalizer.normalize(chunk)
+                if not rejects.empty:
+                    write_rejects(rejects[rejects[ROW_KEY] > rejected_through], reject_file)
+                    if progress is not None:
+                        for row in rejects[ROW_KEY]:
+                            progress.mark_done(row)
+                for lead in leads.to_dict(orient='records'):
+                    yield lead
         except Exception as e:
-            logger.error(f"Error processing leads from {file_path}: {str(e)}")
-            return []
+            logger.error(f"Error processing leads from {file_path} after {count} rows: {str(e)}")
+        logger.info(f"Streamed {count} leads from {file_path}")
+        if normalizer.rejected:
+            logger.warning(f"Rejected {normalizer.rejected} invalid or duplicate numbers from {file_path}, "
+                           f"see {reject_file}")
+
+    def _wait_until_written(self, file_path: str, poll_interval: float = 0.05, timeout: float = 5.0) -> None:
+        """Block until the file size stops changing between two polls."""
+        deadline = time.monotonic() + timeout
+        last_size = -1
+        while time.monotonic() < deadline:
+            try:
+                size = os.path.getsize(file_path)
+            except OSError:
+                size = -1
+            if size > 0 and size == last_size:
+                return
+            last_size = size
+            time.sleep(poll_interval)
+
+    def _lead_json(self, lead: Dict[str, Any]) -> str:
+        """A lead as stored with its claim, for redials."""
+        return json.dumps({k: v for k, v in lead.items() if k != ROW_KEY}, default=str)
+
+    def _new_leads(self, leads: Iterator[Dict[str, Any]], file_path: str,
+                   progress: FileProgress) -> Iterator[Dict[str, Any]]:
+        """Claim each lead's number in the state store, skipping ones already dialed."""
+        skipped = 0
+        for lead in leads:
+            if not self.state_store.claim_lead(lead['phone'], lead.get('name'), file_path, self._lead_json(lead)):
+                skipped += 1
+                progress.mark_done(lead[ROW_KEY])
+                continue
+            yield lead
+        if skipped:
+            logger.info(f"Skipped {skipped} already-dialed numbers from {file_path}")
+
+    def _schedule_leads(self, leads: Iterator[Dict[str, Any]], file_path: str, progress: FileProgress) -> None:
+        """Queue new leads in the scheduler, persisting them a chunk at a time."""
+        batch = []
+        scheduled = skipped = 0
+
+        def flush() -> None:
+            nonlocal scheduled
+            scheduled += self.scheduler.add_many(batch)
+            # Scheduled leads are durable, so their rows count as processed
+            for lead in batch:
+                progress.mark_done(lead[ROW_KEY])
+            batch.clear()
+
+        for lead in leads:
+            if self.state_store.is_known(lead['phone']):
+                skipped += 1
+                progress.mark_done(lead[ROW_KEY])
+                continue
+            lead[SOURCE_KEY] = file_path
+            batch.append(lead)
+            if len(batch) >= CHUNK_SIZE:
+                flush()
+        flush()
+        logger.info(f"🗓️ Scheduled {scheduled} leads from {file_path} ({skipped} already dialed), "
+                    f"{len(self.scheduler)} waiting for their calling windows")
+
+    @property
+    def dispatch_scheduler(self) -> Optional[LeadScheduler]:
+        """Scheduler releasing leads (and redials) to dial, None if leads are dialed straight from their files."""
+        if self.scheduler is not None:
+            return self.scheduler
+        return self.redial_monitor.scheduler if self.redial_monitor is not None else None
+
+    def _claim_scheduled(self, leads: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Claim released leads in the state store, dropping ones dialed since they were scheduled."""
+        scheduler = self.dispatch_scheduler
+        for lead in leads:
+            if self.state_store.claim_lead(lead['phone'], lead.get('name'), lead.get(SOURCE_KEY),
+                                           self._lead_json(lead)):
+                yield lead
+            else:
+                scheduler.done(lead['phone'])
+
+    def dispatch_scheduled(self, stop_event: threading.Event) -> None:
+        """Dial scheduled leads and redials as they come due, until stop_event is set."""
+        scheduler = self.dispatch_scheduler
+        scheduler.restore()
+
+        def on_result(result: CallResult) -> None:
+            self.state_store.record_result(result.lead['phone'], result.call_sid, result.error)
+            scheduler.done(result.lead['phone'])
+
+        # Runs for the life of the service, so results are not kept
+        dial_leads(self._claim_scheduled(scheduler.iter_ready(stop_event)), on_result=on_result,
+                   pacer=self.pacer, state_store=self.state_store, stop_event=stop_event, collect_results=False)
+
+    def process_file(self, file_path: str) -> None:
+        """Dial (or schedule) all new leads in a file, resuming after the last processed row."""
+        start_row = self.state_store.start_file(file_path)
+        if start_row:
+            logger.info(f"Resuming {file_path} from row {start_row}")
+        progress = FileProgress(self.state_store, file_path, start_row)
+
+        if self.scheduler is not None:
+            self._schedule_leads(self._iter_leads(file_path, skip_rows=start_row, progress=progress),
+                                 file_path, progress)
+            progress.finish()
+            return
+
+        def on_result(result: CallResult) -> None:
+            self.state_store.record_result(result.lead['phone'], result.call_sid, result.error)
+            progress.mark_done(result.lead[ROW_KEY])
+
+        leads = self._iter_leads(file_path, skip_rows=start_row, progress=progress)
+        results = dial_leads(self._new_leads(leads, file_path, progress), on_result=on_result,
+                             pacer=self.pacer, state_store=self.state_store)
+        progress.finish()
+        if not any(r.success for r in results):
+            logger.warning(f"No calls placed for leads in {file_path}")
+
+    def resume_unfinished(self) -> None:
+        """Pick up lead files that were mid-way through when the last run stopped."""
+        self.state_store.reset_inflight()
+        for file_path in self.state_store.unfinished_files():
+            if os.path.exists(file_path):
+                self.process_file(file_path)
+            else:
+                logger.warning(f"Unfinished lead file {file_path} no longer exists")
+
+    def run_background(self, stop_event: threading.Event) -> None:
+        """Resume interrupted lead files, then dial scheduled leads and redials if there are any."""
+        if self.redial_monitor is not None:
+            threading.Thread(target=self.redial_monitor.follow, args=(stop_event,),
+                             name="redial-monitor", daemon=True).start()
+        self.resume_unfinished()
+        if self.dispatch_scheduler is not None:
+            self.dispatch_scheduled(stop_event)
 
     def on_created(self, event):
         """Handle new file creation events."""
         if event.src_path.endswith(".csv"):
             logger.info(f"📁 New lead file detected: {event.src_path}")
             
-            # Wait a moment to ensure file is completely written
-            time.sleep(1)
+            # Make sure the file is completely written before streaming it
+            self._wait_until_written(event.src_path)
             
-            leads = self._process_leads(event.src_path)
-            if leads:
-                logger.info(f"Processing {len(leads)} leads from {event.src_path}")
-                trigger_call_batch(leads)
-            else:
-                logger.warning(f"No valid leads found in {event.src_path}")
+            logger.info(f"Processing leads from {event.src_path}")
+            self.process_file(event.src_path)
 
 def run():
     """Run the file watcher."""
     event_handler = LeadHandler()
     observer = Observer()
+    stop_event = threading.Event()
     
     try:
         observer.schedule(event_handler, WATCH_DIR, recursive=False)
         observer.start()
         logger.info(f"🟢 Watching {WATCH_DIR} for new leads...")
+
+        # Resume interrupted lead files (and dial scheduled leads) alongside watching for new ones
+        threading.Thread(target=event_handler.run_background, args=(stop_event,),
+                         name="lead-background", daemon=True).start()
         
         while True:
             time.sleep(1)
@@ -85,5 +271,6 @@ def run():
         logger.error(f"Error in watcher: {str(e)}")
         observer.stop()
     finally:
+        stop_event.set()
         observer.join()
         logger.info("Watcher stopped.")
@@ -0,0 +1,27 @@
+import importlib
+import os
+
+import pytest
+
+# call_handler reads config.yaml from the working directory when first imported
+CONFIG = """
+twilio: {account_sid: ACtest, auth_token: test, phone_number: '+15550000000', twiml_url: 'http://localhost/voice'}
+call_settings: {calls_per_second: 10, max_concurrent_calls: 2}
+"""
+
+
+@pytest.fixture(scope='session')
+def import_with_config(tmp_path_factory):
+    """Import a module of the package that loads config.yaml at import time."""
+    directory = tmp_path_factory.mktemp('config')
+    (directory / 'config.yaml').write_text(CONFIG)
+
+    def import_module(name):
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            return importlib.import_module(name)
+        finally:
+            os.chdir(cwd)
+
+    return import_module
@@ -0,0 +1,88 @@
+import pytest
+
+from src.caller_pool import ROUND_ROBIN, CallerId, CallerPool, TwilioAccount, account_settings
+
+TWILIO = {
+    'account_sid': 'AC1', 'auth_token': 'token1', 'phone_number': '+15550000001',
+    'number_calls_per_second': 1,
+    'accounts': [
+        {'account_sid': 'AC1', 'auth_token': 'token1', 'numbers': ['+15550000001', '+15550000002']},
+        {'account_sid': 'AC2', 'auth_token': 'token2', 'calls_per_second': 5,
+         'numbers': [{'number': '+15550000003', 'calls_per_second': 2}]},
+    ],
+}
+
+
+def make_pool(*rates, strategy='least_loaded', account_rate=None):
+    account = TwilioAccount('AC1', client=None, calls_per_second=account_rate)
+    account.numbers = [CallerId(f"+1555000000{i}", account, rate) for i, rate in enumerate(rates)]
+    return CallerPool([account], strategy)
+
+
+# Config
+
+def test_account_settings_default_to_the_single_account(monkeypatch):
+    monkeypatch.delenv('TWILIO_ACCOUNT_SID', raising=False)
+    monkeypatch.setenv('TWILIO_AUTH_TOKEN', 'from env')
+    single = {key: TWILIO[key] for key in ('account_sid', 'auth_token', 'phone_number')}
+
+    [account] = account_settings(single)
+    assert (account['account_sid'], account['auth_token']) == ('AC1', 'from env')
+    assert account['numbers'] == [{'number': '+15550000001', 'calls_per_second': None}]
+
+
+def test_pool_from_config():
+    clients = []
+    pool = CallerPool.from_config(TWILIO, lambda sid, token: clients.append((sid, token)) or sid)
+
+    assert clients == [('AC1', 'token1'), ('AC2', 'token2')]
+    assert [(caller.number, caller.account.client) for caller in pool.callers] == [
+        ('+15550000001', 'AC1'), ('+15550000002', 'AC1'), ('+15550000003', 'AC2')]
+    # Two numbers at the default 1 CPS, plus the second account's number at 2
+    assert pool.rate == 4
+
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(ValueError):
+        make_pool(1, strategy='random')
+
+
+# Selection
+
+def test_least_loaded_spreads_calls_in_flight():
+    pool = make_pool(None, None, None)
+
+    callers = [pool.acquire() for _ in range(3)]
+    assert len({caller.number for caller in callers}) == 3
+
+    pool.release(callers[1], placed=True)
+    assert pool.acquire() is callers[1]
+    assert [stats['placed'] for stats in pool.stats()] == [0, 1, 0]
+
+
+def test_round_robin_takes_numbers_in_turn():
+    pool = make_pool(None, None, strategy=ROUND_ROBIN)
+
+    numbers = []
+    for _ in range(4):
+        caller = pool.acquire()
+        numbers.append(caller.number)
+        pool.release(caller, placed=False)
+    assert numbers == ['+15550000000', '+15550000001'] * 2
+
+
+def test_numbers_at_their_limit_are_skipped():
+    pool = make_pool(0.01, 0.01)
+
+    first, second = pool.acquire(), pool.acquire()
+    assert first is not second
+    caller, wait = pool._pick()
+    assert caller is None and wait > 0
+
+
+def test_account_limit_caps_its_numbers():
+    pool = make_pool(None, None, account_rate=0.01)
+
+    pool.acquire()
+    assert pool._pick()[0] is None
+    assert pool.rate == 0.01
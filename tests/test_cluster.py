@@ -0,0 +1,123 @@
+import time
+
+import pytest
+
+
+@pytest.fixture(scope='module')
+def cluster(import_with_config):
+    return import_with_config('src.cluster')
+
+
+@pytest.fixture
+def store(cluster, tmp_path):
+    store = cluster.ClusterStore(str(tmp_path / 'cluster.db'))
+    yield store
+    store.close()
+
+
+def add_partitions(store, *paths):
+    store.add_partitions('leads.csv', 'fingerprint', list(paths), leads=10)
+
+
+def age_bucket(store, name, seconds):
+    """Pretend a bucket was last used `seconds` earlier."""
+    store._conn.execute("UPDATE token_buckets SET updated_at = updated_at - ? WHERE name = ?", (seconds, name))
+
+
+def bucket(store, name):
+    return store._conn.execute("SELECT * FROM token_buckets WHERE name = ?", (name,)).fetchone()
+
+
+# Leases
+
+def test_partitions_are_leased_once_oldest_first(store):
+    add_partitions(store, 'a.csv', 'b.csv')
+
+    first = store.acquire_partition('w1', ttl=60)
+    second = store.acquire_partition('w2', ttl=60)
+    assert (first['path'], first['owner'], first['previous_owner']) == ('a.csv', 'w1', None)
+    assert second['path'] == 'b.csv'
+    assert store.acquire_partition('w3', ttl=60) is None
+
+
+def test_expired_lease_is_taken_over(store):
+    add_partitions(store, 'a.csv')
+    store.acquire_partition('w1', ttl=0.01)
+    time.sleep(0.02)
+
+    lease = store.acquire_partition('w2', ttl=60)
+    assert (lease['owner'], lease['previous_owner'], lease['leases']) == ('w2', 'w1', 2)
+    assert store.heartbeat('w1', ttl=60) == set()
+    assert not store.complete_partition('a.csv', 'w1')
+    assert store.complete_partition('a.csv', 'w2')
+    assert store.outstanding() == 0
+
+
+def test_heartbeat_extends_held_leases(store):
+    add_partitions(store, 'a.csv')
+    store.acquire_partition('w1', ttl=0.05)
+
+    assert store.heartbeat('w1', ttl=60) == {'a.csv'}
+    time.sleep(0.1)
+    assert store.acquire_partition('w2', ttl=60) is None
+
+
+def test_released_partition_remembers_its_owner(store):
+    add_partitions(store, 'a.csv')
+    store.acquire_partition('w1', ttl=60)
+
+    assert not store.release_partition('a.csv', 'w2')
+    assert store.release_partition('a.csv', 'w1')
+    assert store.acquire_partition('w2', ttl=60)['previous_owner'] == 'w1'
+
+
+def test_expire_leases_returns_partitions_to_pending(store):
+    add_partitions(store, 'a.csv', 'b.csv')
+    store.acquire_partition('w1', ttl=0.01)
+    store.acquire_partition('w2', ttl=60)
+    time.sleep(0.02)
+
+    assert [row['path'] for row in store.expire_leases()] == ['a.csv']
+    assert store.status()['partitions'] == {'pending': 1, 'leased': 1}
+
+
+# Token buckets
+
+def test_take_tokens_up_to_max_tokens(store):
+    store.init_bucket('calls', rate=10, capacity=5)
+
+    assert store.take_tokens('calls', 1, max_tokens=3) == (3, 0.0)
+    assert store.take_tokens('calls', 1, max_tokens=10)[0] == pytest.approx(2, abs=0.1)
+    taken, wait = store.take_tokens('calls', 1)
+    assert taken == 0
+    assert 0 < wait <= 0.1
+
+
+def test_rate_change_credits_tokens_earned_at_the_old_rate(store):
+    store.init_bucket('calls', rate=10, capacity=100)
+    store.take_tokens('calls', 100)
+    age_bucket(store, 'calls', 2)
+
+    store.set_bucket_rate('calls', 1)
+    assert bucket(store, 'calls')['tokens'] == pytest.approx(20, abs=0.5)
+    assert bucket(store, 'calls')['rate'] == 1
+
+
+def test_init_of_an_existing_bucket_keeps_its_tokens(store):
+    store.init_bucket('calls', rate=10, capacity=100)
+    store.take_tokens('calls', 100)
+    age_bucket(store, 'calls', 1)
+
+    store.init_bucket('calls', rate=50, capacity=100)
+    assert bucket(store, 'calls')['tokens'] == pytest.approx(10, abs=0.5)
+
+
+def test_shared_bucket_holds_the_rate_across_processes(cluster, store):
+    # Two instances on one store stand in for two worker processes
+    first = cluster.SharedTokenBucket(store, 'calls', rate=1, capacity=10, prefetch=1)
+    second = cluster.SharedTokenBucket(store, 'calls', rate=1, capacity=10, prefetch=1)
+
+    granted = sum(1 for _ in range(10) for limiter in (first, second) if limiter.try_acquire() == 0)
+    assert granted == 10
+    assert first.try_acquire() > 0
+    assert second.try_acquire() > 0
@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+from src.dialer import DialingEngine, TokenBucket
+
+
+# TokenBucket
+
+def test_bucket_starts_full_and_reports_the_wait():
+    bucket = TokenBucket(rate=10, capacity=2)
+
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == 0
+    assert 0 < bucket.try_acquire() <= 0.1
+
+
+def test_rate_change_keeps_accumulated_tokens():
+    bucket = TokenBucket(rate=10, capacity=5)
+    bucket.try_acquire(5)
+    time.sleep(0.2)
+
+    bucket.set_rate(1)
+    assert bucket.available() == pytest.approx(2, abs=0.5)
+    with pytest.raises(ValueError):
+        bucket.set_rate(0)
+
+
+def test_acquire_gives_up_when_stopped():
+    bucket = TokenBucket(rate=0.01, capacity=1)
+    bucket.try_acquire()
+    stop = threading.Event()
+    stop.set()
+
+    assert not bucket.acquire(stop_event=stop)
+
+
+# DialingEngine
+
+def test_every_lead_is_dialed_once_with_bounded_concurrency():
+    lock = threading.Lock()
+    active = []
+    peak = []
+
+    def place_call(lead, test_mode):
+        with lock:
+            active.append(lead['phone'])
+            peak.append(len(active))
+        time.sleep(0.01)
+        with lock:
+            active.remove(lead['phone'])
+        return f"CA{lead['phone']}"
+
+    engine = DialingEngine(place_call, calls_per_second=1000, max_concurrent_calls=3)
+    results = engine.dial({'phone': str(n)} for n in range(20))
+
+    assert sorted(result.call_sid for result in results) == sorted(f"CA{n}" for n in range(20))
+    assert max(peak) <= 3
+
+
+def test_failures_become_results():
+    class Busy(Exception):
+        outcome = 'busy'
+
+    def place_call(lead, test_mode):
+        if lead['phone'] == '1':
+            raise Busy('line busy')
+        return None
+
+    engine = DialingEngine(place_call, calls_per_second=1000, max_concurrent_calls=2)
+    results = {result.lead['phone']: result for result in engine.dial([{'phone': '1'}, {'phone': '2'}])}
+
+    assert (results['1'].success, results['1'].outcome, results['1'].error) == (False, 'busy', 'line busy')
+    assert (results['2'].success, results['2'].error) == (False, "Call was not placed")
+
+
+def test_calls_are_placed_within_the_rate():
+    engine = DialingEngine(lambda lead, test_mode: 'CA', calls_per_second=50, max_concurrent_calls=4, burst=1)
+    started = time.monotonic()
+    engine.dial([{'phone': str(n)} for n in range(11)])
+
+    # The first call uses the burst, the other ten wait for a token each
+    assert time.monotonic() - started >= 0.18
@@ -0,0 +1,125 @@
+import time
+
+import pytest
+
+from src.job_queue import JobQueue, DONE, FAILED, QUEUED, RUNNING
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'jobs.db')
+
+
+def make_queue(path, **kwargs):
+    queue = JobQueue(path, workers=1, **kwargs)
+    queue.register('echo', lambda payload: payload)
+    return queue
+
+
+def fail(payload):
+    raise RuntimeError('no answer')
+
+
+def run_at(queue, job_id):
+    return queue._conn.execute("SELECT run_at FROM jobs WHERE id = ?", (job_id,)).fetchone()['run_at']
+
+
+def make_runnable(queue, job_id):
+    queue._conn.execute("UPDATE jobs SET run_at = 0 WHERE id = ?", (job_id,))
+
+
+# Running
+
+def test_job_runs_and_stores_its_result(db_path):
+    queue = make_queue(db_path)
+    job_id = queue.enqueue('echo', {'n': 1}, key='CA1')
+
+    assert queue.run_once()
+    assert not queue.run_once()
+    job = queue.get(job_id)
+    assert (job['status'], job['result'], job['attempts']) == (DONE, {'n': 1}, 1)
+    assert [job['id'] for job in queue.find('echo', 'CA1')] == [job_id]
+    assert queue.counts() == {DONE: 1}
+
+
+def test_delayed_job_waits_for_its_run_at(db_path):
+    queue = make_queue(db_path)
+    job_id = queue.enqueue('echo', {}, delay=60)
+
+    assert not queue.run_once()
+    make_runnable(queue, job_id)
+    assert queue.run_once()
+
+
+def test_unregistered_kinds_are_left_queued(db_path):
+    queue = make_queue(db_path)
+    queue.enqueue('other', {})
+
+    assert not queue.run_once()
+    assert queue.counts() == {QUEUED: 1}
+
+
+# Retries
+
+def test_failed_job_is_retried_with_backoff(db_path):
+    queue = make_queue(db_path, retry_delay=30)
+    queue.register('fail', fail)
+    job_id = queue.enqueue('fail', {}, max_attempts=3)
+
+    before = time.time()
+    assert queue.run_once()
+    job = queue.get(job_id)
+    assert (job['status'], job['attempts'], job['error']) == (QUEUED, 1, 'no answer')
+    assert run_at(queue, job_id) == pytest.approx(before + 30, abs=1)
+    assert not queue.run_once()
+
+    make_runnable(queue, job_id)
+    before = time.time()
+    queue.run_once()
+    assert run_at(queue, job_id) == pytest.approx(before + 60, abs=1)
+
+
+def test_job_fails_after_max_attempts(db_path):
+    queue = make_queue(db_path, retry_delay=0)
+    queue.register('fail', fail)
+    job_id = queue.enqueue('fail', {}, max_attempts=2)
+
+    assert queue.run_once()
+    assert queue.run_once()
+    assert not queue.run_once()
+    job = queue.get(job_id)
+    assert (job['status'], job['attempts'], job['error']) == (FAILED, 2, 'no answer')
+
+
+# Leases
+
+
+def test_expired_lease_cannot_finish_the_job(db_path):
+    first = make_queue(db_path, lease_seconds=0.01)
+    second = make_queue(db_path, lease_seconds=60)
+    job_id = first.enqueue('echo', {'n': 1})
+
+    stale = first._claim()
+    time.sleep(0.05)
+    current = second._claim()
+    assert current['id'] == job_id
+
+    assert not first._finish(stale, result='late')
+    assert first.get(job_id)['status'] == RUNNING
+    assert second._finish(current, result='on time')
+    job = first.get(job_id)
+    assert (job['status'], job['result'], job['attempts']) == (DONE, 'on time', 2)
+
+
+def test_workers_run_queued_jobs(db_path):
+    queue = make_queue(db_path, poll_interval=0.01)
+    job_id = queue.enqueue('echo', {'n': 2})
+    queue.start()
+    try:
+        deadline = time.time() + 5
+        while queue.get(job_id)['status'] != DONE and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        queue.stop(timeout=5)
+
+    assert queue.get(job_id)['result'] == {'n': 2}
@@ -0,0 +1,84 @@
+import pandas as pd
+import pytest
+
+from src.lead_normalizer import (
+    DUPLICATE, INVALID_AREA_CODE, INVALID_EXCHANGE, MISSING, REJECT_COLUMN, TOO_LONG, TOO_SHORT,
+    LeadNormalizer, normalize_file, normalize_phone, normalize_phones,
+)
+
+PHONES = [
+    ('(585) 685-9955', ('+15856859955', None)),
+    ('585.685.9955', ('+15856859955', None)),
+    ('15856859955', ('+15856859955', None)),
+    ('+1 585 685 9955', ('+15856859955', None)),
+    ('011 44 20 7946 0958', ('+442079460958', None)),
+    ('+44 20 7946 0958', ('+442079460958', None)),
+    (None, ('', MISSING)),
+    (float('nan'), ('', MISSING)),
+    ('', ('', MISSING)),
+    ('n/a', ('', MISSING)),
+    ('685-9955', ('', TOO_SHORT)),
+    ('+1 585 685 995', ('', TOO_SHORT)),
+    ('1585685995512', ('', TOO_LONG)),
+    ('+1 585 685 99551', ('', TOO_LONG)),
+    ('+44 1234', ('', TOO_SHORT)),
+    ('+44 1234 5678 9012 34', ('', TOO_LONG)),
+    ('125 685 9955', ('+11256859955', INVALID_AREA_CODE)),
+    ('411 685 9955', ('+14116859955', INVALID_AREA_CODE)),
+    ('585 185 9955', ('+15851859955', INVALID_EXCHANGE)),
+]
+
+
+@pytest.mark.parametrize('phone, expected', PHONES)
+def test_normalize_phone(phone, expected):
+    assert normalize_phone(phone) == expected
+
+
+def test_vectorized_rules_match_the_scalar_ones():
+    phones = pd.Series([phone for phone, _ in PHONES], dtype=object)
+    normalized = normalize_phones(phones)
+
+    assert list(zip(normalized['phone'], normalized[REJECT_COLUMN])) == [normalize_phone(p) for p in phones]
+
+
+# LeadNormalizer
+
+def test_duplicates_are_caught_across_chunks():
+    normalizer = LeadNormalizer()
+    first = pd.DataFrame({'name': ['Ada', 'Bob', 'Ada again'],
+                          'phone': ['2125550101', '123', '(212) 555-0101']})
+    second = pd.DataFrame({'name': ['Ada third', 'Cy'], 'phone': ['+12125550101', '2125550103']},
+                          index=[3, 4])
+
+    accepted, rejects = normalizer.normalize(first)
+    assert accepted['phone'].tolist() == ['+12125550101']
+    assert rejects[REJECT_COLUMN].tolist() == [TOO_SHORT, DUPLICATE]
+    # Rejects keep the number as it was in the file
+    assert rejects['phone'].tolist() == ['123', '(212) 555-0101']
+
+    accepted, rejects = normalizer.normalize(second)
+    assert accepted['name'].tolist() == ['Cy']
+    assert rejects[REJECT_COLUMN].tolist() == [DUPLICATE]
+    assert (normalizer.accepted, normalizer.rejected) == (2, 3)
+
+
+def test_remembered_numbers_count_as_seen():
+    normalizer = LeadNormalizer()
+    normalizer.remember(pd.Series(['2125550101', '123']))
+
+    accepted, rejects = normalizer.normalize(pd.DataFrame({'phone': ['212-555-0101', '2125550102']}))
+    assert accepted['phone'].tolist() == ['+12125550102']
+    assert rejects[REJECT_COLUMN].tolist() == [DUPLICATE]
+
+
+def test_normalize_file(tmp_path):
+    leads = tmp_path / 'leads.csv'
+    leads.write_text("name,phone\nAda,2125550101\nBad,123\nBob,2125550102\nAda again,2125550101\n")
+    output = tmp_path / 'out.csv'
+    rejects = tmp_path / 'rejects.csv'
+
+    for _ in range(2):
+        assert normalize_file(str(leads), str(output), str(rejects), chunk_size=2) == (2, 2)
+
+    assert pd.read_csv(output, dtype=str)['phone'].tolist() == ['+12125550101', '+12125550102']
+    assert pd.read_csv(rejects)[REJECT_COLUMN].tolist() == [TOO_SHORT, DUPLICATE]
@@ -0,0 +1,100 @@
+import pytest
+
+from src.pacer import ANSWERED, COMPLETED, DialerSimulator, Pacer
+
+
+def answer(pacer, call_sid, at, rang=10.0):
+    pacer.on_dialed(call_sid, now=at - rang)
+    pacer.on_status(call_sid, ANSWERED, now=at)
+
+
+# IVR
+
+def test_agent_is_taken_at_transfer_not_at_answer():
+    pacer = Pacer(agents=1, ivr_time=30)
+    answer(pacer, 'CA1', at=100)
+    assert pacer.stats()['in_ivr'] == 1
+    assert pacer.stats()['busy_agents'] == 0
+
+    pacer.rate(now=130)
+    assert pacer.stats()['in_ivr'] == 0
+    assert pacer.stats()['busy_agents'] == 1
+
+
+def test_call_transferred_to_a_busy_pool_is_abandoned():
+    pacer = Pacer(agents=1, ivr_time=30)
+    answer(pacer, 'CA1', at=100)
+    # Answered while the first call is still in the IVR, transferred once the agent is busy
+    answer(pacer, 'CA2', at=110)
+
+    pacer.rate(now=140)
+    assert (pacer.answered, pacer.abandoned) == (2, 1)
+
+
+def test_hangup_in_the_ivr_never_needs_an_agent():
+    pacer = Pacer(agents=1, ivr_time=30)
+    answer(pacer, 'CA1', at=100)
+    pacer.on_status('CA1', COMPLETED, duration=10, now=110)
+    answer(pacer, 'CA2', at=120)
+
+    pacer.rate(now=150)
+    assert pacer.abandoned == 0
+    assert pacer.stats()['busy_agents'] == 1
+
+
+def test_handle_time_leaves_out_the_ivr():
+    pacer = Pacer(agents=1, ivr_time=30, initial_handle_time=100, alpha=1.0)
+    answer(pacer, 'CA1', at=100)
+    pacer.on_status('CA1', COMPLETED, duration=90, now=190)
+
+    assert pacer.handle_time.value == 60
+
+
+def test_completed_without_answered_callback():
+    pacer = Pacer(agents=1, ivr_time=30, alpha=1.0)
+    pacer.on_dialed('CA1', now=0)
+    pacer.on_status('CA1', COMPLETED, duration=100, now=120)
+
+    assert pacer.answered == 1
+    assert pacer.handle_time.value == 70
+    assert pacer.stats()['busy_agents'] == 0
+
+
+# Rate
+
+def test_calls_in_the_ivr_hold_back_dialing():
+    idle = Pacer(agents=2, ivr_time=30)
+    waiting = Pacer(agents=2, ivr_time=30)
+    answer(waiting, 'CA1', at=100)
+
+    assert waiting.rate(now=101) < idle.rate(now=101)
+
+
+def test_long_ringing_calls_count_as_less_likely_to_answer():
+    pacer = Pacer(agents=5)
+    assert pacer._answer_chance(0, 0.3, 15) == pytest.approx(0.3)
+    assert pacer._answer_chance(60, 0.3, 15) < pacer._answer_chance(10, 0.3, 15) < 0.3
+
+
+def test_rate_stays_within_bounds():
+    assert Pacer(agents=50, max_rate=2).rate(now=0) == 2
+    pacer = Pacer(agents=1, min_rate=0.01)
+    answer(pacer, 'CA1', at=10)
+    assert pacer.rate(now=10) == 0.01
+
+
+# Simulation
+
+def test_simulation_is_repeatable():
+    sim = DialerSimulator(agents=5, ivr_time=30, seed=3)
+    assert sim.run(1800, fixed_rate=0.1) == sim.run(1800, fixed_rate=0.1)
+
+
+def test_pacer_keeps_abandons_near_target():
+    sim = DialerSimulator(agents=20, answer_rate=0.3, ivr_time=30, seed=1)
+    paced = sim.run(4 * 3600, pacer=Pacer(agents=20, max_rate=20, ivr_time=30))
+    fixed = sim.run(4 * 3600, fixed_rate=1.0)
+
+    assert paced['abandon_rate'] < 0.06
+    assert paced['utilization'] > 0.7
+    assert fixed['abandon_rate'] > 0.2
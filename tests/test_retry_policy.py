@@ -0,0 +1,162 @@
+import threading
+
+import pytest
+
+from src.retry_policy import (
+    API_ERROR, BUSY, INVALID, NO_ANSWER, RATE_LIMITED, VOICEMAIL,
+    RedialQueue, RetryPolicy, RetryRule, classify_api_error, classify_call_status,
+)
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+# RedialQueue
+
+def test_merge_ends_once_every_lead_finished():
+    queue = RedialQueue(clock=FakeClock())
+    leads = queue.merge([{'phone': 'a'}, {'phone': 'b'}])
+
+    for lead in leads:
+        queue.finished(lead)
+
+    assert len(queue) == 0
+
+
+def test_merge_waits_for_pending_redials_then_ends():
+    clock = FakeClock()
+    queue = RedialQueue(clock=clock)
+    leads = queue.merge([{'phone': 'a'}, {'phone': 'b'}])
+
+    a = next(leads)
+    queue.push(a, 5)
+    queue.finished(next(leads))
+
+    clock.now = 5
+    assert next(leads) is a
+    queue.finished(a)
+    assert next(leads, None) is None
+
+
+def test_due_redials_come_before_the_next_fresh_lead():
+    clock = FakeClock()
+    queue = RedialQueue(clock=clock)
+    leads = queue.merge([{'phone': 'a'}, {'phone': 'b'}, {'phone': 'c'}])
+
+    a = next(leads)
+    queue.push(a, 1)
+    clock.now = 1
+    assert next(leads) is a
+    assert next(leads)['phone'] == 'b'
+
+
+def test_redials_are_released_by_due_time_then_fifo():
+    clock = FakeClock()
+    queue = RedialQueue(clock=clock)
+    leads = queue.merge([{'phone': p} for p in 'abc'])
+
+    a, b, c = next(leads), next(leads), next(leads)
+    queue.push(a, 10)
+    queue.push(b, 5)
+    queue.push(c, 5)
+
+    clock.now = 10
+    order = []
+    for lead in leads:
+        order.append(lead['phone'])
+        queue.finished(lead)
+    assert order == ['b', 'c', 'a']
+
+
+def test_merge_stops_on_stop_event_with_outstanding_leads():
+    stop = threading.Event()
+    queue = RedialQueue(clock=FakeClock())
+    leads = queue.merge([{'phone': 'a'}], stop_event=stop)
+
+    next(leads)  # never finished
+    stop.set()
+    assert next(leads, None) is None
+
+
+# RetryPolicy
+
+@pytest.mark.parametrize('outcome, max_attempts', [
+    (API_ERROR, 3), (RATE_LIMITED, 6), (BUSY, 3), (NO_ANSWER, 3), (VOICEMAIL, 2),
+])
+def test_default_attempt_limit_per_outcome(outcome, max_attempts):
+    policy = RetryPolicy()
+
+    for attempts in range(1, max_attempts):
+        assert policy.delay(outcome, attempts) is not None
+    assert policy.delay(outcome, max_attempts) is None
+
+
+@pytest.mark.parametrize('outcome', [INVALID, None, 'unknown'])
+def test_outcomes_without_rule_are_not_retried(outcome):
+    assert RetryPolicy().delay(outcome, 1) is None
+
+
+def test_config_overrides_one_outcome_and_keeps_the_rest():
+    policy = RetryPolicy.from_config({'busy': {'max_attempts': 5, 'base_delay': 300}})
+
+    assert policy.rules[BUSY].max_attempts == 5
+    assert policy.rules[BUSY].base_delay == 300
+    assert policy.rules[BUSY].max_delay == 3600
+    assert policy.delay(BUSY, 4) is not None
+    assert policy.delay(BUSY, 5) is None
+    assert policy.rules[NO_ANSWER].max_attempts == 3
+
+
+def test_config_rejects_unknown_outcome():
+    with pytest.raises(ValueError):
+        RetryPolicy.from_config({'invalid': {'max_attempts': 2}})
+
+
+def test_single_attempt_disables_redials():
+    policy = RetryPolicy({outcome: RetryRule(1, 1, 1) for outcome in (BUSY, NO_ANSWER, VOICEMAIL)})
+
+    assert not policy.redials
+    assert RetryPolicy().redials
+
+
+def test_backoff_grows_to_max_delay_without_jitter():
+    rule = RetryRule(max_attempts=10, base_delay=2, max_delay=20, jitter=0)
+
+    assert [rule.delay(n) for n in range(1, 6)] == [2, 4, 8, 16, 20]
+
+
+# Classification
+
+@pytest.mark.parametrize('status, code, outcome', [
+    (429, None, RATE_LIMITED),
+    (429, 20429, RATE_LIMITED),
+    (400, 20429, RATE_LIMITED),
+    (400, 21211, INVALID),
+    (400, 21214, INVALID),
+    (429, 21211, INVALID),
+    (400, None, INVALID),
+    (401, 20003, INVALID),
+    (404, None, INVALID),
+    (500, None, API_ERROR),
+    (503, 20500, API_ERROR),
+    (None, None, API_ERROR),
+])
+def test_classify_api_error(status, code, outcome):
+    assert classify_api_error(status, code) == outcome
+
+
+@pytest.mark.parametrize('status, answered_by, outcome', [
+    ('busy', None, BUSY),
+    ('no-answer', None, NO_ANSWER),
+    ('completed', 'machine_end_beep', VOICEMAIL),
+    ('completed', 'human', None),
+    ('completed', None, None),
+    ('failed', None, None),
+])
+def test_classify_call_status(status, answered_by, outcome):
+    assert classify_call_status(status, answered_by) == outcome
@@ -0,0 +1,142 @@
+from datetime import datetime
+
+import pytest
+
+from src.scheduler import CallingWindows, LeadScheduler, ZoneInfo
+from src.state_store import StateStore
+
+NEW_YORK = ZoneInfo('America/New_York')
+NY_PHONE = '+12125550{:03d}'
+ALWAYS_OPEN = {'default': ['00:00-24:00']}
+
+
+def local(*args, zone=NEW_YORK):
+    """Epoch seconds of a wall-clock time."""
+    return datetime(*args, tzinfo=zone).timestamp()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return StateStore(str(tmp_path / 'state.db'))
+
+
+def make_scheduler(store, windows=None):
+    return LeadScheduler(store, windows=CallingWindows(windows), clock=lambda: 0.0)
+
+
+def drain(scheduler, now):
+    phones = []
+    while True:
+        lead = scheduler.pop_ready(now)
+        if lead is None:
+            return phones
+        phones.append(lead['phone'])
+
+
+def test_pop_ready_by_priority_then_due_time(store):
+    scheduler = make_scheduler(store, ALWAYS_OPEN)
+    now = local(2026, 6, 10, 12, 0)
+    scheduler.add({'phone': NY_PHONE.format(1), 'priority': 1}, due_at=now - 30)
+    scheduler.add({'phone': NY_PHONE.format(2), 'priority': 5}, due_at=now - 10)
+    scheduler.add({'phone': NY_PHONE.format(3), 'priority': 5}, due_at=now - 20)
+    scheduler.add({'phone': NY_PHONE.format(4), 'priority': 3}, due_at=now - 40)
+    scheduler.add({'phone': NY_PHONE.format(5), 'priority': 9}, due_at=now + 60)
+
+    assert drain(scheduler, now) == [NY_PHONE.format(n) for n in (3, 2, 4, 1)]
+    assert drain(scheduler, now + 60) == [NY_PHONE.format(5)]
+
+
+def test_rescheduling_supersedes_the_older_entry(store):
+    scheduler = make_scheduler(store, ALWAYS_OPEN)
+    now = local(2026, 6, 10, 12, 0)
+    scheduler.add({'phone': NY_PHONE.format(1)}, due_at=now)
+    scheduler.add({'phone': NY_PHONE.format(1)}, due_at=now + 600)
+
+    assert scheduler.pop_ready(now) is None
+    assert drain(scheduler, now + 600) == [NY_PHONE.format(1)]
+
+
+def test_lead_waits_for_its_window(store):
+    scheduler = make_scheduler(store)
+    evening = local(2026, 6, 10, 21, 0)
+    scheduler.add({'phone': NY_PHONE.format(1)}, due_at=evening)
+
+    opens = local(2026, 6, 11, 9, 0)
+    assert scheduler.next_release() == opens
+    assert scheduler.pop_ready(opens - 1) is None
+    assert drain(scheduler, opens) == [NY_PHONE.format(1)]
+
+
+def test_window_is_rechecked_for_leads_left_waiting(store):
+    scheduler = make_scheduler(store)
+    before_close = local(2026, 6, 10, 19, 59)
+    scheduler.add({'phone': NY_PHONE.format(1), 'priority': 2}, due_at=before_close)
+    scheduler.add({'phone': NY_PHONE.format(2), 'priority': 1}, due_at=before_close)
+
+    assert scheduler.pop_ready(before_close)['phone'] == NY_PHONE.format(1)
+    # The window closed while the lower priority lead waited behind the first one
+    assert scheduler.pop_ready(local(2026, 6, 10, 20, 0, 30)) is None
+    assert scheduler.next_release() == local(2026, 6, 11, 9, 0)
+    assert drain(scheduler, local(2026, 6, 11, 9, 0)) == [NY_PHONE.format(2)]
+
+
+def test_multi_zone_lead_needs_every_window_open(store):
+    scheduler = make_scheduler(store)
+    # 212 is New York, the default zones of an unknown area code are New York and Los Angeles
+    unknown = '+15555550001'
+    morning = local(2026, 6, 10, 9, 0)
+    scheduler.add({'phone': unknown}, due_at=morning)
+    scheduler.add({'phone': NY_PHONE.format(1)}, due_at=morning)
+
+    assert drain(scheduler, morning) == [NY_PHONE.format(1)]
+    los_angeles_opens = local(2026, 6, 10, 9, 0, zone=ZoneInfo('America/Los_Angeles'))
+    assert drain(scheduler, los_angeles_opens) == [unknown]
+
+
+@pytest.mark.parametrize('day_before, dst_day', [
+    ((2026, 3, 7), (2026, 3, 8)),    # spring forward, a 23 hour day
+    ((2026, 10, 31), (2026, 11, 1)),  # fall back, a 25 hour day
+])
+def test_window_keeps_local_hours_on_dst_day(store, day_before, dst_day):
+    scheduler = make_scheduler(store)
+    scheduler.add({'phone': NY_PHONE.format(1)}, due_at=local(*day_before, 21, 0))
+
+    opens = local(*dst_day, 9, 0)
+    assert opens - local(*day_before, 9, 0) != 86400
+    assert scheduler.next_release() == opens
+    assert scheduler.pop_ready(opens - 1) is None
+    assert drain(scheduler, opens) == [NY_PHONE.format(1)]
+
+
+def test_released_lead_stays_persisted_until_done(store):
+    scheduler = make_scheduler(store, ALWAYS_OPEN)
+    now = local(2026, 6, 10, 12, 0)
+    scheduler.add({'phone': NY_PHONE.format(1), 'name': 'Ada'}, due_at=now)
+
+    lead = scheduler.pop_ready(now)
+    assert lead['name'] == 'Ada'
+    assert store.get_scheduled(lead['phone']) is not None
+
+    scheduler.done(lead['phone'])
+    assert store.get_scheduled(lead['phone']) is None
+    assert make_scheduler(store, ALWAYS_OPEN).restore() == 0
+
+
+def test_restore_rebuilds_the_heap(store):
+    now = local(2026, 6, 10, 12, 0)
+    make_scheduler(store, ALWAYS_OPEN).add_many(
+        [{'phone': NY_PHONE.format(n), 'priority': n} for n in range(3)], due_at=now)
+
+    scheduler = make_scheduler(store, ALWAYS_OPEN)
+    assert scheduler.restore() == 3
+    assert drain(scheduler, now) == [NY_PHONE.format(n) for n in (2, 1, 0)]
+
+
+def test_lead_unscheduled_elsewhere_is_skipped(store):
+    scheduler = make_scheduler(store, ALWAYS_OPEN)
+    now = local(2026, 6, 10, 12, 0)
+    scheduler.add({'phone': NY_PHONE.format(1), 'priority': 2}, due_at=now)
+    scheduler.add({'phone': NY_PHONE.format(2), 'priority': 1}, due_at=now)
+
+    store.unschedule(NY_PHONE.format(1))
+    assert drain(scheduler, now) == [NY_PHONE.format(2)]
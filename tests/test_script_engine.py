@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from src import script_engine
+
+SCRIPT = """
+name: {name}
+start: ask
+nodes:
+  ask:
+    type: question
+    prompt: {prompt}
+    next: bye
+  bye:
+    type: hangup
+    say: Goodbye.
+"""
+
+
+@pytest.fixture
+def scripts_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(script_engine, 'SCRIPTS_DIR', str(tmp_path))
+    monkeypatch.setattr(script_engine, 'RELOAD_INTERVAL', 0)
+    monkeypatch.setattr(script_engine, '_scripts', None)
+    monkeypatch.setattr(script_engine, '_signature', None)
+    return tmp_path
+
+
+def write(directory, name, text, mtime=None):
+    path = directory / f'{name}.yaml'
+    path.write_text(text)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def test_edited_script_is_reloaded(scripts_dir):
+    write(scripts_dir, 'dental', SCRIPT.format(name='dental', prompt='Checkup?'), mtime=1000)
+    before = script_engine.get_script('dental')
+    assert before.node('ask').prompt == 'Checkup?'
+
+    write(scripts_dir, 'dental', SCRIPT.format(name='dental', prompt='Insurance?'), mtime=2000)
+    after = script_engine.get_script('dental')
+    assert after.node('ask').prompt == 'Insurance?'
+    assert after.fingerprint != before.fingerprint
+
+
+def test_added_script_is_loaded(scripts_dir):
+    write(scripts_dir, 'dental', SCRIPT.format(name='dental', prompt='Checkup?'))
+    assert set(script_engine.get_scripts()) == {'dental'}
+
+    write(scripts_dir, 'recall', SCRIPT.format(name='recall', prompt='Rebook?'))
+    assert set(script_engine.get_scripts()) == {'dental', 'recall'}
+
+
+def test_invalid_edit_keeps_the_loaded_scripts(scripts_dir):
+    write(scripts_dir, 'dental', SCRIPT.format(name='dental', prompt='Checkup?'), mtime=1000)
+    script_engine.get_scripts()
+
+    write(scripts_dir, 'dental', 'name: dental\nstart: missing\nnodes: {}\n', mtime=2000)
+    assert script_engine.get_script('dental').node('ask').prompt == 'Checkup?'
+
+
+def test_invalid_script_fails_the_first_load(scripts_dir):
+    write(scripts_dir, 'dental', 'name: dental\nstart: missing\nnodes: {}\n')
+    with pytest.raises(script_engine.ScriptError):
+        script_engine.get_scripts()
+
+
+def test_scripts_are_checked_at_most_every_interval(scripts_dir, monkeypatch):
+    monkeypatch.setattr(script_engine, 'RELOAD_INTERVAL', 3600)
+    write(scripts_dir, 'dental', SCRIPT.format(name='dental', prompt='Checkup?'), mtime=1000)
+    script_engine.get_scripts()
+
+    write(scripts_dir, 'dental', SCRIPT.format(name='dental', prompt='Insurance?'), mtime=2000)
+    assert script_engine.get_script('dental').node('ask').prompt == 'Checkup?'
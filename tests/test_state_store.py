@@ -0,0 +1,193 @@
+import multiprocessing
+import sqlite3
+
+import pytest
+
+from src.state_store import DIALING, FAILED, INITIATED, PENDING, FileProgress, StateStore
+
+# Layout of a database from before the lead, answered_by and source_file columns
+_OLD_SCHEMA = """
+CREATE TABLE leads (
+    phone TEXT PRIMARY KEY, name TEXT, status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,
+    last_call_sid TEXT, last_error TEXT, source_file TEXT, created_at TEXT NOT NULL, updated_at TEXT NOT NULL
+);
+CREATE TABLE schedule (
+    phone TEXT PRIMARY KEY, lead TEXT NOT NULL, priority REAL NOT NULL DEFAULT 0,
+    due_at REAL NOT NULL, created_at REAL NOT NULL
+);
+CREATE TABLE call_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, call_sid TEXT NOT NULL, status TEXT NOT NULL,
+    duration REAL, created_at REAL NOT NULL
+);
+"""
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = StateStore(str(tmp_path / 'state.db'))
+    yield store
+    store.close()
+
+
+def columns(store, table):
+    return {row['name'] for row in store._conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _open(path, barrier, errors):
+    barrier.wait()
+    try:
+        StateStore(path).close()
+    except Exception as e:
+        errors.put(repr(e))
+
+
+def open_concurrently(path, processes=6):
+    barrier = multiprocessing.Barrier(processes)
+    errors = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_open, args=(path, barrier, errors)) for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(30)
+    assert all(worker.exitcode == 0 for worker in workers)
+    found = []
+    while not errors.empty():
+        found.append(errors.get())
+    return found
+
+
+# Schema
+
+def test_new_database_has_every_column(store):
+    assert {'lead'} <= columns(store, 'leads')
+    assert {'answered_by'} <= columns(store, 'call_events')
+    assert {'source_file'} <= columns(store, 'schedule')
+
+
+def test_old_database_is_migrated(tmp_path):
+    path = str(tmp_path / 'state.db')
+    conn = sqlite3.connect(path)
+    conn.executescript(_OLD_SCHEMA)
+    conn.close()
+
+    store = StateStore(path)
+    assert 'lead' in columns(store, 'leads')
+    assert 'answered_by' in columns(store, 'call_events')
+    assert 'source_file' in columns(store, 'schedule')
+    store.schedule_leads([('+12125550001', '{}', 0, 0, 'leads.csv')])
+    assert store.count_scheduled('leads.csv') == 1
+
+
+@pytest.mark.parametrize('old_layout', [False, True])
+def test_processes_open_one_database_at_once(tmp_path, old_layout):
+    for round_ in range(10):
+        path = str(tmp_path / f'state_{round_}.db')
+        if old_layout:
+            conn = sqlite3.connect(path)
+            conn.executescript(_OLD_SCHEMA)
+            conn.close()
+
+        assert open_concurrently(path) == []
+        store = StateStore(path)
+        assert 'source_file' in columns(store, 'schedule')
+        store.close()
+
+
+# Leads
+
+def test_number_is_claimed_once(store):
+    assert store.claim_lead('+12125550001', 'Ada', 'a.csv')
+    assert not store.claim_lead('+12125550001', 'Ada', 'b.csv')
+
+    lead = store.get_lead('+12125550001')
+    assert (lead['status'], lead['attempts'], lead['source_file']) == (DIALING, 1, 'a.csv')
+
+
+def test_result_is_recorded_on_the_lead(store):
+    store.claim_lead('+12125550001')
+    store.claim_lead('+12125550002')
+    store.record_result('+12125550001', 'CA1')
+    store.record_result('+12125550002', None, 'invalid number')
+
+    assert store.lead_by_call_sid('CA1')['status'] == INITIATED
+    assert store.get_lead('+12125550002')['status'] == FAILED
+    assert store.get_lead('+12125550002')['last_error'] == 'invalid number'
+
+
+def test_requeued_lead_can_be_claimed_again(store):
+    store.claim_lead('+12125550001', lead='{"phone": "+12125550001"}')
+    store.record_result('+12125550001', 'CA1')
+    store.update_call_status('CA1', 'busy')
+
+    assert not store.requeue_lead('+12125550001', 'CA0', 'busy')
+    assert store.requeue_lead('+12125550001', 'CA1', 'busy')
+    assert not store.requeue_lead('+12125550001', 'CA1', 'busy')
+    assert store.claim_lead('+12125550001')
+    lead = store.get_lead('+12125550001')
+    assert (lead['attempts'], lead['lead']) == (2, '{"phone": "+12125550001"}')
+
+
+def test_interrupted_dials_are_reset_per_file(store):
+    store.claim_lead('+12125550001', source_file='a.csv')
+    store.claim_lead('+12125550002', source_file='b.csv')
+
+    assert store.reset_inflight('a.csv') == 1
+    assert store.get_lead('+12125550001')['status'] == PENDING
+    assert store.get_lead('+12125550002')['status'] == DIALING
+    assert store.reset_inflight() == 1
+
+
+# Lead files
+
+def test_file_resumes_after_saved_rows(store, tmp_path):
+    path = tmp_path / 'leads.csv'
+    path.write_text('name,phone\n')
+    assert store.start_file(str(path)) == 0
+
+    store.mark_file_progress(str(path), 40)
+    assert store.start_file(str(path)) == 40
+    assert store.unfinished_files() == [str(path)]
+
+    store.finish_file(str(path), 50)
+    assert store.unfinished_files() == []
+    # A finished file dropped in again is processed from the start
+    assert store.start_file(str(path)) == 0
+
+
+def test_changed_file_starts_over(store, tmp_path):
+    path = tmp_path / 'leads.csv'
+    path.write_text('name,phone\n')
+    store.start_file(str(path))
+    store.mark_file_progress(str(path), 40)
+
+    path.write_text('name,phone\nAda,2125550001\n')
+    assert store.start_file(str(path)) == 0
+
+
+def test_progress_only_advances_past_contiguous_rows(store, tmp_path):
+    path = str(tmp_path / 'leads.csv')
+    open(path, 'w').close()
+    store.start_file(path)
+    progress = FileProgress(store, path, start_row=10, save_every=2)
+
+    progress.mark_done(11)
+    progress.mark_done(12)
+    assert progress.rows_done == 10
+    assert store.start_file(path) == 0
+
+    progress.mark_done(10)
+    assert progress.rows_done == 13
+    assert store.start_file(path) == 13
+
+
+def test_halted_progress_is_not_saved(store, tmp_path):
+    path = str(tmp_path / 'leads.csv')
+    open(path, 'w').close()
+    store.start_file(path)
+    progress = FileProgress(store, path, save_every=1)
+
+    progress.mark_done(0)
+    progress.halt()
+    progress.mark_done(1)
+    assert progress.rows_done == 2
+    assert store.start_file(path) == 1
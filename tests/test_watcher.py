@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+from src.state_store import StateStore
+
+LEADS = """name,phone
+Ada,2125550101
+Bad,123
+Bob,2125550102
+Ada again,(212) 555-0101
+Worse,
+Cy,2125550103
+"""
+
+
+@pytest.fixture(scope='module')
+def watcher(import_with_config):
+    return import_with_config('src.watcher')
+
+
+@pytest.fixture
+def handler(watcher, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(watcher, 'rejects_path', lambda path: str(tmp_path / 'rejects' / 'leads.rejects.csv'))
+    return watcher.LeadHandler(StateStore(str(tmp_path / 'state.db')))
+
+
+@pytest.fixture
+def lead_file(tmp_path):
+    path = tmp_path / 'leads.csv'
+    path.write_text(LEADS)
+    return str(path)
+
+
+def rejected_rows(watcher, tmp_path):
+    return pd.read_csv(tmp_path / 'rejects' / 'leads.rejects.csv')[watcher.ROW_KEY].tolist()
+
+
+def test_rejects_and_duplicates_are_split_off(watcher, handler, lead_file, tmp_path):
+    leads = list(handler._iter_leads(lead_file, chunk_size=2))
+
+    assert [lead['name'] for lead in leads] == ['Ada', 'Bob', 'Cy']
+    assert leads[0]['phone'] == '+12125550101'
+    assert rejected_rows(watcher, tmp_path) == [1, 3, 4]
+
+
+def test_resume_does_not_write_rejects_twice(watcher, handler, lead_file, tmp_path):
+    interrupted = handler._iter_leads(lead_file, chunk_size=2)
+    assert next(interrupted)['name'] == 'Ada'
+    assert next(interrupted)['name'] == 'Bob'
+    interrupted.close()
+    assert rejected_rows(watcher, tmp_path) == [1, 3]
+
+    # Only row 0 was saved as done, so the resume reads row 1 on
+    resumed = list(handler._iter_leads(lead_file, chunk_size=2, skip_rows=1))
+    assert [lead['name'] for lead in resumed] == ['Bob', 'Cy']
+    # Row 3 repeats row 0's number, which the resume skipped over
+    assert rejected_rows(watcher, tmp_path) == [1, 3, 4]
+
+
+def test_new_run_of_a_file_starts_its_rejects_over(watcher, handler, lead_file, tmp_path):
+    list(handler._iter_leads(lead_file))
+    list(handler._iter_leads(lead_file))
+
+    assert rejected_rows(watcher, tmp_path) == [1, 3, 4]